@@ -0,0 +1,96 @@
+"""Token-aware, self-adjusting chunk sizes for LLM suggestion passes.
+
+A suggestion chunk has to fit its answer inside ``max_tokens``: when it does
+not, the JSON is cut off and every id in the chunk comes back missing. The
+chunker estimates completion tokens per item (seeded with a conservative
+guess and then tracked as a moving average of observed usage) and prompt
+tokens from the serialised items, and caps chunks so both fit. On top of that
+cap, the chunk size follows additive-increase/multiplicative-decrease: clean
+chunks grow it by one, a truncated response or a high missing-id rate halves
+it. State lives on the service, so what one run learns carries to the next.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, List
+
+ADAPTIVE_CHUNK_MIN = 1
+ADAPTIVE_CHUNK_MAX = int(os.environ.get("ADAPTIVE_CHUNK_MAX", "40"))
+SUGGESTION_PROMPT_TOKEN_BUDGET = int(os.environ.get("SUGGESTION_PROMPT_TOKEN_BUDGET", "6000"))
+
+CHARS_PER_TOKEN = 4
+# transaction_id + category + confidence + an <=80 char reason, as JSON.
+INITIAL_COMPLETION_TOKENS_PER_ITEM = 60
+COMPLETION_HEADROOM = 0.8
+MISSING_RATE_SHRINK = 0.2
+EMA_WEIGHT = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class AdaptiveChunker:
+    def __init__(self, initial_size: int, max_tokens: int, prompt_budget: int = SUGGESTION_PROMPT_TOKEN_BUDGET) -> None:
+        self.max_tokens = max_tokens
+        self.prompt_budget = prompt_budget
+        self.size = max(ADAPTIVE_CHUNK_MIN, min(ADAPTIVE_CHUNK_MAX, initial_size))
+        self.completion_tokens_per_item = float(INITIAL_COMPLETION_TOKENS_PER_ITEM)
+        self.chunks = 0
+        self.truncated = 0
+        self._lock = threading.Lock()
+
+    def completion_cap(self) -> int:
+        """Most items whose estimated answer fits in ``max_tokens`` with headroom."""
+        return max(ADAPTIVE_CHUNK_MIN, int(self.max_tokens * COMPLETION_HEADROOM / self.completion_tokens_per_item))
+
+    def limit(self) -> int:
+        with self._lock:
+            return max(ADAPTIVE_CHUNK_MIN, min(self.size, self.completion_cap()))
+
+    def split(self, items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Greedy chunks of ``items`` within the current size and prompt token budget."""
+        limit = self.limit()
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        prompt_tokens = 0
+        for item in items:
+            item_tokens = estimate_tokens(json.dumps(item))
+            if current and (len(current) >= limit or prompt_tokens + item_tokens > self.prompt_budget):
+                chunks.append(current)
+                current, prompt_tokens = [], 0
+            current.append(item)
+            prompt_tokens += item_tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def record(self, requested: int, returned: int, truncated: bool, completion_tokens: int = 0) -> None:
+        """Feed back one chunk's outcome and adjust the chunk size."""
+        if requested <= 0:
+            return
+        with self._lock:
+            self.chunks += 1
+            if returned and completion_tokens and not truncated:
+                observed = completion_tokens / returned
+                self.completion_tokens_per_item += EMA_WEIGHT * (observed - self.completion_tokens_per_item)
+            missing_rate = 1 - returned / requested
+            if truncated or missing_rate > MISSING_RATE_SHRINK:
+                self.truncated += int(truncated)
+                self.size = max(ADAPTIVE_CHUNK_MIN, min(self.size, requested) // 2)
+            elif requested >= self.size:
+                self.size = min(ADAPTIVE_CHUNK_MAX, self.size + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "completion_cap": self.completion_cap(),
+                "completion_tokens_per_item": round(self.completion_tokens_per_item, 1),
+                "chunks": self.chunks,
+                "truncated": self.truncated,
+            }
@@ -0,0 +1,130 @@
+"""Set-based write helpers for transaction category changes.
+
+Categorisation passes resolve many transactions at once but used to persist
+them with one ``update().eq("id", ...)`` per row. ``apply_categories_bulk``
+groups the ids by target category and issues one ``update().in_("id", ...)``
+per category (chunked to keep the PostgREST URL bounded), so the number of
+round-trips is the number of distinct categories rather than rows. A single
+upsert is not used because ``transactions`` has not-null columns the
+categorisers do not carry.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping
+
+from src.merchants import vendor_key
+
+logger = logging.getLogger(__name__)
+
+IN_FILTER_CHUNK_SIZE = 200
+
+
+def chunked(values: List[Any], size: int = IN_FILTER_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def apply_categories_bulk(client, user_id: str, categories_by_id: Mapping[str, str]) -> Dict[str, Any]:
+    """Persist ``{transaction_id: category}`` for one user.
+
+    Returns ``{"updated", "failed_ids", "round_trips"}``; a failed chunk is
+    logged and reported rather than raised, matching the best-effort per-row
+    writes this replaces.
+    """
+    ids_by_category: Dict[str, List[str]] = defaultdict(list)
+    for transaction_id, category in categories_by_id.items():
+        if transaction_id and category:
+            ids_by_category[category].append(transaction_id)
+
+    updated = 0
+    round_trips = 0
+    failed_ids: List[str] = []
+    for category, ids in ids_by_category.items():
+        for chunk in chunked(ids, IN_FILTER_CHUNK_SIZE):
+            round_trips += 1
+            try:
+                (
+                    client.table("transactions")
+                    .update({"category": category})
+                    .in_("id", chunk)
+                    .eq("user_id", user_id)
+                    .execute()
+                )
+                updated += len(chunk)
+            except Exception as e:
+                failed_ids.extend(chunk)
+                logger.warning("Bulk category update failed category=%s ids=%s: %r", category, len(chunk), e)
+
+    return {"updated": updated, "failed_ids": failed_ids, "round_trips": round_trips}
+
+
+class CategoryWriteSet:
+    """Buffer category changes and learning writes for one run, then flush in bulk.
+
+    ``stage`` records a transaction's new category and, optionally, that its
+    description should be learned. ``flush`` applies the category changes via
+    ``apply_categories_bulk`` and then upserts ``learned_rules`` and
+    ``vendor_categories`` once each, deduplicated by description (last staged
+    category wins) and skipping transactions whose update failed. The two
+    upserts fail independently; ``round_trips`` counts only requests sent.
+    """
+
+    def __init__(self, client, user_id: str) -> None:
+        self.client = client
+        self.user_id = user_id
+        self._categories: Dict[str, str] = {}
+        self._learn: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def stage(self, transaction_id: str, category: str, description: str = "", learn: bool = False) -> None:
+        self._categories[transaction_id] = category
+        if learn and description:
+            self._learn[transaction_id] = (description, category)
+        else:
+            self._learn.pop(transaction_id, None)
+
+    def flush(self, updated_at: str) -> Dict[str, Any]:
+        result = apply_categories_bulk(self.client, self.user_id, self._categories)
+        failed = set(result["failed_ids"])
+
+        learned: Dict[str, str] = {}
+        for transaction_id, (description, category) in self._learn.items():
+            if transaction_id not in failed:
+                learned[description] = category
+
+        if learned:
+            # Independent writes: a failed learned_rules upsert must not stop
+            # the vendor cache update, and vice versa.
+            upserts = (
+                (
+                    "learned_rules",
+                    [
+                        {"user_id": self.user_id, "description": d, "category": c, "updated_at": updated_at}
+                        for d, c in learned.items()
+                    ],
+                    "user_id,description",
+                ),
+                (
+                    "vendor_categories",
+                    [
+                        {"vendor_name": d, "vendor_key": vendor_key(d), "category": c, "updated_at": updated_at}
+                        for d, c in learned.items()
+                    ],
+                    "vendor_name",
+                ),
+            )
+            for table, rows, on_conflict in upserts:
+                result["round_trips"] += 1
+                try:
+                    self.client.table(table).upsert(rows, on_conflict=on_conflict).execute()
+                except Exception as e:
+                    logger.warning("Bulk learning upsert failed table=%s descriptions=%s: %r", table, len(rows), e)
+
+        self._categories.clear()
+        self._learn.clear()
+        return {**result, "learned": len(learned)}
@@ -0,0 +1,148 @@
+"""Circuit breaker for calls to an external service (Groq).
+
+When Groq is slow or down every chunk would otherwise wait for the client
+timeout before failing. The breaker tracks the outcome of the last
+``window`` calls; once at least ``min_calls`` have been seen and the failure
+rate reaches ``failure_rate`` it opens, and calls are refused immediately
+with ``CircuitOpenError`` for ``open_seconds``. After that it is half-open:
+one probe call at a time is let through, a success closes the circuit and a
+failure re-opens it. Only errors that say the service is unhealthy count as
+failures (see ``is_service_failure``); a rejected request still means the
+service answered.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import deque
+from time import monotonic
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+GROQ_BREAKER_FAILURE_RATE = float(os.environ.get("GROQ_BREAKER_FAILURE_RATE", "0.5"))
+GROQ_BREAKER_MIN_CALLS = int(os.environ.get("GROQ_BREAKER_MIN_CALLS", "4"))
+GROQ_BREAKER_WINDOW = int(os.environ.get("GROQ_BREAKER_WINDOW", "20"))
+GROQ_BREAKER_OPEN_SECONDS = float(os.environ.get("GROQ_BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+# Matched by class name across the MRO so the groq SDK and httpx need not be
+# imported here.
+_TRANSPORT_ERROR_NAMES = {"APITimeoutError", "APIConnectionError", "TimeoutException", "TransportError"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the service while the circuit is open."""
+
+
+def is_service_failure(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx; not 4xx client errors."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if _TRANSPORT_ERROR_NAMES & {cls.__name__ for cls in type(error).__mro__}:
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return False
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = GROQ_BREAKER_FAILURE_RATE,
+        min_calls: int = GROQ_BREAKER_MIN_CALLS,
+        window: int = GROQ_BREAKER_WINDOW,
+        open_seconds: float = GROQ_BREAKER_OPEN_SECONDS,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._outcomes: deque = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def _current_state_locked(self) -> str:
+        if self._state == OPEN and monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through (without reserving it)."""
+        with self._lock:
+            state = self._current_state_locked()
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def before_call(self) -> None:
+        """Reserve a call or raise ``CircuitOpenError``."""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                logger.info("circuit_closed name=%s", self.name)
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            self._outcomes.append(True)
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                self._open_locked(error)
+                return
+            failures = self._outcomes.count(False)
+            if (
+                self._state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._open_locked(error)
+
+    def _open_locked(self, error: Optional[BaseException]) -> None:
+        self._state = OPEN
+        self._opened_at = monotonic()
+        self._probe_in_flight = False
+        logger.warning(
+            "circuit_opened name=%s failures=%s/%s open_seconds=%s last_error=%r",
+            self.name,
+            self._outcomes.count(False),
+            len(self._outcomes),
+            self.open_seconds,
+            error,
+        )
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self._current_state_locked(),
+                "window_calls": len(self._outcomes),
+                "window_failures": self._outcomes.count(False),
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,301 @@
+"""Batch monthly closeout generation for every user and account.
+
+For each user the runner skips scopes that already have a closeout, fetches the
+month (plus the comparison month) once for all of the user's accounts, builds
+the ``all`` summary and one summary per account from that fetch, and inserts
+the new reviews in one call. Users are processed on a bounded thread pool and
+completed user ids are checkpointed to a JSON file, so an interrupted run can
+be restarted with the same ``--checkpoint`` and only does the remaining work.
+
+Run once from the command line::
+
+    python -m api.closeout_runner --month 2026-09 --workers 8
+
+or set ``CLOSEOUT_SCHEDULER_ENABLED=1`` to have the API process run the
+previous month's closeout after the month rolls over (see ``run_scheduler``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import calendar
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Set
+
+from api.query_loader import request_scope
+from api.review_service import (
+    build_monthly_closeout_rows,
+    fetch_data_versions,
+    previous_month_period,
+    previous_period,
+)
+from src.supabase_client import supabase_admin
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+DEFAULT_WORKERS = int(os.environ.get("CLOSEOUT_WORKERS", "8"))
+CHECKPOINT_DIR = Path(os.environ.get("CLOSEOUT_CHECKPOINT_DIR", ".cache/closeout"))
+SCHEDULER_INTERVAL_SECONDS = int(os.environ.get("CLOSEOUT_SCHEDULER_INTERVAL_SECONDS", "3600"))
+CHECKPOINT_EVERY = 50
+# Postgres unique_violation, raised by the monthly_reviews idempotency index.
+UNIQUE_VIOLATION = "23505"
+
+
+def _fetch_pages(build_query) -> List[Dict[str, Any]]:
+    """Offset-page ``build_query()``; its ordering must end on a unique column."""
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = build_query().range(offset, offset + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def list_user_accounts() -> Dict[str, List[str]]:
+    """Return ``{user_id: [account_id, ...]}`` for every user with an account."""
+    rows = _fetch_pages(lambda: supabase_admin.table("accounts").select("id,user_id").order("user_id").order("id"))
+    accounts: Dict[str, List[str]] = {}
+    for row in rows:
+        if row.get("user_id") and row.get("id"):
+            accounts.setdefault(row["user_id"], []).append(row["id"])
+    return accounts
+
+
+def _existing_scopes(user_id: str, period_start: date, period_end: date) -> Set[str]:
+    rows = (
+        supabase_admin.table("monthly_reviews")
+        .select("account_scope")
+        .eq("user_id", user_id)
+        .eq("review_type", "monthly_closeout")
+        .eq("period_start", period_start.isoformat())
+        .eq("period_end", period_end.isoformat())
+        .is_("statement_id", "null")
+        .execute()
+    ).data or []
+    return {row.get("account_scope") for row in rows}
+
+
+def _fetch_user_window(user_id: str, window_start: date, period_end: date) -> List[Dict[str, Any]]:
+    return _fetch_pages(
+        lambda: (
+            supabase_admin.table("transactions")
+            .select("id, date, description, amount, category, excluded_from_budget, account_id")
+            .eq("user_id", user_id)
+            .gte("date", window_start.isoformat())
+            .lt("date", (period_end + timedelta(days=1)).isoformat())
+            .order("date")
+            .order("id")
+        )
+    )
+
+
+def _is_unique_violation(error: Exception) -> bool:
+    if getattr(error, "code", None) == UNIQUE_VIOLATION:
+        return True
+    return "duplicate key" in str(getattr(error, "message", None) or error).lower()
+
+
+def _insert_reviews(rows: List[Dict[str, Any]]) -> int:
+    try:
+        inserted = supabase_admin.table("monthly_reviews").insert(rows).execute().data or []
+    except Exception as e:
+        if not _is_unique_violation(e):
+            raise
+        # A concurrent writer (upload snapshot, manual generate) may have created
+        # one of the scopes since we checked; fall back to per-row inserts so the
+        # idempotency index only rejects the duplicate. Any other error fails the
+        # user, so it is not checkpointed and the next run retries it.
+        inserted = []
+        for row in rows:
+            try:
+                inserted.extend(supabase_admin.table("monthly_reviews").insert(row).execute().data or [])
+            except Exception as row_error:
+                if not _is_unique_violation(row_error):
+                    raise
+                logger.info("closeout_duplicate user_id=%s scope=%s", row["user_id"], row["account_scope"])
+
+    try:
+        if inserted:
+            supabase_admin.table("review_events").insert(
+                [
+                    {
+                        "user_id": row.get("user_id"),
+                        "review_id": row.get("id"),
+                        "event_type": "review_created",
+                        "payload": {
+                            "review_id": row.get("id"),
+                            "review_type": "monthly_closeout",
+                            "triggered_by": "system_monthly",
+                        },
+                    }
+                    for row in inserted
+                ]
+            ).execute()
+    except Exception:
+        pass
+    return len(inserted)
+
+
+def close_out_user(user_id: str, account_ids: List[str], period_start: date, period_end: date) -> int:
+    """Create any missing closeouts for one user; returns the number inserted."""
+    with request_scope():
+        wanted = ["all", *account_ids]
+        existing = _existing_scopes(user_id, period_start, period_end)
+        missing = [scope for scope in wanted if scope not in existing]
+        if not missing:
+            return 0
+
+        window_start, _ = previous_period(period_start, period_end)
+        version_rows = fetch_data_versions(user_id, window_start, period_end)
+        transactions = _fetch_user_window(user_id, window_start, period_end)
+        rows = build_monthly_closeout_rows(user_id, transactions, missing, period_start, period_end, version_rows)
+        return _insert_reviews(rows)
+
+
+class _Checkpoint:
+    def __init__(self, path: Optional[Path], period_start: date) -> None:
+        self.path = path
+        self.period = period_start.isoformat()
+        self.completed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._dirty = 0
+        if path and path.exists():
+            data = json.loads(path.read_text())
+            if data.get("period_start") == self.period:
+                self.completed = set(data.get("completed_users") or [])
+
+    def mark(self, user_id: str) -> None:
+        with self._lock:
+            self.completed.add(user_id)
+            self._dirty += 1
+            if self._dirty >= CHECKPOINT_EVERY:
+                self._write_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_locked()
+
+    def _write_locked(self) -> None:
+        self._dirty = 0
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"period_start": self.period, "completed_users": sorted(self.completed)}))
+        tmp.replace(self.path)
+
+
+def run_closeout(
+    period_start: date,
+    period_end: date,
+    *,
+    workers: int = DEFAULT_WORKERS,
+    checkpoint_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    started = perf_counter()
+    checkpoint = _Checkpoint(checkpoint_path, period_start)
+    user_accounts = list_user_accounts()
+    pending = {uid: accts for uid, accts in user_accounts.items() if uid not in checkpoint.completed}
+
+    created = 0
+    failed: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(close_out_user, uid, accts, period_start, period_end): uid for uid, accts in pending.items()
+        }
+        for future in as_completed(futures):
+            uid = futures[future]
+            try:
+                created += future.result()
+                checkpoint.mark(uid)
+            except Exception:
+                failed.append(uid)
+                logger.exception("closeout_user_failed user_id=%s", uid)
+    checkpoint.flush()
+
+    result = {
+        "period_start": period_start.isoformat(),
+        "period_end": period_end.isoformat(),
+        "users_total": len(user_accounts),
+        "users_skipped_checkpoint": len(user_accounts) - len(pending),
+        "users_processed": len(pending) - len(failed),
+        "users_failed": failed,
+        "reviews_created": created,
+        "duration_ms": round((perf_counter() - started) * 1000.0, 2),
+    }
+    logger.info(
+        "closeout_run_complete period_start=%s users=%s created=%s failed=%s duration_ms=%s",
+        result["period_start"],
+        result["users_total"],
+        created,
+        len(failed),
+        result["duration_ms"],
+    )
+    return result
+
+
+def default_checkpoint_path(period_start: date) -> Path:
+    return CHECKPOINT_DIR / f"closeout-{period_start:%Y-%m}.json"
+
+
+async def run_scheduler(interval_seconds: int = SCHEDULER_INTERVAL_SECONDS) -> None:
+    """Run the previous month's closeout once per month from inside the API process.
+
+    Checks every ``interval_seconds``; a restart mid-run resumes from the
+    checkpoint, and users finished before the restart are not revisited.
+    """
+    last_period: Optional[date] = None
+    while True:
+        period_start, period_end = previous_month_period()
+        if period_start != last_period:
+            try:
+                result = await asyncio.to_thread(
+                    run_closeout,
+                    period_start,
+                    period_end,
+                    checkpoint_path=default_checkpoint_path(period_start),
+                )
+                if not result["users_failed"]:
+                    last_period = period_start
+            except Exception:
+                logger.exception("closeout_scheduler_failed period_start=%s", period_start)
+        await asyncio.sleep(interval_seconds)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate monthly closeout reviews for all users and accounts.")
+    parser.add_argument("--month", help="Month to close out as YYYY-MM (default: previous month)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint file (default: under CLOSEOUT_CHECKPOINT_DIR)")
+    args = parser.parse_args(argv)
+
+    if args.month:
+        period_start = datetime.strptime(args.month, "%Y-%m").date()
+        last_day = calendar.monthrange(period_start.year, period_start.month)[1]
+        period_end = period_start.replace(day=last_day)
+    else:
+        period_start, period_end = previous_month_period()
+
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+    result = run_closeout(
+        period_start,
+        period_end,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint or default_checkpoint_path(period_start),
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
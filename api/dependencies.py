@@ -21,4 +21,7 @@ def get_groq_service() -> GroqService:
     if not api_key:
         raise RuntimeError("GROQ_API_KEY environment variable must be set")
     logger.info("Initialising Groq service")
-    return GroqService(api_key=api_key, supabase_client=supabase_admin)
+    service = GroqService(api_key=api_key, supabase_client=supabase_admin)
+    # Built by the first AI request, never at startup: constructing it imports the groq SDK.
+    service.warm_local_models()
+    return service
@@ -1,8 +1,18 @@
 import json
 import logging
 import os
-from groq import Groq
+import threading
+from collections import defaultdict
+from api.adaptive_chunking import AdaptiveChunker
+from api.bulk_writes import IN_FILTER_CHUNK_SIZE, apply_categories_bulk, chunked
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError, is_service_failure
+from api.llm_cache import build_default_cache, prompt_fingerprint
+from api.local_categoriser import build_default_local_categoriser
+from api.micro_batcher import MicroBatcher
+from api.single_flight import SingleFlight
+from api.vendor_index import build_default_vendor_index
 from src.config import BUILTIN_CATEGORIES
+from src.merchants import vendor_key
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +20,19 @@ CATEGORISATION_MODEL = os.environ.get('CATEGORISATION_MODEL', 'llama-3.1-8b-inst
 INSIGHTS_MODEL       = 'llama-3.1-8b-instant'
 CHUNK_SIZE           = int(os.environ.get('CATEGORISATION_CHUNK_SIZE', '15'))
 SUGGESTION_MAX_TOKENS = int(os.environ.get('CATEGORISATION_SUGGESTION_MAX_TOKENS', '3200'))
+# Retry/bisection calls a suggestion pass may spend per initial chunk, pooled
+# across the pass. A chunk that fails for reasons other than its size would
+# otherwise bisect into 2n - 1 calls.
+SUGGESTION_RETRIES_PER_CHUNK = int(os.environ.get('CATEGORISATION_SUGGESTION_RETRIES_PER_CHUNK', '3'))
+LOCAL_MODEL_NAME     = 'local-ngram-nb'
+# Explicit per-call budget; the SDK default (60s, two retries) let one slow
+# chunk hold an upload for minutes.
+GROQ_TIMEOUT_SECONDS = float(os.environ.get('GROQ_TIMEOUT_SECONDS', '15'))
+GROQ_MAX_RETRIES     = int(os.environ.get('GROQ_MAX_RETRIES', '1'))
+
+# Vendors currently being categorised by Groq, shared by every service in the
+# process so concurrent uploads wait for one request instead of sending their own.
+VENDOR_FLIGHTS = SingleFlight()
 
 VALID_CATEGORIES = set(BUILTIN_CATEGORIES + ['Uncategorized'])
 
@@ -84,33 +107,99 @@ Examples:
 
 
 class GroqService:
-    def __init__(self, api_key: str, supabase_client):
-        self.client   = Groq(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        supabase_client,
+        response_cache=None,
+        local_model=None,
+        vendor_index=None,
+        vendor_flights=None,
+        vendor_batcher=None,
+        breaker=None,
+    ):
+        # The groq SDK is imported on first construction (first AI request), not at startup.
+        from groq import Groq
+
+        self.client   = Groq(api_key=api_key, timeout=GROQ_TIMEOUT_SECONDS, max_retries=GROQ_MAX_RETRIES)
+        self.breaker  = breaker if breaker is not None else CircuitBreaker('groq')
         self.supabase = supabase_client
+        self.response_cache = response_cache if response_cache is not None else build_default_cache()
+        self.local_model = local_model if local_model is not None else build_default_local_categoriser()
+        self.vendor_index = vendor_index if vendor_index is not None else build_default_vendor_index()
+        if self.local_model is not None and self.vendor_index is not None:
+            # One pass over the label tables feeds both structures.
+            self.local_model.subscribe(self.vendor_index.add)
+        self.vendor_flights = vendor_flights if vendor_flights is not None else VENDOR_FLIGHTS
+        self.vendor_batcher = vendor_batcher if vendor_batcher is not None else MicroBatcher(
+            self._categorise_vendor_chunk, CHUNK_SIZE, default='Uncategorized', name='vendor-batcher'
+        )
+        self.suggestion_chunker = AdaptiveChunker(CHUNK_SIZE, SUGGESTION_MAX_TOKENS)
 
     # --- Cache helpers -------------------------------------------------------
 
     def get_cached_categories(self, vendors: list) -> dict:
+        """Map raw vendor strings to cached categories via their ``vendor_key``.
+
+        Variants of one merchant ("TESCO STORES 2231", "TESCO STORES 4410")
+        share a key, so a category learned for one applies to all. Where a key
+        has several rows the exact ``vendor_name`` wins, then the most recent
+        row that is not ``Uncategorized``.
+        Vendors still unresolved are looked up by exact name, which covers rows
+        written before ``vendor_key`` existed; those rows get their key filled in.
+        """
         if not vendors:
             return {}
+        keys_by_vendor = {v: vendor_key(v) for v in vendors}
         try:
-            result = (
-                self.supabase.table('vendor_categories')
-                .select('vendor_name, category')
-                .in_('vendor_name', vendors)
-                .execute()
-            )
-            return {row['vendor_name']: row['category'] for row in result.data}
+            rows = []
+            for chunk in chunked(sorted(set(keys_by_vendor.values())), IN_FILTER_CHUNK_SIZE):
+                rows.extend(
+                    self.supabase.table('vendor_categories')
+                    .select('vendor_name, vendor_key, category, updated_at')
+                    .in_('vendor_key', chunk)
+                    .execute()
+                    .data or []
+                )
+            by_name = {row['vendor_name']: row['category'] for row in rows}
+            by_key = {}
+            for row in sorted(rows, key=lambda r: (r['category'] != 'Uncategorized', r.get('updated_at') or '')):
+                by_key[row['vendor_key']] = row['category']
+
+            cached = {}
+            for vendor, key in keys_by_vendor.items():
+                category = by_name.get(vendor) or by_key.get(key)
+                if category:
+                    cached[vendor] = category
+
+            missing = [v for v in keys_by_vendor if v not in cached]
+            legacy = {}
+            for chunk in chunked(missing, IN_FILTER_CHUNK_SIZE):
+                result = (
+                    self.supabase.table('vendor_categories')
+                    .select('vendor_name, vendor_key, category')
+                    .in_('vendor_name', chunk)
+                    .execute()
+                )
+                for row in result.data or []:
+                    cached[row['vendor_name']] = row['category']
+                    if not row.get('vendor_key'):
+                        legacy[row['vendor_name']] = row['category']
+            if legacy:
+                self._save_to_vendor_cache(legacy, learn=False)
+            return cached
         except Exception as e:
             logger.warning('Cache lookup failed: %r', e)
             return {}
 
-    def _save_to_vendor_cache(self, mappings: dict) -> None:
+    def _save_to_vendor_cache(self, mappings: dict, learn: bool = True) -> None:
         if not mappings:
             return
         try:
-            rows = [{'vendor_name': k, 'category': v} for k, v in mappings.items()]
+            rows = [{'vendor_name': k, 'vendor_key': vendor_key(k), 'category': v} for k, v in mappings.items()]
             self.supabase.table('vendor_categories').upsert(rows, on_conflict='vendor_name').execute()
+            if learn:
+                self._learn_locally(('vendor:' + k, k, v) for k, v in mappings.items())
         except Exception as e:
             logger.warning('Vendor cache save failed: %r', e)
 
@@ -121,46 +210,153 @@ class GroqService:
             rows = [{'user_id': user_id, 'description': k, 'category': v} for k, v in mappings.items()]
             self.supabase.table('learned_rules').upsert(rows, on_conflict='user_id,description').execute()
             logger.info('[LEARNING] Saved %d rules for user %s', len(rows), user_id)
+            self._learn_locally((f'learned:{user_id}:{k}', k, v) for k, v in mappings.items())
         except Exception as e:
             logger.warning('Learned rules save failed: %r', e)
 
+    # --- Local model ---------------------------------------------------------
+
+    def _learn_locally(self, examples) -> None:
+        examples = list(examples)
+        if self.local_model is not None:
+            # The vendor index is subscribed to the local model.
+            try:
+                self.local_model.learn(examples)
+            except Exception as e:
+                logger.warning('Local categoriser update failed: %r', e)
+        elif self.vendor_index is not None:
+            try:
+                self.vendor_index.add(examples)
+            except Exception as e:
+                logger.warning('Vendor index update failed: %r', e)
+
+    def _match_vendor_index(self, texts: list) -> dict:
+        """Texts whose nearest known vendor is similar enough, as ``{text: (vendor, category, similarity)}``."""
+        if self.vendor_index is None or not texts:
+            return {}
+        try:
+            if self.local_model is not None:
+                self.local_model.sync_in_background(self.supabase)
+            else:
+                self.vendor_index.sync(self.supabase)
+            matched = self.vendor_index.match(texts, VALID_CATEGORIES)
+        except Exception as e:
+            logger.warning('Vendor index lookup failed, escalating: %r', e)
+            return {}
+        logger.info('vendor_index requested=%s matched=%s', len(texts), len(matched))
+        return matched
+
+    def warm_local_models(self) -> None:
+        """Start the first label sync in the background (called when the service is built)."""
+        if self.local_model is not None:
+            self.local_model.sync_in_background(self.supabase)
+        elif self.vendor_index is not None:
+            threading.Thread(target=self.vendor_index.sync, args=(self.supabase,), name='vendor-index-sync', daemon=True).start()
+
+    def _classify_locally(self, texts: list, allowed=None, user_id: str = None) -> dict:
+        """Texts the local model is confident about, as ``{text: (category, probability)}``.
+
+        Uses global vendor examples plus ``user_id``'s own learned rules only.
+        """
+        if self.local_model is None or not texts:
+            return {}
+        try:
+            self.local_model.sync_in_background(self.supabase)
+            resolved = self.local_model.classify_confident(texts, allowed, user_id=user_id)
+        except Exception as e:
+            logger.warning('Local categoriser failed, escalating to Groq: %r', e)
+            return {}
+        logger.info('local_categoriser requested=%s resolved=%s escalated=%s', len(texts), len(resolved), len(texts) - len(resolved))
+        return resolved
+
     # --- Groq calls ----------------------------------------------------------
 
-    def _call_groq_json(self, system: str, user: str, max_tokens: int = 600):
-        response = self.client.chat.completions.create(
-            model=CATEGORISATION_MODEL,
-            messages=[
-                {'role': 'system', 'content': system},
-                {'role': 'user',   'content': user},
-            ],
-            response_format={'type': 'json_object'},
-            temperature=0,
-            max_tokens=max_tokens,
+    def _chat(self, model: str, system: str, user: str, params: dict, parse, cache: bool = False, meta: dict = None):
+        """Run one chat completion and return ``parse(content)``.
+
+        With ``cache`` the raw content is stored under the prompt fingerprint
+        once it parses, and identical prompts are answered from the cache.
+        Cache hits are served even while the circuit breaker is open; otherwise
+        an open circuit raises ``CircuitOpenError`` without calling Groq.
+        ``meta``, when given, receives ``finish_reason`` and
+        ``completion_tokens`` before the content is parsed.
+        """
+        key = None
+        if cache and self.response_cache is not None:
+            key = prompt_fingerprint(model, system, user, params)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logger.debug('llm_cache_hit model=%s stats=%s', model, self.response_cache.stats())
+                return parse(cached)
+
+        self.breaker.before_call()
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {'role': 'system', 'content': system},
+                    {'role': 'user',   'content': user},
+                ],
+                timeout=GROQ_TIMEOUT_SECONDS,
+                **params,
+            )
+        except Exception as e:
+            # A 400/422 from a bad prompt means Groq is up; only count outages.
+            if is_service_failure(e):
+                self.breaker.record_failure(e)
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        content = response.choices[0].message.content
+        if meta is not None:
+            meta['finish_reason'] = getattr(response.choices[0], 'finish_reason', None)
+            meta['completion_tokens'] = getattr(getattr(response, 'usage', None), 'completion_tokens', 0) or 0
+        result = parse(content)
+        if key is not None:
+            usage = getattr(response, 'usage', None)
+            self.response_cache.put(key, content, getattr(usage, 'total_tokens', 0) or 0)
+        return result
+
+    def _call_groq_json(self, system: str, user: str, max_tokens: int = 600, cache: bool = False, meta: dict = None):
+        return self._chat(
+            CATEGORISATION_MODEL,
+            system,
+            user,
+            {'response_format': {'type': 'json_object'}, 'temperature': 0, 'max_tokens': max_tokens},
+            json.loads,
+            cache=cache,
+            meta=meta,
         )
-        return json.loads(response.choices[0].message.content)
-
-    def _call_groq_text(self, system: str, user: str, max_tokens: int = 300) -> str:
-        response = self.client.chat.completions.create(
-            model=INSIGHTS_MODEL,
-            messages=[
-                {'role': 'system', 'content': system},
-                {'role': 'user',   'content': user},
-            ],
-            temperature=0.4,
-            max_tokens=max_tokens,
+
+    def _call_groq_text(self, system: str, user: str, max_tokens: int = 300, cache: bool = False) -> str:
+        return self._chat(
+            INSIGHTS_MODEL,
+            system,
+            user,
+            {'temperature': 0.4, 'max_tokens': max_tokens},
+            str.strip,
+            cache=cache,
         )
-        return response.choices[0].message.content.strip()
 
     # --- Public API ----------------------------------------------------------
 
-    def categorise_vendors(self, vendors: list, force_groq: bool = False) -> dict:
+    def categorise_vendors(self, vendors: list, force_groq: bool = False, user_id: str = None) -> dict:
         """
         Returns a vendor->category mapping.
         force_groq=True bypasses the cache — used by the manual Fix with AI button
         so vendors previously cached as Uncategorized are re-tried.
+        user_id scopes the local model to global examples plus that user's rules.
         """
+        return self._categorise_vendors(vendors, force_groq, user_id)[0]
+
+    def _categorise_vendors(self, vendors: list, force_groq: bool = False, user_id: str = None) -> tuple:
+        """``(mappings, inferred)``: ``inferred`` holds the vendors answered by the
+        vendor index or the local model rather than the cache or Groq; those are
+        applied but never persisted as learned rules."""
+        inferred = set()
         if not vendors:
-            return {}
+            return {}, inferred
         unique_vendors = list(set(vendors))
 
         if force_groq:
@@ -173,25 +369,52 @@ class GroqService:
             # Vendors cached as Uncategorized get re-tried by Groq
             cached  = {k: v for k, v in all_cached.items() if v != 'Uncategorized'}
             unknown = [v for v in unique_vendors if v not in cached]
+            # New spellings of known vendors, then known-ish merchants the
+            # local model is confident about, never reach Groq.
+            nearest = {k: category for k, (_, category, _) in self._match_vendor_index(unknown).items()}
+            inferred.update(nearest)
+            cached  = {**cached, **nearest}
+            unknown = [v for v in unknown if v not in nearest]
+            local = {k: category for k, (category, _) in self._classify_locally(unknown, user_id=user_id).items()}
+            inferred.update(local)
+            cached  = {**cached, **local}
+            unknown = [v for v in unknown if v not in local]
 
         new_mappings = {}
+        if unknown and not self.breaker.available():
+            # Groq is failing: answer from cache/index/local model right away.
+            logger.warning('groq_circuit_open vendors_degraded=%s', len(unknown))
+            return {**cached, **{vendor: 'Uncategorized' for vendor in unknown}}, inferred
         if unknown:
+            owned, waiting = self.vendor_flights.claim(unknown)
             try:
-                for i in range(0, len(unknown), CHUNK_SIZE):
-                    chunk = unknown[i:i + CHUNK_SIZE]
-                    raw = self._call_groq_json(
-                        CATEGORISE_SYSTEM_PROMPT,
-                        'Categorise these transactions: ' + json.dumps(chunk),
-                    )
-                    for vendor, category in raw.items():
-                        new_mappings[vendor] = category if category in VALID_CATEGORIES else 'Uncategorized'
-                self._save_to_vendor_cache(new_mappings)
-            except Exception as e:
-                logger.error('Groq categorisation failed: %r', e)
-                for vendor in unknown:
-                    new_mappings[vendor] = 'Uncategorized'
-
-        return {**cached, **new_mappings}
+                # Owned vendors join the shared micro-batch queue, so concurrent
+                # callers' vendors fill the same Groq chunks.
+                new_mappings = self.vendor_batcher.map(owned)
+            finally:
+                self.vendor_flights.complete(owned, new_mappings, default='Uncategorized')
+            if waiting:
+                logger.info('vendor_single_flight owned=%s coalesced=%s', len(owned), len(waiting))
+                new_mappings.update(self.vendor_flights.wait(waiting, default='Uncategorized'))
+
+        return {**cached, **new_mappings}, inferred
+
+    def _categorise_vendor_chunk(self, chunk: list) -> dict:
+        """One Groq call for a micro-batch of vendors; results are saved to the vendor cache."""
+        try:
+            raw = self._call_groq_json(
+                CATEGORISE_SYSTEM_PROMPT,
+                'Categorise these transactions: ' + json.dumps(chunk),
+            )
+        except Exception as e:
+            logger.error('Groq categorisation failed: %r', e)
+            return {}
+        mappings = {
+            vendor: category if category in VALID_CATEGORIES else 'Uncategorized'
+            for vendor, category in raw.items()
+        }
+        self._save_to_vendor_cache(mappings)
+        return mappings
 
     def apply_categories_to_transactions(
         self, transactions: list, user_id: str, force_groq: bool = False
@@ -204,28 +427,28 @@ class GroqService:
         if not uncategorised:
             return transactions, 0
 
-        mappings = self.categorise_vendors(
+        mappings, inferred = self._categorise_vendors(
             [t['description'] for t in uncategorised],
             force_groq=force_groq,
+            user_id=user_id,
         )
 
         changed = 0
         new_rules = {}
+        updates = {}
 
         for transaction in transactions:
             if transaction.get('category', 'Uncategorized') == 'Uncategorized':
                 new_cat = mappings.get(transaction['description'], 'Uncategorized')
                 if new_cat != 'Uncategorized':
                     transaction['category'] = new_cat
-                    changed += 1
-                    new_rules[transaction['description']] = new_cat
-                    try:
-                        self.supabase.table('transactions').update(
-                            {'category': new_cat}
-                        ).eq('id', transaction['id']).eq('user_id', user_id).execute()
-                    except Exception as e:
-                        logger.warning('Failed to persist category for %s: %r', transaction['id'], e)
+                    if transaction['description'] not in inferred:
+                        new_rules[transaction['description']] = new_cat
+                    updates[transaction['id']] = new_cat
 
+        if updates:
+            # Report what was persisted, not what was resolved.
+            changed = apply_categories_bulk(self.supabase, user_id, updates)['updated']
         if new_rules:
             self._save_to_learned_rules(new_rules, user_id)
 
@@ -236,7 +459,7 @@ class GroqService:
         if prev_month_totals:
             user_content += '\nPrevious month spending: ' + json.dumps(prev_month_totals)
         try:
-            return self._call_groq_text(INSIGHTS_SYSTEM_PROMPT, user_content)
+            return self._call_groq_text(INSIGHTS_SYSTEM_PROMPT, user_content, cache=True)
         except Exception as e:
             logger.error('Insights generation failed: %r', e)
             return ''
@@ -247,6 +470,7 @@ class GroqService:
                 BUDGET_SUGGESTION_SYSTEM_PROMPT,
                 'Average monthly spending: ' + json.dumps(average_monthly_spend),
                 max_tokens=200,
+                cache=True,
             )
             return {k: int(v) for k, v in raw.items() if isinstance(v, (int, float))}
         except Exception as e:
@@ -261,13 +485,13 @@ class GroqService:
                 'Category average transaction amounts: ' + json.dumps(category_averages) +
                 '\nRecent transactions: ' + json.dumps(recent_transactions[:100])
             )
-            raw = self._call_groq_json(ANOMALY_SYSTEM_PROMPT, user_content, max_tokens=400)
+            raw = self._call_groq_json(ANOMALY_SYSTEM_PROMPT, user_content, max_tokens=400, cache=True)
             return raw if isinstance(raw, list) else raw.get('anomalies', [])
         except Exception as e:
             logger.error('Anomaly detection failed: %r', e)
             return []
 
-    def suggest_transaction_categories(self, transactions: list, allowed_categories: list) -> list:
+    def suggest_transaction_categories(self, transactions: list, allowed_categories: list, on_chunk=None, user_id: str = None) -> list:
         """
         Suggest category + confidence + reason for each transaction.
         Returns:
@@ -280,6 +504,9 @@ class GroqService:
             "model_name": CATEGORISATION_MODEL
           }
         ]
+        on_chunk, when given, is called with each batch of finished suggestions
+        as soon as it exists (local model, every Groq chunk, the fallback).
+        user_id scopes the local model to global examples plus that user's rules.
         """
         if not transactions:
             return []
@@ -320,48 +547,132 @@ class GroqService:
                     "model_name": CATEGORISATION_MODEL,
                 }
 
-        def run_pass(pass_payload: list, pass_chunk_size: int, pass_name: str) -> None:
-            requested = len(pass_payload)
-            returned_before = len(parsed_by_id)
-            for i in range(0, len(pass_payload), pass_chunk_size):
-                chunk = pass_payload[i:i + pass_chunk_size]
-                try:
-                    raw = self._call_groq_json(
-                        SUGGESTION_SYSTEM_PROMPT,
-                        "Allowed categories: "
-                        + json.dumps(categories)
-                        + "\nTransactions: "
-                        + json.dumps(chunk),
-                        max_tokens=SUGGESTION_MAX_TOKENS,
-                    )
-                    suggestions = raw.get("suggestions", []) if isinstance(raw, dict) else []
-                    parse_items(suggestions)
-                except Exception as e:
-                    logger.error("suggest_transaction_categories %s chunk failed: %r", pass_name, e)
-            returned_after = len(parsed_by_id)
-            logger.info(
-                "suggest_transaction_categories_pass pass=%s requested=%s new_returned=%s total_returned=%s",
-                pass_name,
-                requested,
-                max(0, returned_after - returned_before),
-                returned_after,
+        chunker = self.suggestion_chunker
+        calls = {"chunks": 0, "bisected": 0, "retries": 0, "retry_budget": 0, "skipped": 0}
+        members_by_rep = {}
+        published = set()
+
+        def publish(tx_ids: list) -> None:
+            batch = []
+            for tx_id in tx_ids:
+                if tx_id in parsed_by_id and tx_id not in published:
+                    published.add(tx_id)
+                    batch.append(parsed_by_id[tx_id])
+            if batch and on_chunk is not None:
+                on_chunk(batch)
+
+        def fan_out(chunk: list) -> None:
+            # Every group member gets its own row copied from the representative.
+            tx_ids = []
+            for row in chunk:
+                suggestion = parsed_by_id.get(row["transaction_id"])
+                if suggestion is None:
+                    continue
+                for member in members_by_rep.get(row["transaction_id"], [row]):
+                    parsed_by_id.setdefault(member["transaction_id"], {**suggestion, "transaction_id": member["transaction_id"]})
+                    tx_ids.append(member["transaction_id"])
+            publish(tx_ids)
+
+        def send(chunk: list, retry: bool = False) -> None:
+            """One Groq call; missing ids are retried, a wholly failed chunk is bisected.
+
+            Retries draw on the pass's retry budget; once it is spent the
+            remaining ids are left to the vendor-mapping fallback.
+            """
+            if retry:
+                if calls["retries"] >= calls["retry_budget"]:
+                    calls["skipped"] += len(chunk)
+                    return
+                calls["retries"] += 1
+            calls["chunks"] += 1
+            meta = {}
+            failed = False
+            try:
+                raw = self._call_groq_json(
+                    SUGGESTION_SYSTEM_PROMPT,
+                    "Allowed categories: "
+                    + json.dumps(categories)
+                    + "\nTransactions: "
+                    + json.dumps(chunk),
+                    max_tokens=SUGGESTION_MAX_TOKENS,
+                    meta=meta,
+                )
+                suggestions = raw.get("suggestions", []) if isinstance(raw, dict) else []
+                parse_items(suggestions)
+            except CircuitOpenError:
+                # Not the chunk's fault: leave it to the vendor-mapping fallback.
+                return
+            except Exception as e:
+                failed = True
+                logger.error("suggest_transaction_categories chunk of %s failed: %r", len(chunk), e)
+            missing = [row for row in chunk if row["transaction_id"] not in parsed_by_id]
+            fan_out(chunk)
+            chunker.record(
+                len(chunk),
+                len(chunk) - len(missing),
+                truncated=failed or meta.get("finish_reason") == "length",
+                completion_tokens=meta.get("completion_tokens", 0),
             )
+            if not missing or len(chunk) == 1:
+                return
+            if len(missing) < len(chunk):
+                send(missing, retry=True)
+                return
+            calls["bisected"] += 1
+            mid = len(missing) // 2
+            send(missing[:mid], retry=True)
+            send(missing[mid:], retry=True)
+
+        # Local model first; only what it is not confident about goes to Groq.
+        local = self._classify_locally(list({row["description"] for row in payload}), categories, user_id=user_id)
+        for row in payload:
+            if row["description"] in local:
+                category, probability = local[row["description"]]
+                parsed_by_id[row["transaction_id"]] = {
+                    "transaction_id": row["transaction_id"],
+                    "suggested_category": category,
+                    "confidence": round(min(99.0, probability * 100.0), 1),
+                    "reason": "Similar to known merchants",
+                    "model_name": LOCAL_MODEL_NAME,
+                }
+        publish(list(parsed_by_id))
+
+        # Fan-in: one representative per normalised description goes to Groq
+        # ("TFL TRAVEL CHARGE 01FEB" and "... 02FEB" are one question).
+        groups = defaultdict(list)
+        for row in payload:
+            if row["transaction_id"] not in parsed_by_id:
+                groups[vendor_key(row["description"])].append(row)
+        to_groq = [members[0] for members in groups.values()]
+        members_by_rep.update((members[0]["transaction_id"], members) for members in groups.values())
+
+        # Token-aware chunks; failed chunks are retried by bisection rather
+        # than dropping straight to single-item calls.
+        if self.breaker.available():
+            chunks = chunker.split(to_groq)
+            calls["retry_budget"] = SUGGESTION_RETRIES_PER_CHUNK * len(chunks)
+            for chunk in chunks:
+                send(chunk)
+        else:
+            logger.warning("groq_circuit_open suggestions_degraded=%s", len(to_groq))
 
-        # Multi-pass strategy: broad -> narrower -> single-item retry for missing IDs.
-        run_pass(payload, CHUNK_SIZE, "primary")
         missing_ids = [tx["transaction_id"] for tx in payload if tx["transaction_id"] not in parsed_by_id]
-        if missing_ids:
-            run_pass([tx for tx in payload if tx["transaction_id"] in missing_ids], 5, "retry_small")
-            missing_ids = [tx["transaction_id"] for tx in payload if tx["transaction_id"] not in parsed_by_id]
-        if missing_ids:
-            run_pass([tx for tx in payload if tx["transaction_id"] in missing_ids], 1, "retry_single")
-            missing_ids = [tx["transaction_id"] for tx in payload if tx["transaction_id"] not in parsed_by_id]
+        logger.info(
+            "suggest_transaction_categories_pass transactions=%s requested=%s chunks=%s bisected=%s retry_budget_skipped=%s missing=%s chunker=%s",
+            sum(len(members) for members in groups.values()),
+            len(to_groq),
+            calls["chunks"],
+            calls["bisected"],
+            calls["skipped"],
+            len(missing_ids),
+            chunker.stats(),
+        )
 
         # Final fallback for any still-missing IDs: vendor mapping.
         if missing_ids:
             try:
                 fallback_descriptions = [description_by_id.get(tx_id, "") for tx_id in missing_ids]
-                fallback_map = self.categorise_vendors(fallback_descriptions, force_groq=False)
+                fallback_map = self.categorise_vendors(fallback_descriptions, force_groq=False, user_id=user_id)
             except Exception:
                 fallback_map = {}
 
@@ -381,13 +692,14 @@ class GroqService:
                     "reason": reason,
                     "model_name": CATEGORISATION_MODEL,
                 }
+            publish(missing_ids)
 
         logger.info(
             "suggest_transaction_categories_complete total=%s returned=%s missing_final=%s chunk_size=%s max_tokens=%s",
             len(payload),
             len(parsed_by_id),
             len([tx for tx in payload if tx['transaction_id'] not in parsed_by_id]),
-            CHUNK_SIZE,
+            chunker.limit(),
             SUGGESTION_MAX_TOKENS,
         )
         return [parsed_by_id[tx["transaction_id"]] for tx in payload if tx["transaction_id"] in parsed_by_id]
@@ -0,0 +1,289 @@
+"""In-process background jobs for long-running maintenance operations.
+
+Recurring recompute, keyword recategorisation, categorisation suggestions and
+review generation can take longer than an HTTP worker should be held. Route
+modules register a handler per job kind with ``register_job``; with
+``?async=true`` the endpoint submits a job and returns its id instead of
+running the work inline.
+
+State is persisted in the ``jobs`` table (status, params, progress, result,
+error, attempts) so any worker can answer ``GET /api/jobs/{id}``. Execution
+is in-process: a thread pool of ``JOBS_WORKERS`` runs at most
+``JOBS_PER_USER_LIMIT`` jobs per user at a time (the rest wait in a per-user
+queue). Retries are opt-in per kind (``register_job(..., retryable=True)``)
+because only idempotent operations may safely run twice: a failing job of a
+retryable kind is retried up to ``JOBS_MAX_ATTEMPTS`` times with linear
+backoff unless the error is the caller's fault (``ValueError`` or a 4xx
+``HTTPException``).
+
+Jobs are not resumed after a restart. Each row records the ``worker_id``
+(``JOBS_WORKER_ID``, default the hostname) of the instance that accepted it,
+and ``fail_orphaned_jobs`` -- run at startup, before this instance accepts
+work -- marks that instance's leftover ``queued``/``running`` rows as failed,
+plus any worker's unfinished rows not updated for ``JOBS_STALE_AFTER_SECONDS``
+(hosts that get a new hostname per deploy never see their own rows again).
+Set a stable ``JOBS_WORKER_ID`` per process where possible; several API
+processes on one host need distinct values.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+
+from api.query_loader import request_scope
+from src.supabase_client import supabase_admin
+
+logger = logging.getLogger(__name__)
+
+JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+JOBS_PER_USER_LIMIT = int(os.environ.get("JOBS_PER_USER_LIMIT", "1"))
+JOBS_MAX_ATTEMPTS = int(os.environ.get("JOBS_MAX_ATTEMPTS", "2"))
+JOBS_RETRY_BACKOFF_SECONDS = float(os.environ.get("JOBS_RETRY_BACKOFF_SECONDS", "5"))
+JOBS_WORKER_ID = os.environ.get("JOBS_WORKER_ID") or socket.gethostname()
+JOBS_STALE_AFTER_SECONDS = float(os.environ.get("JOBS_STALE_AFTER_SECONDS", "3600"))
+PROGRESS_MIN_INTERVAL_SECONDS = 1.0
+
+JobHandler = Callable[[str, Dict[str, Any], Callable[[Dict[str, Any]], None]], Any]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+RETRYABLE_KINDS: Set[str] = set()
+
+
+def register_job(kind: str, handler: JobHandler, retryable: bool = False) -> None:
+    """Register ``handler(user_id, params, progress) -> result`` for ``kind``.
+
+    Only pass ``retryable=True`` when running the handler twice is harmless.
+    """
+    JOB_HANDLERS[kind] = handler
+    if retryable:
+        RETRYABLE_KINDS.add(kind)
+    else:
+        RETRYABLE_KINDS.discard(kind)
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, ValueError):
+        return False
+    if isinstance(error, HTTPException):
+        return error.status_code >= 500
+    return True
+
+
+class JobRunner:
+    def __init__(
+        self,
+        workers: int = JOBS_WORKERS,
+        per_user_limit: int = JOBS_PER_USER_LIMIT,
+        max_attempts: int = JOBS_MAX_ATTEMPTS,
+        retry_backoff_seconds: float = JOBS_RETRY_BACKOFF_SECONDS,
+        worker_id: str = JOBS_WORKER_ID,
+        stale_after_seconds: float = JOBS_STALE_AFTER_SECONDS,
+    ) -> None:
+        self.worker_id = worker_id
+        self.stale_after_seconds = stale_after_seconds
+        self.workers = max(1, workers)
+        self.per_user_limit = max(1, per_user_limit)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running: Dict[str, int] = defaultdict(int)
+        self._waiting: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+
+    # --- Persistence ---------------------------------------------------------
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        try:
+            supabase_admin.table("jobs").update({**fields, "updated_at": _now_iso()}).eq("id", job_id).execute()
+        except Exception as e:
+            logger.warning("job_update_failed job_id=%s fields=%s: %r", job_id, sorted(fields), e)
+
+    # --- Scheduling ----------------------------------------------------------
+
+    def submit(self, user_id: str, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a queued job and schedule it; returns the stored row."""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        row = {
+            "id": str(uuid4()),
+            "user_id": user_id,
+            "kind": kind,
+            "status": "queued",
+            "params": _jsonable(params or {}),
+            "progress": {},
+            "attempts": 0,
+            "max_attempts": self.max_attempts if kind in RETRYABLE_KINDS else 1,
+            "worker_id": self.worker_id,
+            "created_at": _now_iso(),
+            "updated_at": _now_iso(),
+        }
+        supabase_admin.table("jobs").insert(row).execute()
+        logger.info("job_queued job_id=%s kind=%s user_id=%s", row["id"], kind, user_id)
+        self._schedule(
+            {
+                "id": row["id"],
+                "user_id": user_id,
+                "kind": kind,
+                "params": row["params"],
+                "attempts": 0,
+                "max_attempts": row["max_attempts"],
+            }
+        )
+        return row
+
+    def fail_orphaned_jobs(self) -> int:
+        """Fail unfinished rows that no live process will finish.
+
+        That is this instance's ``queued``/``running`` rows left by a previous
+        process, and any worker's unfinished rows idle for longer than
+        ``stale_after_seconds``. Call once at startup, before the runner
+        accepts work.
+        """
+        failed = {"status": "failed", "error": "Interrupted by a server restart", "finished_at": _now_iso(), "updated_at": _now_iso()}
+        stale_before = (datetime.utcnow() - timedelta(seconds=self.stale_after_seconds)).isoformat()
+        orphaned = 0
+        for column, op, value in (("worker_id", "eq", self.worker_id), ("updated_at", "lt", stale_before)):
+            try:
+                query = supabase_admin.table("jobs").update(failed).in_("status", ["queued", "running"])
+                rows = getattr(query, op)(column, value).execute().data or []
+            except Exception as e:
+                logger.warning("job_orphan_cleanup_failed worker_id=%s filter=%s: %r", self.worker_id, column, e)
+                continue
+            orphaned += len(rows)
+        if orphaned:
+            logger.warning("jobs_orphaned worker_id=%s failed=%s", self.worker_id, orphaned)
+        return orphaned
+
+    def _schedule(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._running[job["user_id"]] >= self.per_user_limit:
+                self._waiting[job["user_id"]].append(job)
+                return
+            self._running[job["user_id"]] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="jobs")
+            executor = self._executor
+        executor.submit(self._run, job)
+
+    def _release(self, user_id: str) -> None:
+        with self._lock:
+            self._running[user_id] -= 1
+            if self._running[user_id] <= 0:
+                del self._running[user_id]
+            waiting = self._waiting.get(user_id)
+            next_job = waiting.popleft() if waiting else None
+            if waiting is not None and not waiting:
+                del self._waiting[user_id]
+        if next_job is not None:
+            self._schedule(next_job)
+
+    # --- Execution -----------------------------------------------------------
+
+    def _progress_reporter(self, job_id: str) -> Callable[[Dict[str, Any]], None]:
+        last = [0.0]
+
+        def report(progress: Dict[str, Any]) -> None:
+            now = monotonic()
+            if now - last[0] < PROGRESS_MIN_INTERVAL_SECONDS and not progress.get("final"):
+                return
+            last[0] = now
+            self._update(job_id, {"progress": _jsonable(progress)})
+
+        return report
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        job["attempts"] += 1
+        self._update(job["id"], {"status": "running", "attempts": job["attempts"], "started_at": _now_iso()})
+        retry = False
+        try:
+            with request_scope():
+                result = JOB_HANDLERS[job["kind"]](job["user_id"], job["params"], self._progress_reporter(job["id"]))
+            self._update(job["id"], {"status": "succeeded", "result": _jsonable(result), "finished_at": _now_iso()})
+            logger.info("job_succeeded job_id=%s kind=%s attempts=%s", job["id"], job["kind"], job["attempts"])
+        except Exception as e:
+            retry = _retryable(e) and job["attempts"] < job["max_attempts"]
+            error = e.detail if isinstance(e, HTTPException) else repr(e)
+            logger.warning(
+                "job_failed job_id=%s kind=%s attempt=%s/%s retry=%s: %r",
+                job["id"], job["kind"], job["attempts"], job["max_attempts"], retry, e,
+            )
+            if retry:
+                self._update(job["id"], {"status": "queued", "error": str(error)})
+            else:
+                self._update(job["id"], {"status": "failed", "error": str(error), "finished_at": _now_iso()})
+        finally:
+            self._release(job["user_id"])
+        if retry:
+            timer = threading.Timer(self.retry_backoff_seconds * job["attempts"], self._schedule, args=(job,))
+            timer.daemon = True
+            timer.start()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "running": sum(self._running.values()),
+                "waiting": sum(len(queue) for queue in self._waiting.values()),
+            }
+
+
+@lru_cache(maxsize=1)
+def get_job_runner() -> JobRunner:
+    return JobRunner()
+
+
+def submit_job(user_id: str, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Submit on the process-wide runner; returns the body for a 202 response."""
+    row = get_job_runner().submit(user_id, kind, params)
+    return {"job_id": row["id"], "kind": kind, "status": row["status"]}
+
+
+JOB_COLUMNS = "id,kind,status,params,progress,result,error,attempts,max_attempts,created_at,started_at,finished_at,updated_at"
+
+
+def get_job(user_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        job_id = str(UUID(job_id))
+    except ValueError:
+        return None
+    rows = (
+        supabase_admin.table("jobs")
+        .select(JOB_COLUMNS)
+        .eq("id", job_id)
+        .eq("user_id", user_id)
+        .limit(1)
+        .execute()
+    ).data or []
+    return rows[0] if rows else None
+
+
+def list_jobs(user_id: str, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    query = (
+        supabase_admin.table("jobs")
+        .select(JOB_COLUMNS)
+        .eq("user_id", user_id)
+        .order("created_at", desc=True)
+        .limit(max(1, min(limit, 100)))
+    )
+    if status:
+        query = query.eq("status", status)
+    return query.execute().data or []
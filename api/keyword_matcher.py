@@ -0,0 +1,60 @@
+"""Compiled matcher for user category keywords.
+
+Keyword rules pick, for a description, the longest configured keyword that
+occurs anywhere in it (ties go to the keyword configured first). Checking
+every keyword against every description is O(rows x keywords). The keywords
+are compiled into one trie-shaped regex inside a lookahead, so a single scan
+of the description finds, at each position, the longest keyword starting
+there; the best of those is the same keyword the linear scan would pick.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional
+
+_END = ""
+
+
+def _trie_pattern(words) -> str:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[_END] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in node.items() if ch != _END]
+        if not branches:
+            return ""
+        ends_here = _END in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        # The empty alternative goes last so the longest continuation wins.
+        return "(?:" + "|".join(branches) + ("|" if ends_here else "") + ")"
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, keyword_map: Dict[str, str]) -> None:
+        """``keyword_map`` maps lower-cased keyword -> category (see ``_build_keyword_map``)."""
+        ordered = sorted(keyword_map.items(), key=lambda kv: len(kv[0]), reverse=True)
+        self._category = dict(ordered)
+        self._rank = {keyword: idx for idx, (keyword, _) in enumerate(ordered)}
+        self._regex = re.compile("(?=(" + _trie_pattern(self._rank) + "))") if ordered else None
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def match(self, description: str) -> Optional[str]:
+        """Category for ``description`` or ``None``; ``description`` must be lower-cased."""
+        if self._regex is None or not description:
+            return None
+        best = None
+        for found in self._regex.finditer(description):
+            keyword = found.group(1)
+            if best is None or self._rank[keyword] < self._rank[best]:
+                best = keyword
+        return self._category[best] if best is not None else None
@@ -0,0 +1,121 @@
+"""Persistent cache for Groq chat completions keyed by prompt fingerprint.
+
+Insights, budget suggestions and anomaly detection are pure functions of their
+prompt: the same totals produce the same request. Responses are stored in a
+local SQLite file keyed on a SHA-256 of model, system prompt, user content and
+generation parameters, with a TTL and least-recently-used eviction once the
+entry limit is reached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+
+def prompt_fingerprint(model: str, system: str, user: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"model": model, "system": system, "user": user, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute(
+            """
+            create table if not exists llm_responses (
+              key text primary key,
+              response text not null,
+              tokens integer not null default 0,
+              created_at real not null,
+              last_access real not null
+            )
+            """
+        )
+        self._conn.execute("create index if not exists idx_llm_responses_last_access on llm_responses(last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time()
+        with self._lock:
+            row = self._conn.execute(
+                "select response, tokens, created_at from llm_responses where key = ?", (key,)
+            ).fetchone()
+            if row and now - row[2] <= self.ttl_seconds:
+                self._conn.execute("update llm_responses set last_access = ? where key = ?", (now, key))
+                self.hits += 1
+                self.tokens_saved += int(row[1] or 0)
+                return row[0]
+            if row:
+                self._conn.execute("delete from llm_responses where key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str, tokens: int = 0) -> None:
+        now = time()
+        with self._lock:
+            self._conn.execute(
+                "insert or replace into llm_responses (key, response, tokens, created_at, last_access) "
+                "values (?, ?, ?, ?, ?)",
+                (key, response, int(tokens or 0), now, now),
+            )
+            self._conn.execute("delete from llm_responses where created_at < ?", (now - self.ttl_seconds,))
+            overflow = self._conn.execute("select count(*) from llm_responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "delete from llm_responses where key in "
+                    "(select key from llm_responses order by last_access asc limit ?)",
+                    (overflow,),
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("select count(*) from llm_responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def build_default_cache() -> Optional[LLMResponseCache]:
+    if os.environ.get("LLM_CACHE_ENABLED", "1").lower() in {"0", "false", "no"}:
+        return None
+    try:
+        return LLMResponseCache()
+    except sqlite3.Error as e:
+        logger.warning("LLM response cache unavailable: %r", e)
+        return None
@@ -0,0 +1,358 @@
+"""Local character n-gram naive Bayes categoriser.
+
+Descriptions that miss the vendor cache and keyword rules are often close
+variants of merchants we already know ("TESCO STORES 2231" vs "TESCO STORES
+4410"). This model is trained on ``vendor_categories`` and ``learned_rules``
+and resolves those locally; only descriptions it is not confident about are
+escalated to Groq. ``vendor_categories`` rows form a global partition and each
+user's ``learned_rules`` a partition of their own: a prediction for a user
+combines the global counts with that user's only, so one user's personal
+mappings never decide another user's categories.
+
+The model is a multinomial naive Bayes over binary character 3-5-grams,
+implemented in plain Python (no extra dependency). Labelled examples are the
+persisted state: they are written to ``LOCAL_CATEGORISER_PATH`` and the counts
+are rebuilt from them on load. Updates are incremental -- learning an example
+subtracts its previous label's counts and adds the new ones -- and come from
+two places: writes made by this process (``learn``) and a periodic
+``sync`` that pulls rows changed since the last ``updated_at`` watermark.
+Request paths use ``sync_in_background`` so a cold model never pages the
+label tables inside a request; until the first sync lands it abstains.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from time import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOCAL_CATEGORISER_PATH = os.environ.get("LOCAL_CATEGORISER_PATH", ".cache/local_categoriser.json")
+LOCAL_CATEGORISER_MIN_CONFIDENCE = float(os.environ.get("LOCAL_CATEGORISER_MIN_CONFIDENCE", "0.9"))
+LOCAL_CATEGORISER_MIN_EXAMPLES = int(os.environ.get("LOCAL_CATEGORISER_MIN_EXAMPLES", "50"))
+LOCAL_CATEGORISER_SYNC_SECONDS = int(os.environ.get("LOCAL_CATEGORISER_SYNC_SECONDS", "300"))
+
+NGRAM_SIZES = (3, 4, 5)
+ALPHA = 0.1
+# Fraction of a description's n-grams the model must have seen before it is
+# trusted; below this the description is treated as out of distribution.
+MIN_KNOWN_FEATURE_RATIO = 0.5
+SYNC_PAGE_SIZE = 1000
+
+_DIGITS_RE = re.compile(r"[0-9]+")
+_NON_TEXT_RE = re.compile(r"[^a-z&' ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+LABEL_SOURCES = (
+    ("vendor_categories", "vendor_name,category,updated_at", lambda r: (f"vendor:{r['vendor_name']}", r["vendor_name"])),
+    ("learned_rules", "user_id,description,category,updated_at", lambda r: (f"learned:{r['user_id']}:{r['description']}", r["description"])),
+)
+
+
+def iter_label_pages(client, watermarks: Dict[str, str], tables: Optional[Iterable[str]] = None):
+    """Yield ``(table, examples, last_updated_at)`` pages of labelled rows.
+
+    Rows come from ``LABEL_SOURCES`` (or the subset named in ``tables``)
+    ordered by ``(updated_at, id)`` starting at ``watermarks[table]``; examples are
+    ``(key, text, category)`` tuples as accepted by ``LocalCategoriser.learn``.
+    A failing source is logged and skipped.
+    """
+    wanted = set(tables) if tables is not None else None
+    for table, columns, identify in LABEL_SOURCES:
+        if wanted is not None and table not in wanted:
+            continue
+        try:
+            offset = 0
+            while True:
+                # id breaks updated_at ties (bulk upserts share a timestamp),
+                # otherwise offset pages can skip or repeat rows.
+                query = client.table(table).select(columns).order("updated_at").order("id")
+                if watermarks.get(table):
+                    query = query.gte("updated_at", watermarks[table])
+                rows = query.range(offset, offset + SYNC_PAGE_SIZE - 1).execute().data or []
+                if rows:
+                    examples = [(*identify(row), row.get("category")) for row in rows]
+                    yield table, examples, rows[-1]["updated_at"]
+                if len(rows) < SYNC_PAGE_SIZE:
+                    break
+                offset += SYNC_PAGE_SIZE
+        except Exception as e:
+            logger.warning("Label sync from %s failed: %r", table, e)
+
+
+def example_scope(key: str) -> Optional[str]:
+    """Partition of an example key: the user id for ``learned:<user_id>:...``, else ``None`` (global)."""
+    if key.startswith("learned:"):
+        return key.split(":", 2)[1]
+    return None
+
+
+class _Counts:
+    """Naive Bayes sufficient statistics for one partition."""
+
+    __slots__ = ("doc_count", "feature_count", "feature_total", "document_frequency")
+
+    def __init__(self) -> None:
+        self.doc_count: Dict[str, int] = defaultdict(int)
+        self.feature_count: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.feature_total: Dict[str, int] = defaultdict(int)
+        self.document_frequency: Dict[str, int] = defaultdict(int)
+
+    def apply(self, features: frozenset, category: str, sign: int) -> None:
+        self.doc_count[category] += sign
+        counts = self.feature_count[category]
+        for feature in features:
+            counts[feature] += sign
+            self.document_frequency[feature] += sign
+            if counts[feature] == 0:
+                del counts[feature]
+            if self.document_frequency[feature] == 0:
+                del self.document_frequency[feature]
+        self.feature_total[category] += sign * len(features)
+        if self.doc_count[category] == 0:
+            del self.doc_count[category]
+            self.feature_count.pop(category, None)
+            self.feature_total.pop(category, None)
+
+
+_EMPTY_COUNTS = _Counts()
+
+
+def _features(text: str) -> frozenset:
+    normalised = _SPACES_RE.sub(" ", _NON_TEXT_RE.sub(" ", _DIGITS_RE.sub(" ", str(text).lower()))).strip()
+    if not normalised:
+        return frozenset()
+    padded = f" {normalised} "
+    return frozenset(
+        padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)
+    )
+
+
+class LocalCategoriser:
+    def __init__(
+        self,
+        path: Optional[str] = LOCAL_CATEGORISER_PATH,
+        min_confidence: float = LOCAL_CATEGORISER_MIN_CONFIDENCE,
+        min_examples: int = LOCAL_CATEGORISER_MIN_EXAMPLES,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.min_confidence = min_confidence
+        self.min_examples = min_examples
+        self.predictions = 0
+        self.confident = 0
+        self._lock = threading.Lock()
+        self._examples: Dict[str, Tuple[str, str]] = {}
+        self._watermarks: Dict[str, str] = {}
+        self._counts: Dict[Optional[str], _Counts] = defaultdict(_Counts)
+        self._dirty = False
+        self._last_sync = 0.0
+        self._loaded = False
+        self._sync_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[List[Tuple[str, str, str]]], object]] = []
+
+    def subscribe(self, listener: Callable[[List[Tuple[str, str, str]]], object]) -> None:
+        """Also hand every learned ``(key, text, category)`` batch to ``listener``.
+
+        Listeners receive the examples replayed from disk on load and every
+        ``learn``/``sync`` batch, so another structure (the vendor index) can
+        be kept current from this model's single pass over the label tables.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            replay = [(key, text, category) for key, (text, category) in self._examples.items()]
+        if replay:
+            listener(replay)
+
+    def _notify(self, examples: List[Tuple[str, str, str]]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(examples)
+            except Exception as e:
+                logger.warning("Local categoriser listener failed: %r", e)
+
+    # --- Persistence ---------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning("Local categoriser state unreadable, starting empty: %r", e)
+            return
+        self._watermarks = dict(data.get("watermarks") or {})
+        examples = [(key, text, category) for key, (text, category) in (data.get("examples") or {}).items()]
+        for key, text, category in examples:
+            self._learn_locked(key, text, category)
+        self._dirty = False
+        self._notify(examples)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"watermarks": self._watermarks, "examples": self._examples}))
+            tmp.replace(self.path)
+            self._dirty = False
+
+    # --- Training ------------------------------------------------------------
+
+    def _apply_counts(self, key: str, text: str, category: str, sign: int) -> None:
+        self._counts[example_scope(key)].apply(_features(text), category, sign)
+
+    def _learn_locked(self, key: str, text: str, category: str) -> bool:
+        previous = self._examples.get(key)
+        if previous == (text, category):
+            return False
+        if previous:
+            self._apply_counts(key, previous[0], previous[1], -1)
+            del self._examples[key]
+        if category and category != "Uncategorized" and text:
+            self._examples[key] = (text, category)
+            self._apply_counts(key, text, category, 1)
+        self._dirty = True
+        return True
+
+    def learn(self, examples: Iterable[Tuple[str, str, str]]) -> int:
+        """Add or relabel ``(key, text, category)`` examples; returns how many changed.
+
+        ``key`` identifies the source row (``vendor:<name>`` or
+        ``learned:<user_id>:<description>``) so a relabel replaces, rather than
+        adds to, the previous label; it also picks the partition (see
+        ``example_scope``).
+        """
+        examples = list(examples)
+        with self._lock:
+            self._ensure_loaded()
+            changed = sum(self._learn_locked(key, text, category) for key, text, category in examples)
+        if changed:
+            self._notify(examples)
+        return changed
+
+    def _sync_due(self) -> bool:
+        return time() - self._last_sync >= LOCAL_CATEGORISER_SYNC_SECONDS
+
+    def sync_in_background(self, client) -> None:
+        """Start ``sync`` on a daemon thread when one is due and none is running."""
+        with self._lock:
+            if not self._sync_due() or (self._sync_thread is not None and self._sync_thread.is_alive()):
+                return
+            self._sync_thread = threading.Thread(target=self.sync, args=(client,), name="local-categoriser-sync", daemon=True)
+            self._sync_thread.start()
+
+    def sync(self, client, force: bool = False) -> int:
+        """Pull ``vendor_categories``/``learned_rules`` rows changed since the last sync."""
+        if not force and not self._sync_due():
+            return 0
+        self._last_sync = time()
+        with self._lock:
+            self._ensure_loaded()
+            watermarks = dict(self._watermarks)
+
+        changed = 0
+        for table, examples, updated_at in iter_label_pages(client, watermarks):
+            changed += self.learn(examples)
+            with self._lock:
+                self._watermarks[table] = max(self._watermarks.get(table, ""), updated_at)
+        if changed:
+            logger.info("local_categoriser_synced changed=%s examples=%s", changed, len(self._examples))
+        self.save()
+        return changed
+
+    # --- Prediction ----------------------------------------------------------
+
+    def _predict_locked(self, text: str, user_id: Optional[str] = None) -> Tuple[Optional[str], float]:
+        partitions = [self._counts.get(None, _EMPTY_COUNTS)]
+        if user_id is not None and user_id in self._counts:
+            partitions.append(self._counts[user_id])
+        doc_count: Dict[str, int] = defaultdict(int)
+        for part in partitions:
+            for category, docs in part.doc_count.items():
+                doc_count[category] += docs
+        total_docs = sum(doc_count.values())
+        features = _features(text)
+        if total_docs < self.min_examples or not features or len(doc_count) < 2:
+            return None, 0.0
+        known = [f for f in features if any(f in part.document_frequency for part in partitions)]
+        if len(known) < MIN_KNOWN_FEATURE_RATIO * len(features):
+            return None, 0.0
+
+        base = partitions[0].document_frequency
+        vocab = len(base) + sum(
+            1 for part in partitions[1:] for f in part.document_frequency if f not in base
+        )
+        scores = {}
+        for category, docs in doc_count.items():
+            feature_total = sum(part.feature_total.get(category, 0) for part in partitions)
+            denominator = math.log(feature_total + ALPHA * vocab)
+            score = math.log(docs / total_docs)
+            for feature in known:
+                count = sum(part.feature_count[category].get(feature, 0) for part in partitions if category in part.feature_count)
+                score += math.log(count + ALPHA) - denominator
+            scores[category] = score
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        probability = 1.0 / sum(math.exp(score - top) for score in scores.values())
+        return best, probability
+
+    def predict(self, text: str, user_id: Optional[str] = None) -> Tuple[Optional[str], float]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._predict_locked(text, user_id)
+
+    def classify_confident(
+        self,
+        texts: List[str],
+        allowed: Optional[Iterable[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Tuple[str, float]]:
+        """``{text: (category, probability)}`` for texts at or above the confidence threshold.
+
+        Only global examples and ``user_id``'s own learned rules are used.
+        """
+        allowed_set = set(allowed) if allowed is not None else None
+        resolved: Dict[str, Tuple[str, float]] = {}
+        with self._lock:
+            self._ensure_loaded()
+            for text in texts:
+                category, probability = self._predict_locked(text, user_id)
+                self.predictions += 1
+                if category is None or probability < self.min_confidence:
+                    continue
+                if allowed_set is not None and category not in allowed_set:
+                    continue
+                resolved[text] = (category, probability)
+            self.confident += len(resolved)
+        return resolved
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "examples": len(self._examples),
+                "categories": len(self._counts.get(None, _EMPTY_COUNTS).doc_count),
+                "user_partitions": sum(1 for scope in self._counts if scope is not None),
+                "predictions": self.predictions,
+                "resolved_locally": self.confident,
+                "local_ratio": round(self.confident / self.predictions, 3) if self.predictions else 0.0,
+            }
+
+
+def build_default_local_categoriser() -> Optional[LocalCategoriser]:
+    if os.environ.get("LOCAL_CATEGORISER_ENABLED", "1").lower() in {"0", "false", "no"}:
+        return None
+    return LocalCategoriser()
@@ -1,6 +1,7 @@
 # api/main.py
 import sys
 import os
+import asyncio
 import logging
 from pathlib import Path
 from time import perf_counter
@@ -11,14 +12,18 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
-from api.routes import transactions, upload, categories, budget, accounts, reviews, categorisation, recurring
+from api.routes import transactions, upload, categories, budget, accounts, reviews, categorisation, recurring, jobs
 from api.dependencies import get_supabase, get_groq_service
+from api.query_loader import request_scope
+from api.jobs import get_job_runner
+from api.closeout_runner import run_scheduler as run_closeout_scheduler
 from fastapi import FastAPI, Depends, HTTPException, Request
 from api.auth import get_current_user
 from supabase import Client
 from api.groq_service import GroqService
 from api.routes.categories import apply_user_keywords
 from api.transfer_rules import apply_transfer_classification
+from api.bulk_writes import apply_categories_bulk
 from datetime import datetime, timedelta
 from collections import defaultdict
 
@@ -71,6 +76,7 @@ app.include_router(accounts.router,     prefix="/api", tags=["accounts"])
 app.include_router(reviews.router,      prefix="/api", tags=["reviews"])
 app.include_router(categorisation.router, prefix="/api", tags=["categorisation"])
 app.include_router(recurring.router,    prefix="/api", tags=["recurring"])
+app.include_router(jobs.router,         prefix="/api", tags=["jobs"])
 
 
 def _apply_account_filter(query, account_id: str):
@@ -79,33 +85,78 @@ def _apply_account_filter(query, account_id: str):
     return query
 
 
+def _insight_month_totals(supabase: Client, user_id: str, account_id: str, now: datetime) -> tuple[dict, dict]:
+    """Spend by category for the current and previous month.
+
+    Only the two months are fetched (served by the ``(user_id, date)`` index)
+    and both are totalled in one pass, so cost no longer grows with history.
+    """
+    current_start = now.date().replace(day=1)
+    prev_start = (current_start - timedelta(days=1)).replace(day=1)
+    next_start = (current_start + timedelta(days=32)).replace(day=1)
+
+    query = (
+        supabase.table("transactions")
+        .select("amount, category, date")
+        .eq("user_id", user_id)
+        .gte("date", prev_start.isoformat())
+        .lt("date", next_start.isoformat())
+    )
+    query = _apply_account_filter(query, account_id)
+    txns = query.execute().data or []
+
+    current_totals: dict = defaultdict(float)
+    previous_totals: dict = defaultdict(float)
+    buckets = {current_start.isoformat()[:7]: current_totals, prev_start.isoformat()[:7]: previous_totals}
+    for t in txns:
+        amount = t["amount"]
+        if amount >= 0 or t.get("category") == "Transfer":
+            continue
+        bucket = buckets.get(t["date"][:7])
+        if bucket is not None:
+            bucket[t["category"]] += abs(amount)
+
+    return (
+        {k: round(v, 2) for k, v in current_totals.items()},
+        {k: round(v, 2) for k, v in previous_totals.items()},
+    )
+
+
 @app.middleware("http")
 async def request_observability_middleware(request: Request, call_next):
     request_id = request.headers.get("X-Request-ID") or uuid4().hex
     request.state.request_id = request_id
     start = perf_counter()
-    try:
-        response = await call_next(request)
-    except Exception:
-        duration_ms = (perf_counter() - start) * 1000
-        logger.warning(
-            "request_failed request_id=%s method=%s path=%s duration_ms=%.2f",
-            request_id,
-            request.method,
-            request.url.path,
-            duration_ms,
-        )
-        raise
+    with request_scope() as loader:
+        try:
+            response = await call_next(request)
+        except Exception:
+            duration_ms = (perf_counter() - start) * 1000
+            logger.warning(
+                "request_failed request_id=%s method=%s path=%s duration_ms=%.2f loader_queries=%s loader_dedup_hits=%s",
+                request_id,
+                request.method,
+                request.url.path,
+                duration_ms,
+                loader.queries,
+                loader.hits,
+            )
+            raise
 
     duration_ms = (perf_counter() - start) * 1000
     response.headers["X-Request-ID"] = request_id
+    # Reads routed through the request's QueryLoader only, not every Supabase call.
+    response.headers["X-Loader-Queries"] = str(loader.queries)
+    response.headers["X-Loader-Dedup-Hits"] = str(loader.hits)
     logger.info(
-        "request_complete request_id=%s method=%s path=%s status=%s duration_ms=%.2f",
+        "request_complete request_id=%s method=%s path=%s status=%s duration_ms=%.2f loader_queries=%s loader_dedup_hits=%s",
         request_id,
         request.method,
         request.url.path,
         response.status_code,
         duration_ms,
+        loader.queries,
+        loader.hits,
     )
     return response
 
@@ -134,11 +185,13 @@ async def startup():
     except RuntimeError as e:
         logger.error(f"Startup failed: {e}")
         raise
-    try:
-        get_groq_service()
-        logger.info("Groq service ready")
-    except RuntimeError as e:
-        logger.warning(f"Groq service unavailable - categorisation disabled: {e}")
+    # The Groq service (and the groq SDK) is created by the first AI request.
+    if not os.environ.get("GROQ_API_KEY"):
+        logger.warning("Groq service unavailable - categorisation disabled: GROQ_API_KEY environment variable must be set")
+    await asyncio.to_thread(get_job_runner().fail_orphaned_jobs)
+    if os.environ.get("CLOSEOUT_SCHEDULER_ENABLED", "").lower() in {"1", "true", "yes"}:
+        app.state.closeout_task = asyncio.create_task(run_closeout_scheduler())
+        logger.info("Monthly closeout scheduler started")
 
 
 @app.get("/api/config")
@@ -202,31 +255,7 @@ async def get_insights(
     account_id: str = "all",
 ):
     try:
-        query = (
-            supabase.table("transactions")
-            .select("amount, category, date")
-            .eq("user_id", current_user)
-        )
-        query = _apply_account_filter(query, account_id)
-        result = query.execute()
-        txns = result.data or []
-        now = datetime.now()
-        current_month = now.strftime("%Y-%m")
-        prev_month = (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
-
-        def monthly_totals(month: str) -> dict:
-            totals: dict = defaultdict(float)
-            for t in txns:
-                if (
-                    t["date"].startswith(month)
-                    and t["amount"] < 0
-                    and t.get("category") != "Transfer"
-                ):
-                    totals[t["category"]] += abs(t["amount"])
-            return {k: round(v, 2) for k, v in totals.items()}
-
-        current  = monthly_totals(current_month)
-        previous = monthly_totals(prev_month)
+        current, previous = _insight_month_totals(supabase, current_user, account_id, datetime.now())
         insight  = groq.get_spending_insights(current, previous) or None
         return {"insight": insight, "current_month": current, "previous_month": previous}
     except Exception as e:
@@ -292,23 +321,18 @@ async def categorise_transactions(
     uncategorised = apply_transfer_classification(uncategorised)
 
     # Persist any that were resolved by user keywords
+    resolved = {txn["id"]: txn["category"] for txn in uncategorised if txn.get("category") != "Uncategorized"}
+    still_uncategorised = [txn for txn in uncategorised if txn.get("category") == "Uncategorized"]
     kw_changed = 0
-    still_uncategorised = []
-    for txn in uncategorised:
-        if txn.get("category") != "Uncategorized":
-            kw_changed += 1
-            try:
-                supabase.table("transactions").update(
-                    {"category": txn["category"]}
-                ).eq("id", txn["id"]).eq("user_id", current_user).execute()
-            except Exception as e:
-                logger.warning(f"Failed to persist user-keyword category: {e!r}")
-        else:
-            still_uncategorised.append(txn)
+    if resolved:
+        kw_changed = apply_categories_bulk(supabase, current_user, resolved)["updated"]
 
     groq_changed = 0
     if still_uncategorised:
-        _, groq_changed = groq.apply_categories_to_transactions(still_uncategorised, current_user)
+        # Off the event loop so concurrent requests overlap and share in-flight Groq calls.
+        _, groq_changed = await asyncio.to_thread(
+            groq.apply_categories_to_transactions, still_uncategorised, current_user
+        )
 
     total_changed = kw_changed + groq_changed
     return {"message": f"Categorised {total_changed} transactions", "changed": total_changed}
@@ -0,0 +1,135 @@
+"""Cross-request micro-batching for per-item LLM work.
+
+Small uploads each carry a handful of unknown vendors, so sending "whatever
+the caller has" produces many half-empty Groq chunks. ``MicroBatcher``
+collects items submitted by concurrent callers and hands them to ``handler``
+in batches: a batch is dispatched as soon as it holds ``max_batch`` items, or
+``max_wait_ms`` after its oldest item arrived. Each item gets a future that
+receives its entry from the handler's result mapping (``default`` when the
+handler omits it or fails).
+
+A dispatcher thread is started on demand and exits after
+``MICRO_BATCH_IDLE_SECONDS`` without work. Batches run on a pool of
+``MICRO_BATCH_MAX_CONCURRENCY`` threads, so a slow LLM call does not hold up
+the next batch but a burst of batches cannot open unbounded Groq requests;
+batches beyond the limit wait for a free worker.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+MICRO_BATCH_WAIT_MS = int(os.environ.get("MICRO_BATCH_WAIT_MS", "50"))
+MICRO_BATCH_TIMEOUT_SECONDS = float(os.environ.get("MICRO_BATCH_TIMEOUT_SECONDS", "60"))
+MICRO_BATCH_MAX_CONCURRENCY = int(os.environ.get("MICRO_BATCH_MAX_CONCURRENCY", "4"))
+MICRO_BATCH_IDLE_SECONDS = 5.0
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        handler: Callable[[List[Hashable]], Mapping[Hashable, Any]],
+        max_batch: int,
+        max_wait_ms: int = MICRO_BATCH_WAIT_MS,
+        default: Any = None,
+        name: str = "micro-batcher",
+        max_concurrency: int = MICRO_BATCH_MAX_CONCURRENCY,
+    ) -> None:
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.default = default
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.batches = 0
+        self.items = 0
+        self._cond = threading.Condition()
+        self._pending: deque = deque()
+        self._thread = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, items: Iterable[Hashable]) -> Dict[Hashable, Future]:
+        """Queue ``items`` (deduplicated) and return ``{item: future}``."""
+        futures = {item: Future() for item in dict.fromkeys(items)}
+        if not futures:
+            return futures
+        now = monotonic()
+        with self._cond:
+            self._pending.extend((item, future, now) for item, future in futures.items())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return futures
+
+    def gather(self, futures: Mapping[Hashable, Future], timeout: float = MICRO_BATCH_TIMEOUT_SECONDS) -> Dict[Hashable, Any]:
+        deadline = monotonic() + timeout
+        results: Dict[Hashable, Any] = {}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result(timeout=max(0.0, deadline - monotonic()))
+            except FutureTimeoutError:
+                logger.warning("%s_timeout item=%r timeout=%ss", self.name, item, timeout)
+                results[item] = self.default
+        return results
+
+    def map(self, items: Iterable[Hashable], timeout: float = MICRO_BATCH_TIMEOUT_SECONDS) -> Dict[Hashable, Any]:
+        """``submit`` then ``gather``: blocks until every item's batch has run."""
+        return self.gather(self.submit(items), timeout)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "items": self.items,
+                "items_per_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            }
+
+    # --- Dispatch ------------------------------------------------------------
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait(MICRO_BATCH_IDLE_SECONDS)
+                if not self._pending:
+                    self._thread = None
+                    return None
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            self.batches += 1
+            self.items += len(batch)
+            return batch
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f"{self.name}-batch")
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch) -> None:
+        items = [item for item, _, _ in batch]
+        try:
+            results = self.handler(items) or {}
+        except Exception as e:
+            logger.warning("%s batch of %s failed: %r", self.name, len(items), e)
+            results = {}
+        for item, future, _ in batch:
+            if not future.done():
+                future.set_result(results.get(item, self.default))
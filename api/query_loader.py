@@ -0,0 +1,125 @@
+"""Request-scoped memoisation of Supabase reads.
+
+A ``QueryLoader`` lives for the duration of one HTTP request (installed by the
+observability middleware in ``api/main.py``). Helpers that read the same rows
+several times in a request -- account scope checks, budget targets, review
+transaction windows -- route their reads through ``load``/``load_many`` so each
+distinct query runs once. Outside a request scope (tests, CLI runners) the
+helpers fall through to a direct fetch.
+
+``queries`` counts loader fetches only: direct ``supabase_admin`` reads and
+writes in the same request bypass the loader and are not included.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+_current_loader: ContextVar[Optional["QueryLoader"]] = ContextVar("query_loader", default=None)
+
+
+class QueryLoader:
+    def __init__(self) -> None:
+        self._memo: Dict[Tuple[Hashable, ...], Any] = {}
+        self.queries = 0
+        self.hits = 0
+
+    def load(self, key: Tuple[Hashable, ...], fetch: Callable[[], Any]) -> Any:
+        if key in self._memo:
+            self.hits += 1
+            return self._memo[key]
+        self.queries += 1
+        value = fetch()
+        self._memo[key] = value
+        return value
+
+    def load_many(
+        self,
+        namespace: Tuple[Hashable, ...],
+        keys: Iterable[Hashable],
+        fetch_many: Callable[[List[Hashable]], Dict[Hashable, Any]],
+    ) -> Dict[Hashable, Any]:
+        """Resolve ``keys`` under ``namespace``, fetching only the misses in one batch.
+
+        ``fetch_many`` receives the missing keys and returns a mapping for the
+        ones that exist; absent keys are memoised as ``None`` so they are not
+        re-queried later in the request.
+        """
+        wanted = list(dict.fromkeys(keys))
+        missing = [k for k in wanted if (*namespace, k) not in self._memo]
+        self.hits += len(wanted) - len(missing)
+        if missing:
+            self.queries += 1
+            fetched = fetch_many(missing) or {}
+            for k in missing:
+                self._memo[(*namespace, k)] = fetched.get(k)
+        return {k: self._memo[(*namespace, k)] for k in wanted if self._memo[(*namespace, k)] is not None}
+
+    def invalidate(self, namespace: Tuple[Hashable, ...]) -> None:
+        size = len(namespace)
+        for key in [k for k in self._memo if k[:size] == namespace]:
+            del self._memo[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"queries": self.queries, "hits": self.hits}
+
+
+def current_loader() -> Optional[QueryLoader]:
+    return _current_loader.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[QueryLoader]:
+    loader = QueryLoader()
+    token = _current_loader.set(loader)
+    try:
+        yield loader
+    finally:
+        _current_loader.reset(token)
+
+
+def load(key: Tuple[Hashable, ...], fetch: Callable[[], Any]) -> Any:
+    loader = _current_loader.get()
+    if loader is None:
+        return fetch()
+    return loader.load(key, fetch)
+
+
+def load_many(
+    namespace: Tuple[Hashable, ...],
+    keys: Iterable[Hashable],
+    fetch_many: Callable[[List[Hashable]], Dict[Hashable, Any]],
+) -> Dict[Hashable, Any]:
+    loader = _current_loader.get()
+    if loader is None:
+        wanted = list(dict.fromkeys(keys))
+        if not wanted:
+            return {}
+        fetched = fetch_many(wanted) or {}
+        return {k: fetched[k] for k in wanted if fetched.get(k) is not None}
+    return loader.load_many(namespace, keys, fetch_many)
+
+
+def invalidate(namespace: Tuple[Hashable, ...]) -> None:
+    loader = _current_loader.get()
+    if loader is not None:
+        loader.invalidate(namespace)
+
+
+def account_belongs_to_user(client, user_id: str, account_id: str) -> bool:
+    """Whether ``account_id`` is one of ``user_id``'s accounts; read once per request."""
+    rows = load(
+        ("account", user_id, account_id),
+        lambda: (
+            client.table("accounts")
+            .select("id")
+            .eq("id", account_id)
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        ).data
+        or [],
+    )
+    return bool(rows)
@@ -0,0 +1,120 @@
+"""Vectorised cadence + confidence scoring for recurring merchant groups.
+
+Computes the same scores as ``_classify_cadence`` / ``_confidence_score`` in
+``api/routes/recurring.py`` for every merchant group at once with pandas
+groupby operations, instead of one Python loop per group.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+CADENCE_DAYS = {
+    "weekly": 7,
+    "biweekly": 14,
+    "monthly": 30,
+}
+
+
+def score_groups(
+    groups: Dict[Hashable, Tuple[Iterable[date], Iterable[float]]],
+) -> Dict[Hashable, Tuple[str, Optional[int], float]]:
+    """Score merchant groups.
+
+    ``groups`` maps a group key to ``(dates, amounts)``. Returns
+    ``{key: (cadence, cadence_days, confidence)}`` with the semantics of the
+    scalar helpers: upper median interval for cadence, mean deviation from
+    cadence (or interval pstdev when irregular) and amount coefficient of
+    variation for confidence.
+    """
+    if not groups:
+        return {}
+
+    # Imported here so pandas is not paid for at API startup.
+    import numpy as np
+    import pandas as pd
+
+    keys = list(groups.keys())
+    group_ids = []
+    day_values = []
+    amount_values = []
+    for gid, key in enumerate(keys):
+        dates, amounts = groups[key]
+        dates = list(dates)
+        amounts = list(amounts)
+        group_ids.extend([gid] * len(dates))
+        day_values.extend(d.toordinal() for d in dates)
+        amount_values.extend(abs(float(a)) for a in amounts)
+
+    frame = pd.DataFrame({"g": group_ids, "d": day_values, "a": amount_values})
+    frame.sort_values(["g", "d"], inplace=True, kind="mergesort")
+    index = pd.RangeIndex(len(keys))
+
+    occ = frame.groupby("g")["d"].size().reindex(index, fill_value=0).to_numpy()
+    amount_mean = frame.groupby("g")["a"].mean().reindex(index, fill_value=0.0).to_numpy()
+    amount_std = frame.groupby("g")["a"].std(ddof=0).reindex(index, fill_value=0.0).fillna(0.0).to_numpy()
+
+    same_group = frame["g"].to_numpy()[1:] == frame["g"].to_numpy()[:-1]
+    intervals = pd.DataFrame(
+        {
+            "g": frame["g"].to_numpy()[1:][same_group],
+            "iv": np.diff(frame["d"].to_numpy())[same_group],
+        }
+    )
+
+    n_intervals = intervals.groupby("g")["iv"].size().reindex(index, fill_value=0).to_numpy()
+
+    # Upper median (sorted(intervals)[n // 2]) to match _classify_cadence.
+    ranked = intervals.sort_values(["g", "iv"], kind="mergesort").reset_index(drop=True)
+    ranked["rank"] = ranked.groupby("g").cumcount()
+    ranked["mid"] = n_intervals[ranked["g"].to_numpy()] // 2
+    median = (
+        ranked.loc[ranked["rank"] == ranked["mid"]]
+        .set_index("g")["iv"]
+        .reindex(index)
+        .to_numpy(dtype=float)
+    )
+
+    cadence = np.select(
+        [
+            (median >= 6) & (median <= 8),
+            (median >= 13) & (median <= 16),
+            (median >= 26) & (median <= 35),
+        ],
+        ["weekly", "biweekly", "monthly"],
+        default="irregular",
+    )
+    cadence_days = np.select(
+        [cadence == "weekly", cadence == "biweekly", cadence == "monthly"],
+        [CADENCE_DAYS["weekly"], CADENCE_DAYS["biweekly"], CADENCE_DAYS["monthly"]],
+        default=0,
+    )
+
+    intervals["dev"] = np.abs(intervals["iv"].to_numpy() - cadence_days[intervals["g"].to_numpy()])
+    mean_dev = intervals.groupby("g")["dev"].mean().reindex(index, fill_value=0.0).to_numpy()
+    interval_std = intervals.groupby("g")["iv"].std(ddof=0).reindex(index, fill_value=0.0).fillna(0.0).to_numpy()
+
+    occ_score = np.minimum(35.0, occ * 4.5)
+    interval_score = np.where(
+        (cadence_days > 0) & (n_intervals > 0),
+        np.maximum(0.0, 35.0 - mean_dev * 3.0),
+        np.where(n_intervals > 0, np.maximum(0.0, 18.0 - interval_std * 2.5), 5.0),
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(amount_mean > 0, amount_std / amount_mean, np.inf)
+    amount_score = np.where(
+        (occ >= 2) & (amount_mean > 0),
+        np.select([cv <= 0.15, cv <= 0.35], [25.0, 15.0], default=8.0),
+        10.0,
+    )
+    score = np.clip(occ_score + interval_score + amount_score, 5.0, 99.0)
+
+    results: Dict[Hashable, Tuple[str, Optional[int], float]] = {}
+    for gid, key in enumerate(keys):
+        if occ[gid] == 0:
+            results[key] = ("irregular", None, 0.0)
+            continue
+        days = int(cadence_days[gid]) or None
+        results[key] = (str(cadence[gid]), days, round(float(score[gid]), 1))
+    return results
@@ -4,6 +4,8 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+from api.query_loader import load
+from src.merchants import clean_display_name
 from src.supabase_client import supabase_admin
 
 REVIEW_TYPES = {"monthly_closeout", "upload_snapshot"}
@@ -27,27 +29,33 @@ def _apply_account_filter(query, account_id: str):
 
 
 def _fetch_transactions(user_id: str, period_start: date, period_end: date, account_id: str = "all") -> List[Dict[str, Any]]:
-    query = (
-        supabase_admin.table("transactions")
-        .select("id, date, description, amount, category, excluded_from_budget")
-        .eq("user_id", user_id)
-        .gte("date", period_start.isoformat())
-        .lt("date", _next_day(period_end).isoformat())
-    )
-    query = _apply_account_filter(query, account_id)
-    result = query.execute()
-    return result.data or []
+    def fetch() -> List[Dict[str, Any]]:
+        query = (
+            supabase_admin.table("transactions")
+            .select("id, date, description, amount, category, excluded_from_budget")
+            .eq("user_id", user_id)
+            .gte("date", period_start.isoformat())
+            .lt("date", _next_day(period_end).isoformat())
+        )
+        query = _apply_account_filter(query, account_id)
+        return query.execute().data or []
+
+    return load(("review_transactions", user_id, account_id or "all", period_start, period_end), fetch)
 
 
 def _fetch_budget_targets(user_id: str) -> Dict[str, float]:
-    result = (
-        supabase_admin.table("budget_targets")
-        .select("category,target_amount")
-        .eq("user_id", user_id)
-        .execute()
+    rows = load(
+        ("budget_targets", user_id),
+        lambda: (
+            supabase_admin.table("budget_targets")
+            .select("category,target_amount,threshold_percent")
+            .eq("user_id", user_id)
+            .execute()
+        ).data
+        or [],
     )
     targets: Dict[str, float] = {}
-    for row in (result.data or []):
+    for row in rows:
         try:
             targets[row["category"]] = float(row["target_amount"])
         except Exception:
@@ -55,21 +63,62 @@ def _fetch_budget_targets(user_id: str) -> Dict[str, float]:
     return targets
 
 
-def _merchant_from_description(desc: str) -> str:
-    if not desc:
-        return "Unknown"
-    return str(desc).strip().split("  ")[0][:60]
+def previous_period(period_start: date, period_end: date) -> tuple[date, date]:
+    length_days = (period_end - period_start).days + 1
+    prev_end = period_start - timedelta(days=1)
+    prev_start = prev_end - timedelta(days=length_days - 1)
+    return prev_start, prev_end
 
 
-def _aggregate_spend_by_category(transactions: List[Dict[str, Any]]) -> Dict[str, float]:
-    out: Dict[str, float] = defaultdict(float)
+def _empty_period_totals() -> Dict[str, Any]:
+    return {
+        "spend_by_category": defaultdict(float),
+        "merchant_totals": defaultdict(lambda: {"amount": 0.0, "count": 0}),
+        "income": 0.0,
+        "count": 0,
+    }
+
+
+def _aggregate_periods(
+    transactions: List[Dict[str, Any]],
+    period_start: date,
+    period_end: date,
+    prev_start: date,
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """Bucket a ``[prev_start, period_end]`` fetch into current/previous totals in one pass.
+
+    Merchant totals are only needed for the current period, so the
+    normaliser is skipped for previous-period rows.
+    """
+    current = _empty_period_totals()
+    previous = _empty_period_totals()
+    start_iso = period_start.isoformat()
+    end_iso = period_end.isoformat()
+    prev_iso = prev_start.isoformat()
+
     for t in transactions:
+        day = str(t.get("date") or "")[:10]
+        if start_iso <= day <= end_iso:
+            bucket = current
+        elif prev_iso <= day < start_iso:
+            bucket = previous
+        else:
+            continue
+
         amount = float(t.get("amount") or 0)
+        bucket["count"] += 1
+        if amount > 0:
+            bucket["income"] += amount
+            continue
         category = t.get("category") or "Uncategorized"
-        excluded = bool(t.get("excluded_from_budget", False))
-        if amount < 0 and not excluded and category != "Transfer":
-            out[category] += abs(amount)
-    return dict(out)
+        if amount < 0 and not t.get("excluded_from_budget", False) and category != "Transfer":
+            bucket["spend_by_category"][category] += abs(amount)
+            if bucket is current:
+                merchant = clean_display_name(t.get("description", ""))
+                bucket["merchant_totals"][merchant]["amount"] += abs(amount)
+                bucket["merchant_totals"][merchant]["count"] += 1
+
+    return current, previous
 
 
 def _review_summary(
@@ -80,10 +129,18 @@ def _review_summary(
     account_scope: str,
     statement_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    spend_by_category = _aggregate_spend_by_category(transactions)
+    """Build a review summary.
+
+    ``transactions`` must cover both the review period and the equally long
+    previous period (see ``previous_period``); rows outside either are ignored.
+    """
+    prev_start, _ = previous_period(period_start, period_end)
+    current, previous = _aggregate_periods(transactions, period_start, period_end, prev_start)
+    spend_by_category = dict(current["spend_by_category"])
+    prev_spend_by_category = dict(previous["spend_by_category"])
 
     spent = sum(spend_by_category.values())
-    income = sum(float(t.get("amount") or 0) for t in transactions if float(t.get("amount") or 0) > 0)
+    income = current["income"]
     net = income - spent
 
     targets = _fetch_budget_targets(user_id)
@@ -103,29 +160,12 @@ def _review_summary(
             }
         )
 
-    merchant_totals: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"amount": 0.0, "count": 0})
-    for t in transactions:
-        amount = float(t.get("amount") or 0)
-        category = t.get("category") or "Uncategorized"
-        excluded = bool(t.get("excluded_from_budget", False))
-        if amount < 0 and not excluded and category != "Transfer":
-            m = _merchant_from_description(t.get("description", ""))
-            merchant_totals[m]["amount"] += abs(amount)
-            merchant_totals[m]["count"] += 1
-
     top_merchants = sorted(
-        [{"merchant": m, "amount": round(v["amount"], 2), "count": v["count"]} for m, v in merchant_totals.items()],
+        [{"merchant": m, "amount": round(v["amount"], 2), "count": v["count"]} for m, v in current["merchant_totals"].items()],
         key=lambda x: x["amount"],
         reverse=True,
     )[:5]
 
-    # Previous period comparison
-    length_days = (period_end - period_start).days + 1
-    prev_end = period_start - timedelta(days=1)
-    prev_start = prev_end - timedelta(days=length_days - 1)
-    prev_transactions = _fetch_transactions(user_id, prev_start, prev_end, account_scope)
-    prev_spend_by_category = _aggregate_spend_by_category(prev_transactions)
-
     category_changes_vs_previous = []
     for cat in sorted(set(spend_by_category.keys()) | set(prev_spend_by_category.keys())):
         prev = float(prev_spend_by_category.get(cat, 0.0))
@@ -155,7 +195,7 @@ def _review_summary(
             "spent": round(spent, 2),
             "income": round(income, 2),
             "net": round(net, 2),
-            "transaction_count": len(transactions),
+            "transaction_count": current["count"],
         },
         "budget_variance": budget_variance,
         "top_merchants": top_merchants,
@@ -171,6 +211,56 @@ def _review_summary(
     }
 
 
+def fetch_data_versions(user_id: str, window_start: date, period_end: date) -> List[Dict[str, Any]]:
+    month_start = date(window_start.year, window_start.month, 1)
+    return (
+        supabase_admin.table("review_data_versions")
+        .select("account_id,month,version")
+        .eq("user_id", user_id)
+        .gte("month", month_start.isoformat())
+        .lte("month", period_end.isoformat())
+        .execute()
+    ).data or []
+
+
+def _data_version(version_rows: List[Dict[str, Any]], account_scope: str) -> int:
+    """Watermark for a review scope: the sum of trigger-maintained month versions.
+
+    Versions only ever increase, so any transaction change in the review or
+    comparison period raises the sum.
+    """
+    return sum(
+        int(row.get("version") or 0)
+        for row in version_rows
+        if account_scope == "all" or row.get("account_id") == account_scope
+    )
+
+
+def _review_row(
+    *,
+    user_id: str,
+    account_scope: str,
+    period_start: date,
+    period_end: date,
+    review_type: str,
+    triggered_by: str,
+    statement_id: Optional[str],
+    summary: Dict[str, Any],
+    data_version: int,
+) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "account_scope": account_scope,
+        "period_start": period_start.isoformat(),
+        "period_end": period_end.isoformat(),
+        "review_type": review_type,
+        "triggered_by": triggered_by,
+        "statement_id": statement_id,
+        "summary": summary,
+        "data_version": data_version,
+    }
+
+
 def get_or_create_review(
     *,
     user_id: str,
@@ -204,24 +294,27 @@ def get_or_create_review(
 
     existing = existing_query.limit(1).execute()
     if existing.data:
-        return existing.data[0]
+        return refresh_review(existing.data[0])
 
-    transactions = _fetch_transactions(user_id, period_start, period_end, account_scope)
+    prev_start, _ = previous_period(period_start, period_end)
+    data_version = _data_version(fetch_data_versions(user_id, prev_start, period_end), account_scope)
+    transactions = _fetch_transactions(user_id, prev_start, period_end, account_scope)
     summary = _review_summary(user_id, transactions, period_start, period_end, account_scope, statement_id)
 
     inserted = (
         supabase_admin.table("monthly_reviews")
         .insert(
-            {
-                "user_id": user_id,
-                "account_scope": account_scope,
-                "period_start": period_start.isoformat(),
-                "period_end": period_end.isoformat(),
-                "review_type": review_type,
-                "triggered_by": triggered_by,
-                "statement_id": statement_id,
-                "summary": summary,
-            }
+            _review_row(
+                user_id=user_id,
+                account_scope=account_scope,
+                period_start=period_start,
+                period_end=period_end,
+                review_type=review_type,
+                triggered_by=triggered_by,
+                statement_id=statement_id,
+                summary=summary,
+                data_version=data_version,
+            )
         )
         .execute()
     )
@@ -245,14 +338,111 @@ def get_or_create_review(
     except Exception:
         pass
 
-    return created or {}
+    return {**created, "stale": False, "recomputed": False} if created else {}
+
+
+def refresh_review(review: Dict[str, Any], recompute: bool = True) -> Dict[str, Any]:
+    """Compare a stored review against the current data version of its period.
+
+    Returns the review with ``stale``/``recomputed`` flags. When the period's
+    transactions changed since the summary was built (or the review predates
+    versioning) and ``recompute`` is set, the summary is rebuilt from one
+    range fetch and written back in place. Only ``monthly_closeout`` reviews
+    are rebuilt: an ``upload_snapshot`` records the period as it was at upload
+    time, so it is only flagged ``stale``.
+    """
+    user_id = review["user_id"]
+    account_scope = review.get("account_scope") or "all"
+    period_start = _parse_date(review["period_start"])
+    period_end = _parse_date(review["period_end"])
+    prev_start, _ = previous_period(period_start, period_end)
+
+    data_version = _data_version(fetch_data_versions(user_id, prev_start, period_end), account_scope)
+    if review.get("data_version") == data_version:
+        return {**review, "stale": False, "recomputed": False}
+    if not recompute or review.get("review_type") != "monthly_closeout":
+        return {**review, "stale": True, "recomputed": False}
+
+    transactions = _fetch_transactions(user_id, prev_start, period_end, account_scope)
+    summary = _review_summary(
+        user_id, transactions, period_start, period_end, account_scope, review.get("statement_id")
+    )
+    updated = (
+        supabase_admin.table("monthly_reviews")
+        .update({"summary": summary, "data_version": data_version})
+        .eq("id", review["id"])
+        .eq("user_id", user_id)
+        .execute()
+    )
+    row = (updated.data or [None])[0] or {**review, "summary": summary, "data_version": data_version}
 
+    # best-effort event logging
+    try:
+        supabase_admin.table("review_events").insert(
+            {
+                "user_id": user_id,
+                "review_id": review["id"],
+                "event_type": "review_recomputed",
+                "payload": {
+                    "review_id": review["id"],
+                    "previous_data_version": review.get("data_version"),
+                    "data_version": data_version,
+                },
+            }
+        ).execute()
+    except Exception:
+        pass
 
-def generate_monthly_closeout_for_previous_month(user_id: str, account_id: str = "all") -> Dict[str, Any]:
-    today = date.today()
+    return {**row, "stale": False, "recomputed": True}
+
+
+def previous_month_period(today: Optional[date] = None) -> tuple[date, date]:
+    today = today or date.today()
     this_month_start = date(today.year, today.month, 1)
     prev_month_end = this_month_start - timedelta(days=1)
-    prev_month_start = date(prev_month_end.year, prev_month_end.month, 1)
+    return date(prev_month_end.year, prev_month_end.month, 1), prev_month_end
+
+
+def build_monthly_closeout_rows(
+    user_id: str,
+    transactions: List[Dict[str, Any]],
+    account_scopes: List[str],
+    period_start: date,
+    period_end: date,
+    version_rows: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Build ``monthly_closeout`` insert rows for several scopes from one fetch.
+
+    ``transactions`` must span ``[previous period start, period_end]`` for all
+    of the user's accounts and carry ``account_id``; the ``all`` scope uses
+    every row and each account scope uses its own slice. ``version_rows`` are
+    the user's ``review_data_versions`` for the same window.
+    """
+    by_account: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for t in transactions:
+        by_account[t.get("account_id")].append(t)
+
+    rows = []
+    for scope in account_scopes:
+        scoped = transactions if scope == "all" else by_account.get(scope, [])
+        rows.append(
+            _review_row(
+                user_id=user_id,
+                account_scope=scope,
+                period_start=period_start,
+                period_end=period_end,
+                review_type="monthly_closeout",
+                triggered_by="system_monthly",
+                statement_id=None,
+                summary=_review_summary(user_id, scoped, period_start, period_end, scope),
+                data_version=_data_version(version_rows, scope),
+            )
+        )
+    return rows
+
+
+def generate_monthly_closeout_for_previous_month(user_id: str, account_id: str = "all") -> Dict[str, Any]:
+    prev_month_start, prev_month_end = previous_month_period()
 
     return get_or_create_review(
         user_id=user_id,
@@ -2,8 +2,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional
-from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict, defaultdict
 import sys
 import os
 
@@ -11,9 +11,18 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
 from src.supabase_client import supabase_admin  # Changed to admin client
 from api.auth import get_current_user
+from api.query_loader import account_belongs_to_user, invalidate, load
 
 router = APIRouter()
 
+AFFORDABILITY_LOOKBACK_MONTHS = 3
+AFFORDABILITY_CACHE_MAX_USERS = int(os.environ.get("AFFORDABILITY_CACHE_MAX_USERS", "1024"))
+# (user_id, day) -> (data version, {account_scope: avg net monthly saving}). The
+# version is keyed on review_data_versions, which the transactions triggers bump
+# on every insert/update/delete, so no write path has to invalidate it by hand.
+# Least recently used first; earlier days are dropped on insert.
+_AFFORDABILITY_CACHE: "OrderedDict[Tuple[str, date], Tuple[int, Dict[str, float]]]" = OrderedDict()
+
 
 # Pydantic models for request bodies
 class BudgetTargetRequest(BaseModel):
@@ -109,19 +118,24 @@ def _validate_account_scope(user_id: str, account_scope: str) -> str:
     scope = account_scope or "all"
     if scope == "all":
         return "all"
-    account = (
-        supabase_admin.table("accounts")
-        .select("id")
-        .eq("id", scope)
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not account.data:
+    if not account_belongs_to_user(supabase_admin, user_id, scope):
         raise HTTPException(status_code=400, detail="Invalid account scope")
     return scope
 
 
+def _fetch_budget_target_rows(user_id: str) -> list:
+    return load(
+        ("budget_targets", user_id),
+        lambda: (
+            supabase_admin.table("budget_targets")
+            .select("category,target_amount,threshold_percent")
+            .eq("user_id", user_id)
+            .execute()
+        ).data
+        or [],
+    )
+
+
 def _goal_months_remaining(today: date, target_date: date) -> int:
     if target_date <= today:
         return 1
@@ -131,37 +145,75 @@ def _goal_months_remaining(today: date, target_date: date) -> int:
     return max(1, months)
 
 
-def _get_average_net_monthly_saving(user_id: str, account_scope: str) -> float:
-    today = date.today()
-    start_date = date(today.year, today.month, 1)
-    start_date = _add_months(start_date, -3)
+def _net_monthly_savings_by_scope(rows: list) -> Dict[str, float]:
+    """Single grouped pass: average monthly (income - non-transfer spend) per scope.
+
+    Every row feeds the ``all`` scope and the scope of its own account, so all
+    goals for a user can share one lookback fetch.
+    """
+    monthly = defaultdict(lambda: defaultdict(lambda: {"income": 0.0, "spend": 0.0}))
+    for row in rows:
+        month_key = str(row.get("date", ""))[:7]
+        amount = float(row.get("amount") or 0)
+        category = row.get("category")
+        scopes = ["all"]
+        if row.get("account_id"):
+            scopes.append(row["account_id"])
+        for scope in scopes:
+            if amount > 0:
+                monthly[scope][month_key]["income"] += amount
+            elif amount < 0 and category != "Transfer":
+                monthly[scope][month_key]["spend"] += abs(amount)
+
+    averages = {}
+    for scope, by_month in monthly.items():
+        net_values = [(vals["income"] - vals["spend"]) for vals in by_month.values()]
+        averages[scope] = round(sum(net_values) / len(net_values), 2)
+    return averages
+
+
+def _lookback_data_version(user_id: str, start_date: date) -> int:
+    rows = (
+        supabase_admin.table("review_data_versions")
+        .select("version")
+        .eq("user_id", user_id)
+        .gte("month", start_date.isoformat())
+        .execute()
+    ).data or []
+    return sum(int(row.get("version") or 0) for row in rows)
+
 
-    query = (
+def _get_net_monthly_savings(user_id: str) -> Dict[str, float]:
+    today = date.today()
+    start_date = _add_months(date(today.year, today.month, 1), -AFFORDABILITY_LOOKBACK_MONTHS)
+    cache_key = (user_id, today)
+    data_version = _lookback_data_version(user_id, start_date)
+    cached = _AFFORDABILITY_CACHE.get(cache_key)
+    if cached is not None and cached[0] == data_version:
+        _AFFORDABILITY_CACHE.move_to_end(cache_key)
+        return cached[1]
+
+    rows = (
         supabase_admin.table("transactions")
-        .select("date,amount,category")
+        .select("date,amount,category,account_id")
         .eq("user_id", user_id)
         .gte("date", start_date.isoformat())
         .lt("date", today.isoformat())
-    )
-    if account_scope != "all":
-        query = query.eq("account_id", account_scope)
-    rows = query.execute().data or []
+        .execute()
+    ).data or []
 
-    monthly = defaultdict(lambda: {"income": 0.0, "spend": 0.0})
-    for row in rows:
-        month_key = str(row.get("date", ""))[:7]
-        amount = float(row.get("amount") or 0)
-        category = row.get("category")
-        if amount > 0:
-            monthly[month_key]["income"] += amount
-        elif amount < 0 and category != "Transfer":
-            monthly[month_key]["spend"] += abs(amount)
+    averages = _net_monthly_savings_by_scope(rows)
+    for stale_key in [k for k in _AFFORDABILITY_CACHE if k[1] != today]:
+        _AFFORDABILITY_CACHE.pop(stale_key, None)
+    _AFFORDABILITY_CACHE[cache_key] = (data_version, averages)
+    _AFFORDABILITY_CACHE.move_to_end(cache_key)
+    while len(_AFFORDABILITY_CACHE) > AFFORDABILITY_CACHE_MAX_USERS:
+        _AFFORDABILITY_CACHE.popitem(last=False)
+    return averages
 
-    if not monthly:
-        return 0.0
 
-    net_values = [(vals["income"] - vals["spend"]) for vals in monthly.values()]
-    return round(sum(net_values) / len(net_values), 2)
+def _get_average_net_monthly_saving(user_id: str, account_scope: str) -> float:
+    return _get_net_monthly_savings(user_id).get(account_scope or "all", 0.0)
 
 
 def _build_affordability(goal: dict, avg_net_monthly: float) -> dict:
@@ -224,6 +276,7 @@ async def set_budget_target(
             "target_amount": request.target_amount,
             "threshold_percent": request.threshold_percent,
         }).execute()
+        invalidate(("budget_targets", user_id))
 
         return {"success": True, "data": result.data}
     except Exception as e:
@@ -253,6 +306,7 @@ async def update_budget_target(
             .eq("user_id", user_id) \
             .eq("category", category) \
             .execute()
+        invalidate(("budget_targets", user_id))
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Budget target not found")
@@ -276,6 +330,7 @@ async def delete_budget_target(
             .eq("user_id", user_id) \
             .eq("category", category) \
             .execute()
+        invalidate(("budget_targets", user_id))
 
         return {"success": True}
     except Exception as e:
@@ -443,10 +498,11 @@ async def get_goals_affordability(
             query = query.eq("status", _validate_goal_status(status))
         goals = query.execute().data or []
 
+        net_by_scope = _get_net_monthly_savings(user_id) if goals else {}
         affordability = []
         for goal in goals:
             scope = goal.get("account_scope") or "all"
-            avg_net = _get_average_net_monthly_saving(user_id, scope)
+            avg_net = net_by_scope.get(scope, 0.0)
             affordability.append({
                 "goal": goal,
                 "affordability": _build_affordability(goal, avg_net),
@@ -464,15 +520,12 @@ async def get_budget_comparison(account_id: str = "all", user_id: str = Depends(
     """Compare actual spending vs budget targets"""
     try:
         # Get budget targets
-        targets_result = supabase_admin.table("budget_targets") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .execute()
+        target_rows = _fetch_budget_target_rows(user_id)
 
-        targets = {t["category"]: float(t["target_amount"]) for t in (targets_result.data or [])}
+        targets = {t["category"]: float(t["target_amount"]) for t in target_rows}
         thresholds = {
             t["category"]: _coerce_threshold(t.get("threshold_percent"))
-            for t in (targets_result.data or [])
+            for t in target_rows
         }
 
         # Get actual spending by category (current month)
@@ -533,17 +586,14 @@ async def get_budget_health(
         month_start = _month_start(month)
         next_month_start = _add_months(month_start, 1)
 
-        targets_result = supabase_admin.table("budget_targets") \
-            .select("category, target_amount, threshold_percent") \
-            .eq("user_id", user_id) \
-            .execute()
+        target_rows = _fetch_budget_target_rows(user_id)
 
         targets = {
             row["category"]: {
                 "target": float(row["target_amount"]),
                 "threshold_percent": _coerce_threshold(row.get("threshold_percent")),
             }
-            for row in (targets_result.data or [])
+            for row in target_rows
         }
 
         tx_query = supabase_admin.table("transactions") \
@@ -613,16 +663,13 @@ async def get_budget_trend(
         range_start = month_starts[0]
         range_end_exclusive = _add_months(current_month, 1)
 
-        targets_result = supabase_admin.table("budget_targets") \
-            .select("category, target_amount, threshold_percent") \
-            .eq("user_id", user_id) \
-            .execute()
+        target_rows = _fetch_budget_target_rows(user_id)
         targets = {
             row["category"]: {
                 "target": float(row["target_amount"]),
                 "threshold_percent": _coerce_threshold(row.get("threshold_percent")),
             }
-            for row in (targets_result.data or [])
+            for row in target_rows
         }
 
         tx_query = supabase_admin.table("transactions") \
@@ -1,13 +1,18 @@
 # api/routes/categories.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List
 import sys, os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
 from src.supabase_client import supabase_admin
 from api.auth import get_current_user
+from api.bulk_writes import apply_categories_bulk
+from api.jobs import register_job, submit_job
+from api.keyword_matcher import KeywordMatcher
+from api.query_loader import account_belongs_to_user
 from src.config import CATEGORY_RULES, BUILTIN_CATEGORIES
 
 router = APIRouter()
@@ -26,21 +31,14 @@ class KeywordsUpdate(BaseModel):
 
 class RecategoriseAllRequest(BaseModel):
     account_id: str = "all"
+    dry_run: bool = False
 
 
 def _validate_account_scope(user_id: str, account_id: str) -> str:
     scope = account_id or "all"
     if scope == "all":
         return scope
-    account = (
-        supabase_admin.table("accounts")
-        .select("id")
-        .eq("id", scope)
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not account.data:
+    if not account_belongs_to_user(supabase_admin, user_id, scope):
         raise HTTPException(status_code=400, detail="Invalid account")
     return scope
 
@@ -147,70 +145,116 @@ async def update_keywords(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/categories/recategorise-all")
-async def recategorise_all_transactions(
-    request: RecategoriseAllRequest,
-    user_id: str = Depends(get_current_user)
-):
-    try:
-        account_scope = _validate_account_scope(user_id, request.account_id)
+RECATEGORISE_PAGE_SIZE = 1000
 
-        categories_result = (
-            supabase_admin.table("categories")
-            .select("category, keywords")
-            .eq("user_id", user_id)
-            .execute()
-        )
-        kw_map = _build_keyword_map(categories_result.data or [])
-        if not kw_map:
-            return {"success": True, "scanned": 0, "matched": 0, "changed": 0, "message": "No keywords configured"}
 
-        tx_query = (
+def _fetch_transactions_for_recategorise(user_id: str, account_scope: str) -> List[dict]:
+    rows: List[dict] = []
+    offset = 0
+    while True:
+        query = (
             supabase_admin.table("transactions")
             .select("id, description, category")
             .eq("user_id", user_id)
+            .order("id")
         )
         if account_scope != "all":
-            tx_query = tx_query.eq("account_id", account_scope)
-        tx_rows = tx_query.execute().data or []
-
-        # Prefer longer keywords first to reduce partial-match misclassification.
-        ordered_keywords = sorted(kw_map.items(), key=lambda kv: len(kv[0]), reverse=True)
-
-        scanned = len(tx_rows)
-        matched = 0
-        changed = 0
-
-        for txn in tx_rows:
-            description = str(txn.get("description") or "").lower()
-            target_category = None
-            for keyword, category in ordered_keywords:
-                if keyword in description:
-                    target_category = category
-                    break
-            if not target_category:
-                continue
-
-            matched += 1
-            if txn.get("category") == target_category:
-                continue
-
-            (
-                supabase_admin.table("transactions")
-                .update({"category": target_category})
-                .eq("id", txn["id"])
-                .eq("user_id", user_id)
-                .execute()
-            )
-            changed += 1
+            query = query.eq("account_id", account_scope)
+        page = query.range(offset, offset + RECATEGORISE_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < RECATEGORISE_PAGE_SIZE:
+            return rows
+        offset += RECATEGORISE_PAGE_SIZE
+
+
+def _keyword_diff(tx_rows: List[dict], matcher: KeywordMatcher) -> dict:
+    """In-memory diff of keyword rules against current categories: ``{"matched", "updates"}``."""
+    matched = 0
+    updates: Dict[str, str] = {}
+    for txn in tx_rows:
+        target_category = matcher.match(str(txn.get("description") or "").lower())
+        if not target_category:
+            continue
+        matched += 1
+        if txn.get("category") != target_category:
+            updates[txn["id"]] = target_category
+    return {"matched": matched, "updates": updates}
+
+
+def _recategorise_all(user_id: str, account_scope: str, dry_run: bool) -> dict:
+    categories_result = (
+        supabase_admin.table("categories")
+        .select("category, keywords")
+        .eq("user_id", user_id)
+        .execute()
+    )
+    kw_map = _build_keyword_map(categories_result.data or [])
+    if not kw_map:
+        return {
+            "success": True,
+            "dry_run": dry_run,
+            "scanned": 0,
+            "matched": 0,
+            "changed": 0,
+            "changes_by_category": {},
+            "message": "No keywords configured",
+        }
+
+    tx_rows = _fetch_transactions_for_recategorise(user_id, account_scope)
+    diff = _keyword_diff(tx_rows, KeywordMatcher(kw_map))
+    updates = diff["updates"]
+
+    changes_by_category: Dict[str, int] = {}
+    for category in updates.values():
+        changes_by_category[category] = changes_by_category.get(category, 0) + 1
 
+    if dry_run:
         return {
             "success": True,
-            "scanned": scanned,
-            "matched": matched,
-            "changed": changed,
-            "message": f"Recategorised {changed} transaction(s) from keyword rules",
+            "dry_run": True,
+            "scanned": len(tx_rows),
+            "matched": diff["matched"],
+            "changed": len(updates),
+            "changes_by_category": changes_by_category,
+            "message": f"{len(updates)} transaction(s) would be recategorised from keyword rules",
         }
+
+    changed = apply_categories_bulk(supabase_admin, user_id, updates)["updated"] if updates else 0
+
+    return {
+        "success": True,
+        "dry_run": False,
+        "scanned": len(tx_rows),
+        "matched": diff["matched"],
+        "changed": changed,
+        "changes_by_category": changes_by_category,
+        "message": f"Recategorised {changed} transaction(s) from keyword rules",
+    }
+
+
+def _recategorise_all_job(user_id: str, params: dict, progress) -> dict:
+    return _recategorise_all(user_id, params["account_scope"], params["dry_run"])
+
+
+register_job("categories.recategorise_all", _recategorise_all_job, retryable=True)
+
+
+@router.post("/categories/recategorise-all")
+async def recategorise_all_transactions(
+    request: RecategoriseAllRequest,
+    async_: bool = Query(False, alias="async"),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        account_scope = _validate_account_scope(user_id, request.account_id)
+        if async_:
+            job = submit_job(
+                user_id,
+                "categories.recategorise_all",
+                {"account_scope": account_scope, "dry_run": request.dry_run},
+            )
+            return JSONResponse(status_code=202, content=job)
+        return _recategorise_all(user_id, account_scope, request.dry_run)
     except HTTPException:
         raise
     except Exception as e:
@@ -255,14 +299,12 @@ def apply_user_keywords(transactions: list, user_id: str) -> list:
         if not kw_map:
             return transactions
 
-        ordered_keywords = sorted(kw_map.items(), key=lambda kv: len(kv[0]), reverse=True)
+        matcher = KeywordMatcher(kw_map)
         for txn in transactions:
             if txn.get("category", "Uncategorized") == "Uncategorized":
-                desc_lower = str(txn.get("description", "")).lower()
-                for kw_lower, cat in ordered_keywords:
-                    if kw_lower in desc_lower:
-                        txn["category"] = cat
-                        break
+                category = matcher.match(str(txn.get("description", "")).lower())
+                if category:
+                    txn["category"] = category
 
         return transactions
 
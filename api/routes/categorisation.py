@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from api.auth import get_current_user
+from api.bulk_writes import IN_FILTER_CHUNK_SIZE, CategoryWriteSet, chunked
 from api.dependencies import get_groq_service
-from api.groq_service import GroqService
+from api.groq_service import LOCAL_MODEL_NAME, GroqService
+from api.jobs import register_job, submit_job
+from api.query_loader import account_belongs_to_user, invalidate, load_many, request_scope
 from api.routes.categories import apply_user_keywords
 from api.transfer_rules import apply_transfer_classification
 from src.config import BUILTIN_CATEGORIES, CATEGORY_RULES
+from src.merchants import vendor_key
 from src.supabase_client import supabase_admin
 
 router = APIRouter()
@@ -52,16 +59,7 @@ def _validate_account_scope(user_id: str, account_id: str) -> str:
     scope = account_id or "all"
     if scope == "all":
         return scope
-
-    account = (
-        supabase_admin.table("accounts")
-        .select("id")
-        .eq("id", scope)
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not account.data:
+    if not account_belongs_to_user(supabase_admin, user_id, scope):
         raise HTTPException(status_code=400, detail="Invalid account")
     return scope
 
@@ -126,10 +124,12 @@ def _fetch_uncategorised_transactions(user_id: str, account_scope: str) -> List[
     return result.data or []
 
 
+def _learning_eligible(description: str, category: str, confidence: float) -> bool:
+    return bool(description) and bool(category) and category != "Uncategorized" and confidence >= 70
+
+
 def _save_learning_if_eligible(user_id: str, description: str, category: str, confidence: float) -> None:
-    if not description or not category or category == "Uncategorized":
-        return
-    if confidence < 70:
+    if not _learning_eligible(description, category, confidence):
         return
     try:
         supabase_admin.table("learned_rules").upsert(
@@ -144,6 +144,7 @@ def _save_learning_if_eligible(user_id: str, description: str, category: str, co
         supabase_admin.table("vendor_categories").upsert(
             {
                 "vendor_name": description,
+                "vendor_key": vendor_key(description),
                 "category": category,
                 "updated_at": _now_iso(),
             },
@@ -173,6 +174,7 @@ def _apply_builtin_keyword_rules(transactions: List[Dict[str, Any]]) -> List[Dic
 
 def _apply_transaction_category(user_id: str, transaction_id: str, category: str) -> None:
     supabase_admin.table("transactions").update({"category": category}).eq("id", transaction_id).eq("user_id", user_id).execute()
+    invalidate(("transaction", user_id))
 
 
 def _insert_suggestions(rows: List[Dict[str, Any]]) -> None:
@@ -181,6 +183,20 @@ def _insert_suggestions(rows: List[Dict[str, Any]]) -> None:
     supabase_admin.table("categorisation_suggestions").insert(rows).execute()
 
 
+def _load_transactions_by_id(user_id: str, transaction_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    def fetch_many(missing: List[str]) -> Dict[str, Dict[str, Any]]:
+        rows = (
+            supabase_admin.table("transactions")
+            .select("id,description,amount,date,category,account_id")
+            .in_("id", missing)
+            .eq("user_id", user_id)
+            .execute()
+        ).data or []
+        return {row["id"]: row for row in rows}
+
+    return load_many(("transaction", user_id), transaction_ids, fetch_many)
+
+
 def _fetch_pending_suggestions(user_id: str, account_scope: str, limit: int = 200) -> List[Dict[str, Any]]:
     query = (
         supabase_admin.table("categorisation_suggestions")
@@ -197,14 +213,7 @@ def _fetch_pending_suggestions(user_id: str, account_scope: str, limit: int = 20
         return []
 
     transaction_ids = [row["transaction_id"] for row in suggestions if row.get("transaction_id")]
-    tx_result = (
-        supabase_admin.table("transactions")
-        .select("id,description,amount,date,category,account_id")
-        .in_("id", transaction_ids)
-        .eq("user_id", user_id)
-        .execute()
-    )
-    tx_map = {row["id"]: row for row in (tx_result.data or [])}
+    tx_map = _load_transactions_by_id(user_id, transaction_ids)
 
     merged = []
     for suggestion in suggestions:
@@ -218,18 +227,45 @@ def _fetch_pending_suggestions(user_id: str, account_scope: str, limit: int = 20
     return merged
 
 
-@router.post("/categorise/suggest")
-async def suggest_categories(
+def _review_item(row: Dict[str, Any], txn: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "suggestion": row,
+        "transaction": {
+            "id": txn.get("id"),
+            "description": txn.get("description"),
+            "amount": txn.get("amount"),
+            "date": txn.get("date"),
+            "account_id": txn.get("account_id"),
+        },
+    }
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _run_suggest(
+    user_id: str,
+    account_scope: str,
     request: SuggestRequest,
-    user_id: str = Depends(get_current_user),
-    groq: GroqService = Depends(get_groq_service),
-):
-    account_scope = _validate_account_scope(user_id, request.account_id)
+    groq: GroqService,
+    emit: Optional[Callable[[str, Any], None]] = None,
+) -> Dict[str, Any]:
+    """One suggestion run; shared by the JSON and the streaming endpoint.
+
+    With ``emit`` the run reports each stage as it completes -- ``started``,
+    ``rules`` (pre-pass rows), ``suggestions`` (one event per model chunk,
+    with how many of its rows are staged for auto-apply) and ``applied``
+    (counts after the bulk write) -- and requests chunk callbacks from
+    ``suggest_transaction_categories``.
+    """
     threshold = float(request.threshold)
     run_id = str(uuid4())
     started_at = datetime.utcnow()
 
     uncategorised = _fetch_uncategorised_transactions(user_id, account_scope)
+    if emit is not None:
+        emit("started", {"run_id": run_id, "uncategorised_total": len(uncategorised)})
     if not uncategorised:
         return {
             "run_id": run_id,
@@ -254,99 +290,143 @@ async def suggest_categories(
     needs_review_items: List[Dict[str, Any]] = []
     tx_by_id = {t["id"]: t for t in uncategorised}
 
+    # Category changes and learning writes are buffered for the whole run and
+    # flushed in bulk before the suggestion rows are inserted.
+    writes = CategoryWriteSet(supabase_admin, user_id)
+
     for txn in uncategorised:
         if txn.get("category") != "Uncategorized":
             # Rule-based direct resolution: treat as high-confidence auto apply.
-            try:
-                _apply_transaction_category(user_id, txn["id"], txn["category"])
-                auto_applied += 1
-                _save_learning_if_eligible(user_id, txn.get("description", ""), txn["category"], 100)
-                suggestion_rows.append(
-                    {
-                        "run_id": run_id,
-                        "user_id": user_id,
-                        "account_id": txn.get("account_id"),
-                        "transaction_id": txn["id"],
-                        "suggested_category": txn["category"],
-                        "final_category": txn["category"],
-                        "confidence": 100,
-                        "reason": "Matched user keyword/transfer rule",
-                        "status": "auto_applied",
-                        "model_name": "rules",
-                        "updated_at": _now_iso(),
-                    }
-                )
-            except Exception as e:
-                failed += 1
-                logger.warning("rule auto-apply failed for txn=%s: %r", txn.get("id"), e)
+            description = txn.get("description", "")
+            writes.stage(
+                txn["id"],
+                txn["category"],
+                description,
+                learn=_learning_eligible(description, txn["category"], 100),
+            )
+            suggestion_rows.append(
+                {
+                    "run_id": run_id,
+                    "user_id": user_id,
+                    "account_id": txn.get("account_id"),
+                    "transaction_id": txn["id"],
+                    "suggested_category": txn["category"],
+                    "final_category": txn["category"],
+                    "confidence": 100,
+                    "reason": "Matched user keyword/transfer rule",
+                    "status": "auto_applied",
+                    "model_name": "rules",
+                    "updated_at": _now_iso(),
+                }
+            )
 
-    to_model = [t for t in uncategorised if t.get("category") == "Uncategorized"]
-    ai_suggestions: List[Dict[str, Any]] = []
-    if to_model:
-        ai_suggestions = groq.suggest_transaction_categories(to_model, available_categories)
+    if emit is not None:
+        emit(
+            "rules",
+            {
+                "run_id": run_id,
+                "auto_applied": len(suggestion_rows),
+                "items": [_review_item(row, tx_by_id[row["transaction_id"]]) for row in suggestion_rows],
+            },
+        )
 
     auto_apply_remaining = AUTO_APPLY_CAP
-    for suggestion in ai_suggestions:
-        tx_id = suggestion.get("transaction_id")
-        txn = tx_by_id.get(tx_id)
-        if not txn:
-            continue
 
-        suggested_category = suggestion.get("suggested_category") or "Uncategorized"
-        confidence = float(suggestion.get("confidence") or 0)
-        reason = suggestion.get("reason") or ""
+    def handle_suggestions(ai_suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        nonlocal auto_apply_remaining
+        rows = []
+        for suggestion in ai_suggestions:
+            tx_id = suggestion.get("transaction_id")
+            txn = tx_by_id.get(tx_id)
+            if not txn:
+                continue
 
-        should_auto_apply = (
-            suggested_category != "Uncategorized"
-            and confidence >= threshold
-            and not _is_sensitive(txn.get("description", ""), suggested_category)
-            and auto_apply_remaining > 0
-        )
+            suggested_category = suggestion.get("suggested_category") or "Uncategorized"
+            confidence = float(suggestion.get("confidence") or 0)
+            reason = suggestion.get("reason") or ""
 
-        status = "pending"
-        final_category = None
+            should_auto_apply = (
+                suggested_category != "Uncategorized"
+                and confidence >= threshold
+                and not _is_sensitive(txn.get("description", ""), suggested_category)
+                and auto_apply_remaining > 0
+            )
 
-        if should_auto_apply:
-            try:
-                _apply_transaction_category(user_id, tx_id, suggested_category)
-                _save_learning_if_eligible(user_id, txn.get("description", ""), suggested_category, confidence)
-                auto_applied += 1
+            status = "pending"
+            final_category = None
+
+            if should_auto_apply:
+                description = txn.get("description", "")
+                writes.stage(
+                    tx_id,
+                    suggested_category,
+                    description,
+                    # Local-model guesses are applied but never learned: learning them
+                    # would feed the model its own output as ground truth.
+                    learn=suggestion.get("model_name") != LOCAL_MODEL_NAME
+                    and _learning_eligible(description, suggested_category, confidence),
+                )
                 auto_apply_remaining -= 1
                 status = "auto_applied"
                 final_category = suggested_category
-            except Exception as e:
-                failed += 1
-                logger.warning("ai auto-apply failed for txn=%s: %r", tx_id, e)
 
-        row = {
-            "run_id": run_id,
-            "user_id": user_id,
-            "account_id": txn.get("account_id"),
-            "transaction_id": tx_id,
-            "suggested_category": suggested_category,
-            "final_category": final_category,
-            "confidence": max(0.0, min(100.0, confidence)),
-            "reason": reason,
-            "status": status,
-            "model_name": suggestion.get("model_name") or "groq",
-            "updated_at": _now_iso(),
-        }
-        suggestion_rows.append(row)
+            row = {
+                "run_id": run_id,
+                "user_id": user_id,
+                "account_id": txn.get("account_id"),
+                "transaction_id": tx_id,
+                "suggested_category": suggested_category,
+                "final_category": final_category,
+                "confidence": max(0.0, min(100.0, confidence)),
+                "reason": reason,
+                "status": status,
+                "model_name": suggestion.get("model_name") or "groq",
+                "updated_at": _now_iso(),
+            }
+            rows.append(row)
+        suggestion_rows.extend(rows)
+        return rows
 
-        if status == "pending":
-            needs_review_items.append(
+    to_model = [t for t in uncategorised if t.get("category") == "Uncategorized"]
+    if to_model and emit is not None:
+        def on_chunk(batch: List[Dict[str, Any]]) -> None:
+            rows = handle_suggestions(batch)
+            emit(
+                "suggestions",
                 {
-                    "suggestion": row,
-                    "transaction": {
-                        "id": txn.get("id"),
-                        "description": txn.get("description"),
-                        "amount": txn.get("amount"),
-                        "date": txn.get("date"),
-                        "account_id": txn.get("account_id"),
-                    },
-                }
+                    "run_id": run_id,
+                    "auto_apply_staged": sum(1 for row in rows if row["status"] == "auto_applied"),
+                    "items": [_review_item(row, tx_by_id[row["transaction_id"]]) for row in rows],
+                },
             )
 
+        groq.suggest_transaction_categories(to_model, available_categories, on_chunk=on_chunk, user_id=user_id)
+    elif to_model:
+        handle_suggestions(groq.suggest_transaction_categories(to_model, available_categories, user_id=user_id))
+
+    write_result = writes.flush(_now_iso())
+    invalidate(("transaction", user_id))
+    failed_ids = set(write_result["failed_ids"])
+    if failed_ids:
+        failed = len(failed_ids)
+        logger.warning("auto-apply failed for %s transaction(s) run_id=%s", failed, run_id)
+        kept_rows = []
+        for row in suggestion_rows:
+            if row["transaction_id"] not in failed_ids:
+                kept_rows.append(row)
+            elif row["model_name"] != "rules":
+                # AI suggestion whose write failed stays reviewable.
+                kept_rows.append({**row, "status": "pending", "final_category": None})
+        suggestion_rows = kept_rows
+    auto_applied = write_result["updated"]
+    if emit is not None:
+        emit("applied", {"run_id": run_id, "auto_applied": auto_applied, "failed": failed})
+
+    for row in suggestion_rows:
+        if row["status"] != "pending":
+            continue
+        needs_review_items.append(_review_item(row, tx_by_id[row["transaction_id"]]))
+
     _insert_suggestions(suggestion_rows)
 
     duration_ms = int((datetime.utcnow() - started_at).total_seconds() * 1000)
@@ -381,6 +461,94 @@ async def suggest_categories(
     }
 
 
+def _suggest_job(user_id: str, params: Dict[str, Any], progress: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    counts = {"stage": "started", "uncategorised_total": 0, "suggested": 0}
+
+    def emit(event: str, data: Any) -> None:
+        counts["stage"] = event
+        if event == "started":
+            counts["uncategorised_total"] = data["uncategorised_total"]
+        elif event in ("rules", "suggestions"):
+            counts["suggested"] += len(data["items"])
+        progress(dict(counts, final=event == "applied"))
+
+    request = SuggestRequest(account_id=params["account_scope"], threshold=params["threshold"])
+    result = _run_suggest(user_id, params["account_scope"], request, get_groq_service(), emit)
+    # The review queue holds the items; the job result keeps the summary only.
+    return {key: value for key, value in result.items() if key != "needs_review_items"}
+
+
+# Not retryable: a rerun would call Groq again, auto-apply again and insert a
+# second set of suggestions under a new run id.
+register_job("categorisation.suggest", _suggest_job)
+
+
+@router.post("/categorise/suggest")
+async def suggest_categories(
+    request: SuggestRequest,
+    async_: bool = Query(False, alias="async"),
+    user_id: str = Depends(get_current_user),
+    groq: GroqService = Depends(get_groq_service),
+):
+    account_scope = _validate_account_scope(user_id, request.account_id)
+    if async_:
+        job = submit_job(
+            user_id,
+            "categorisation.suggest",
+            {"account_scope": account_scope, "threshold": request.threshold},
+        )
+        return JSONResponse(status_code=202, content=job)
+    return _run_suggest(user_id, account_scope, request, groq)
+
+
+@router.post("/categorise/suggest/stream")
+async def suggest_categories_stream(
+    request: SuggestRequest,
+    user_id: str = Depends(get_current_user),
+    groq: GroqService = Depends(get_groq_service),
+):
+    """Same run as ``/categorise/suggest``, reported as server-sent events.
+
+    Events: ``started``, ``rules``, ``suggestions`` (per model chunk),
+    ``applied``, then ``complete`` with the JSON endpoint's response body, or
+    ``error``.
+    """
+    account_scope = _validate_account_scope(user_id, request.account_id)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: Optional[str], data: Any) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def run() -> None:
+        try:
+            with request_scope():
+                emit("complete", _run_suggest(user_id, account_scope, request, groq, emit))
+        except Exception as e:
+            logger.exception("categorise_suggest_stream_failed user_id=%s: %r", user_id, e)
+            emit("error", {"detail": "Categorisation failed"})
+        finally:
+            emit(None, None)
+
+    async def events():
+        worker = asyncio.create_task(asyncio.to_thread(run))
+        try:
+            while True:
+                event, data = await queue.get()
+                if event is None:
+                    break
+                yield _sse(event, data)
+        finally:
+            # A disconnected client does not cancel the run: its writes still land.
+            await asyncio.shield(worker)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/categorise/review-queue")
 async def get_review_queue(
     account_id: str = "all",
@@ -392,6 +560,55 @@ async def get_review_queue(
     return {"items": items, "count": len(items)}
 
 
+def _approve_in_bulk(user_id: str, approvals: List[tuple]) -> Dict[str, int]:
+    """Approve ``(suggestion, transaction)`` pairs with set-based writes.
+
+    Category changes and learning go through one ``CategoryWriteSet`` flush;
+    suggestion statuses are then updated with one ``in_`` update per final
+    category. Suggestions whose transaction update failed stay pending.
+    """
+    if not approvals:
+        return {"changed": 0, "round_trips": 0}
+
+    writes = CategoryWriteSet(supabase_admin, user_id)
+    for suggestion, tx in approvals:
+        final_category = suggestion.get("suggested_category") or "Uncategorized"
+        description = tx.get("description", "")
+        confidence = float(suggestion.get("confidence") or 0)
+        writes.stage(tx["id"], final_category, description, learn=_learning_eligible(description, final_category, confidence))
+    write_result = writes.flush(_now_iso())
+    invalidate(("transaction", user_id))
+    failed_ids = set(write_result["failed_ids"])
+
+    suggestion_ids_by_category: Dict[str, List[str]] = {}
+    for suggestion, tx in approvals:
+        if tx["id"] in failed_ids:
+            continue
+        final_category = suggestion.get("suggested_category") or "Uncategorized"
+        suggestion_ids_by_category.setdefault(final_category, []).append(suggestion["id"])
+
+    round_trips = write_result["round_trips"]
+    changed = 0
+    updated_at = _now_iso()
+    for final_category, ids in suggestion_ids_by_category.items():
+        for chunk in chunked(ids, IN_FILTER_CHUNK_SIZE):
+            round_trips += 1
+            (
+                supabase_admin.table("categorisation_suggestions")
+                .update({
+                    "status": "approved",
+                    "final_category": final_category,
+                    "updated_at": updated_at,
+                })
+                .in_("id", chunk)
+                .eq("user_id", user_id)
+                .execute()
+            )
+            changed += len(chunk)
+
+    return {"changed": changed, "round_trips": round_trips}
+
+
 @router.post("/categorise/approve")
 async def approve_suggestions(request: ApproveRequest, user_id: str = Depends(get_current_user)):
     suggestion_ids = [sid for sid in request.suggestion_ids if sid]
@@ -406,39 +623,25 @@ async def approve_suggestions(request: ApproveRequest, user_id: str = Depends(ge
         .execute()
     ).data or []
 
-    changed = 0
-    for suggestion in suggestions:
-        if suggestion.get("status") != "pending":
-            continue
-        tx_result = (
-            supabase_admin.table("transactions")
-            .select("id,description")
-            .eq("id", suggestion["transaction_id"])
-            .eq("user_id", user_id)
-            .limit(1)
-            .execute()
-        )
-        if not tx_result.data:
-            continue
-        tx = tx_result.data[0]
-        final_category = suggestion.get("suggested_category") or "Uncategorized"
-        _apply_transaction_category(user_id, tx["id"], final_category)
-        _save_learning_if_eligible(user_id, tx.get("description", ""), final_category, float(suggestion.get("confidence") or 0))
-        (
-            supabase_admin.table("categorisation_suggestions")
-            .update({
-                "status": "approved",
-                "final_category": final_category,
-                "updated_at": _now_iso(),
-            })
-            .eq("id", suggestion["id"])
-            .eq("user_id", user_id)
-            .execute()
-        )
-        changed += 1
+    pending = [row for row in suggestions if row.get("status") == "pending" and row.get("transaction_id")]
+    tx_map = _load_transactions_by_id(user_id, [row["transaction_id"] for row in pending])
+    approvals = [(row, tx_map[row["transaction_id"]]) for row in pending if row["transaction_id"] in tx_map]
+    result = _approve_in_bulk(user_id, approvals)
+    round_trips = 1 + (1 if pending else 0) + result["round_trips"]
 
-    _log_event(user_id, None, None, "categorise_approve", {"requested": len(suggestion_ids), "changed": changed})
-    return {"success": True, "requested": len(suggestion_ids), "changed": changed}
+    _log_event(
+        user_id,
+        None,
+        None,
+        "categorise_approve",
+        {"requested": len(suggestion_ids), "changed": result["changed"], "round_trips": round_trips},
+    )
+    return {
+        "success": True,
+        "requested": len(suggestion_ids),
+        "changed": result["changed"],
+        "round_trips": round_trips,
+    }
 
 
 @router.post("/categorise/override")
@@ -527,44 +730,25 @@ async def accept_high_confidence(
         query = query.eq("account_id", account_scope)
     candidates = query.execute().data or []
 
-    changed = 0
+    tx_map = _load_transactions_by_id(user_id, [row["transaction_id"] for row in candidates if row.get("transaction_id")])
+    approvals = []
     for suggestion in candidates:
-        tx_result = (
-            supabase_admin.table("transactions")
-            .select("id,description")
-            .eq("id", suggestion["transaction_id"])
-            .eq("user_id", user_id)
-            .limit(1)
-            .execute()
-        )
-        if not tx_result.data:
+        tx = tx_map.get(suggestion.get("transaction_id"))
+        if not tx:
             continue
-        tx = tx_result.data[0]
         if _is_sensitive(tx.get("description", ""), suggestion.get("suggested_category", "")):
             continue
-
-        final_category = suggestion.get("suggested_category") or "Uncategorized"
-        _apply_transaction_category(user_id, tx["id"], final_category)
-        _save_learning_if_eligible(user_id, tx.get("description", ""), final_category, float(suggestion.get("confidence") or 0))
-        (
-            supabase_admin.table("categorisation_suggestions")
-            .update({
-                "status": "approved",
-                "final_category": final_category,
-                "updated_at": _now_iso(),
-            })
-            .eq("id", suggestion["id"])
-            .eq("user_id", user_id)
-            .execute()
-        )
-        changed += 1
+        approvals.append((suggestion, tx))
+    result = _approve_in_bulk(user_id, approvals)
+    changed = result["changed"]
+    round_trips = 1 + (1 if candidates else 0) + result["round_trips"]
 
     _log_event(
         user_id,
         None if account_scope == "all" else account_scope,
         None,
         "categorise_accept_high_confidence",
-        {"threshold": threshold, "candidate_count": len(candidates), "changed": changed},
+        {"threshold": threshold, "candidate_count": len(candidates), "changed": changed, "round_trips": round_trips},
     )
 
     return {
@@ -572,4 +756,5 @@ async def accept_high_confidence(
         "threshold": threshold,
         "candidate_count": len(candidates),
         "changed": changed,
+        "round_trips": round_trips,
     }
@@ -0,0 +1,26 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from api.auth import get_current_user
+from api.jobs import get_job, list_jobs
+
+router = APIRouter()
+
+
+@router.get("/jobs")
+async def get_jobs(
+    status: Optional[Literal["queued", "running", "succeeded", "failed"]] = None,
+    limit: int = 20,
+    user_id: str = Depends(get_current_user),
+):
+    items = list_jobs(user_id, status=status, limit=limit)
+    return {"items": items, "count": len(items)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, user_id: str = Depends(get_current_user)):
+    job = get_job(user_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job": job}
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-import re
+from bisect import bisect_right, insort
 from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta
+from math import sqrt
 from statistics import mean, pstdev
 from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
 from api.auth import get_current_user
+from api.jobs import register_job, submit_job
+from api.query_loader import account_belongs_to_user
+from api.recurring_engine import score_groups
+from src.merchants import clean_display_name, normalise_merchant
+from src.merchants import merchant_key as merchant_key_for
 from src.supabase_client import supabase_admin
 
 router = APIRouter()
@@ -19,6 +26,12 @@ _CADENCE_DAYS = {
     "biweekly": 14,
     "monthly": 30,
 }
+# Bounded per-merchant date window kept in recurring_merchant_stats.recent_dates.
+_RECENT_DATES_LIMIT = 60
+_DISPLAY_NAMES_LIMIT = 10
+_DEFAULT_MIN_OCCURRENCES = 2
+# History read to seed stats for merchants that have no baseline row yet.
+_SEED_LOOKBACK_MONTHS = 12
 
 
 class RecomputeRequest(BaseModel):
@@ -47,15 +60,7 @@ def _validate_account_scope(user_id: str, account_id: str) -> str:
     scope = account_id or "all"
     if scope == "all":
         return scope
-    account = (
-        supabase_admin.table("accounts")
-        .select("id")
-        .eq("id", scope)
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not account.data:
+    if not account_belongs_to_user(supabase_admin, user_id, scope):
         raise HTTPException(status_code=400, detail="Invalid account")
     return scope
 
@@ -66,36 +71,6 @@ def _parse_date(value: str | date) -> date:
     return datetime.strptime(str(value), "%Y-%m-%d").date()
 
 
-def _clean_display_name(description: str) -> str:
-    if not description:
-        return "Unknown"
-    text = str(description).replace("\r", "\n")
-    first_line = next((line.strip() for line in text.split("\n") if line.strip()), "")
-    cleaned = first_line or text.strip()
-    cleaned = re.sub(r"\s*\|\s*.*$", "", cleaned)
-    cleaned = re.sub(
-        r"\b(Purchase|Payment|Direct Debit|Standing Order|Card Purchase|Card Payment)\b",
-        "",
-        cleaned,
-        flags=re.IGNORECASE,
-    )
-    cleaned = re.sub(r"^(from|to)\s+", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\b(chase|jpmcb|jpmorgan|jpmcb)\b", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\s*-\s*[0-9]{2,}.*$", "", cleaned)
-    cleaned = re.sub(r"\bref(erence)?\b.*$", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\b[0-9]{4,}\b", "", cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip(" -")
-    return cleaned or first_line or "Unknown"
-
-
-def _merchant_key(display_name: str) -> str:
-    key = re.sub(r"[^a-zA-Z0-9 ]", " ", display_name.lower())
-    key = re.sub(r"\b(from|to|payment|purchase|direct|debit|standing|order)\b", " ", key)
-    key = re.sub(r"\b[0-9]{2,}\b", " ", key)
-    key = re.sub(r"\s+", " ", key).strip()
-    return key[:120] or "unknown"
-
-
 def _default_account_id(user_id: str) -> Optional[str]:
     rows = (
         supabase_admin.table("accounts")
@@ -127,7 +102,7 @@ async def create_recurring_rule(request: CreateRecurringRequest, user_id: str =
         raise HTTPException(status_code=400, detail="Invalid status")
 
     display_name = request.display_name.strip()
-    merchant_key = _merchant_key(display_name)
+    merchant_key = merchant_key_for(display_name)
     if not merchant_key:
         raise HTTPException(status_code=400, detail="display_name is invalid")
 
@@ -175,28 +150,30 @@ def _classify_cadence(sorted_dates: List[date]) -> Tuple[str, Optional[int]]:
     return "irregular", None
 
 
-def _confidence_score(dates: List[date], amounts: List[float], cadence_days: Optional[int]) -> float:
-    occ = len(dates)
+def _confidence_from_parts(
+    occ: int,
+    intervals: List[int],
+    interval_std: float,
+    cadence_days: Optional[int],
+    amount_count: int,
+    amount_mean: float,
+    amount_std: float,
+) -> float:
     if occ == 0:
         return 0.0
 
     occ_score = min(35.0, occ * 4.5)
 
-    intervals = []
-    if len(dates) >= 2:
-        intervals = [(dates[idx] - dates[idx - 1]).days for idx in range(1, len(dates))]
-
     if cadence_days and intervals:
         mean_dev = mean(abs(i - cadence_days) for i in intervals)
         interval_score = max(0.0, 35.0 - mean_dev * 3.0)
     elif intervals:
-        interval_score = max(0.0, 18.0 - pstdev(intervals) * 2.5)
+        interval_score = max(0.0, 18.0 - interval_std * 2.5)
     else:
         interval_score = 5.0
 
-    abs_amounts = [abs(a) for a in amounts if a is not None]
-    if len(abs_amounts) >= 2 and mean(abs_amounts) > 0:
-        cv = pstdev(abs_amounts) / mean(abs_amounts)
+    if amount_count >= 2 and amount_mean > 0:
+        cv = amount_std / amount_mean
         if cv <= 0.15:
             amount_score = 25.0
         elif cv <= 0.35:
@@ -210,6 +187,306 @@ def _confidence_score(dates: List[date], amounts: List[float], cadence_days: Opt
     return round(max(5.0, min(99.0, score)), 1)
 
 
+def _confidence_score(dates: List[date], amounts: List[float], cadence_days: Optional[int]) -> float:
+    intervals = []
+    if len(dates) >= 2:
+        intervals = [(dates[idx] - dates[idx - 1]).days for idx in range(1, len(dates))]
+
+    abs_amounts = [abs(a) for a in amounts if a is not None]
+    amount_mean = mean(abs_amounts) if abs_amounts else 0.0
+    amount_std = pstdev(abs_amounts) if len(abs_amounts) >= 2 else 0.0
+
+    return _confidence_from_parts(
+        len(dates),
+        intervals,
+        pstdev(intervals) if intervals else 0.0,
+        cadence_days,
+        len(abs_amounts),
+        amount_mean,
+        amount_std,
+    )
+
+
+def _empty_stats(
+    user_id: str,
+    account_id: str,
+    merchant_key: str,
+    min_occurrences: int = _DEFAULT_MIN_OCCURRENCES,
+) -> dict:
+    return {
+        "user_id": user_id,
+        "account_id": account_id,
+        "merchant_key": merchant_key,
+        "min_occurrences": min_occurrences,
+        "occurrence_count": 0,
+        "amount_abs_sum": 0.0,
+        "amount_sq_sum": 0.0,
+        "first_seen_date": None,
+        "last_seen_date": None,
+        "recent_dates": [],
+        "interval_count": 0,
+        "interval_sum": 0,
+        "interval_sq_sum": 0,
+        "display_name_counts": {},
+        "category_counts": {},
+    }
+
+
+def _merge_into_stats(stats: dict, items: List[dict]) -> dict:
+    """Fold transactions into per-merchant sufficient statistics.
+
+    Counts and amount sums are order independent. Interval sums are kept exact
+    for appends, prepends and late rows that land inside ``recent_dates``;
+    late rows older than that window only update counts and amounts.
+    """
+    merged = {
+        **stats,
+        "display_name_counts": dict(stats.get("display_name_counts") or {}),
+        "category_counts": dict(stats.get("category_counts") or {}),
+    }
+    recent = sorted(_parse_date(d) for d in (stats.get("recent_dates") or []))
+    first = _parse_date(stats["first_seen_date"]) if stats.get("first_seen_date") else None
+    last = _parse_date(stats["last_seen_date"]) if stats.get("last_seen_date") else None
+    interval_count = int(stats.get("interval_count") or 0)
+    interval_sum = int(stats.get("interval_sum") or 0)
+    interval_sq_sum = int(stats.get("interval_sq_sum") or 0)
+
+    def add_interval(days: int, sign: int = 1) -> None:
+        nonlocal interval_count, interval_sum, interval_sq_sum
+        interval_count += sign
+        interval_sum += sign * days
+        interval_sq_sum += sign * days * days
+
+    for item in sorted(items, key=lambda row: str(row.get("date"))):
+        txn_date = _parse_date(item["date"])
+        amount = abs(float(item.get("amount") or 0))
+        merged["occurrence_count"] = int(merged.get("occurrence_count") or 0) + 1
+        merged["amount_abs_sum"] = float(merged.get("amount_abs_sum") or 0) + amount
+        merged["amount_sq_sum"] = float(merged.get("amount_sq_sum") or 0) + amount * amount
+
+        display_name = item.get("_display_name") or clean_display_name(item.get("description", ""))
+        merged["display_name_counts"][display_name] = merged["display_name_counts"].get(display_name, 0) + 1
+        category = item.get("category") or "Uncategorized"
+        merged["category_counts"][category] = merged["category_counts"].get(category, 0) + 1
+
+        if last is None:
+            first = last = txn_date
+        elif txn_date >= last:
+            add_interval((txn_date - last).days)
+            last = txn_date
+        elif txn_date <= first:
+            add_interval((first - txn_date).days)
+            first = txn_date
+        elif recent and txn_date >= recent[0]:
+            # bisect_right keeps pos >= 1 when txn_date equals recent[0].
+            pos = bisect_right(recent, txn_date)
+            before, after = recent[pos - 1], recent[pos]
+            add_interval((after - before).days, sign=-1)
+            add_interval((txn_date - before).days)
+            add_interval((after - txn_date).days)
+
+        if not recent or txn_date >= recent[0] or len(recent) < _RECENT_DATES_LIMIT:
+            insort(recent, txn_date)
+            del recent[:-_RECENT_DATES_LIMIT]
+
+    top_names = sorted(merged["display_name_counts"].items(), key=lambda kv: kv[1], reverse=True)
+    merged["display_name_counts"] = dict(top_names[:_DISPLAY_NAMES_LIMIT])
+    merged["first_seen_date"] = first.isoformat() if first else None
+    merged["last_seen_date"] = last.isoformat() if last else None
+    merged["recent_dates"] = [d.isoformat() for d in recent]
+    merged["interval_count"] = interval_count
+    merged["interval_sum"] = interval_sum
+    merged["interval_sq_sum"] = interval_sq_sum
+    merged["updated_at"] = datetime.utcnow().isoformat()
+    return merged
+
+
+def _rule_from_stats(user_id: str, stats: dict, status: str) -> dict:
+    dates = sorted(_parse_date(d) for d in (stats.get("recent_dates") or []))
+    cadence, cadence_days = _classify_cadence(dates)
+    intervals = [(dates[idx] - dates[idx - 1]).days for idx in range(1, len(dates))]
+
+    occurrences = int(stats.get("occurrence_count") or 0)
+    amount_mean = float(stats.get("amount_abs_sum") or 0) / occurrences if occurrences else 0.0
+    amount_var = float(stats.get("amount_sq_sum") or 0) / occurrences - amount_mean ** 2 if occurrences else 0.0
+    interval_count = int(stats.get("interval_count") or 0)
+    interval_mean = int(stats.get("interval_sum") or 0) / interval_count if interval_count else 0.0
+    interval_var = int(stats.get("interval_sq_sum") or 0) / interval_count - interval_mean ** 2 if interval_count else 0.0
+
+    confidence = _confidence_from_parts(
+        occurrences,
+        intervals,
+        sqrt(max(0.0, interval_var)),
+        cadence_days,
+        occurrences,
+        amount_mean,
+        sqrt(max(0.0, amount_var)),
+    )
+
+    last_seen = _parse_date(stats["last_seen_date"]) if stats.get("last_seen_date") else None
+    next_expected = last_seen + timedelta(days=cadence_days) if (cadence_days and last_seen) else None
+
+    display_counts = stats.get("display_name_counts") or {}
+    category_counts = stats.get("category_counts") or {}
+    named_categories = {k: v for k, v in category_counts.items() if k != "Uncategorized"} or category_counts
+
+    return {
+        "user_id": user_id,
+        "account_id": stats["account_id"],
+        "merchant_key": stats["merchant_key"],
+        "display_name": max(display_counts.items(), key=lambda kv: kv[1])[0] if display_counts else "Unknown",
+        "category": max(named_categories.items(), key=lambda kv: kv[1])[0] if named_categories else "Uncategorized",
+        "cadence": cadence,
+        "average_amount": round(amount_mean, 2),
+        "confidence": confidence,
+        "occurrence_count": occurrences,
+        "last_seen_date": last_seen.isoformat() if last_seen else None,
+        "next_expected_date": next_expected.isoformat() if next_expected else None,
+        "status": status,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _group_by_merchant(txns: List[dict], fallback_account_id: Optional[str]) -> Dict[Tuple[str, str], List[dict]]:
+    grouped: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+    for txn in txns:
+        if txn.get("category") == "Transfer":
+            continue
+        account_id = txn.get("account_id") or fallback_account_id
+        if not account_id:
+            continue
+        display_name, key = normalise_merchant(str(txn.get("description") or ""))
+        grouped[(account_id, key)].append({**txn, "account_id": account_id, "_display_name": display_name})
+    return grouped
+
+
+def _user_min_occurrences(user_id: str, stats_rows: List[dict]) -> int:
+    """Threshold the user last recomputed with (stored on their stats rows)."""
+    for row in stats_rows:
+        if row.get("min_occurrences"):
+            return int(row["min_occurrences"])
+    latest = (
+        supabase_admin.table("recurring_merchant_stats")
+        .select("min_occurrences")
+        .eq("user_id", user_id)
+        .order("updated_at", desc=True)
+        .limit(1)
+        .execute()
+    ).data or []
+    if latest and latest[0].get("min_occurrences"):
+        return int(latest[0]["min_occurrences"])
+    return _DEFAULT_MIN_OCCURRENCES
+
+
+def _seed_history(user_id: str, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[dict]]:
+    """Bounded history for ruled merchant keys without a stats baseline, grouped like uploads."""
+    account_ids = sorted({account_id for account_id, _ in keys})
+    lookback_start = date.today() - timedelta(days=_SEED_LOOKBACK_MONTHS * 31)
+    rows = (
+        supabase_admin.table("transactions")
+        .select("id,account_id,date,description,amount,category")
+        .eq("user_id", user_id)
+        .in_("account_id", account_ids)
+        .lt("amount", 0)
+        .gte("date", lookback_start.isoformat())
+        .order("date", desc=False)
+        .execute()
+    ).data or []
+    wanted = set(keys)
+    return {
+        group_key: items
+        for group_key, items in _group_by_merchant(rows, fallback_account_id=None).items()
+        if group_key in wanted
+    }
+
+
+def update_recurring_from_transactions(
+    user_id: str,
+    transactions: List[dict],
+    min_occurrences: Optional[int] = None,
+) -> Dict[str, int]:
+    """Incrementally fold newly saved transactions into merchant stats and rules.
+
+    Cost is proportional to the new rows: only the touched merchant keys are
+    read back, merged and upserted. A merchant with a rule but no stats row
+    (rules from before stats existed) is seeded from a bounded history read,
+    so the rule is never rebuilt from a partial view; merchants with neither
+    start from empty stats, so new merchants never trigger a history read.
+    ``min_occurrences`` defaults to the
+    threshold of the user's last recompute. ``/recurring/recompute`` remains
+    the full rebuild for backfills.
+    """
+    outgoing = [t for t in transactions if float(t.get("amount") or 0) < 0 and t.get("date")]
+    grouped = _group_by_merchant(outgoing, fallback_account_id=None)
+    if not grouped:
+        return {"stats_updated": 0, "rules_created": 0, "rules_updated": 0}
+
+    merchant_keys = sorted({key for _, key in grouped})
+    existing_stats = (
+        supabase_admin.table("recurring_merchant_stats")
+        .select("*")
+        .eq("user_id", user_id)
+        .in_("merchant_key", merchant_keys)
+        .execute()
+    ).data or []
+    stats_map = {(row.get("account_id"), row.get("merchant_key")): row for row in existing_stats}
+    explicit_threshold = min_occurrences is not None
+    if not explicit_threshold:
+        min_occurrences = _user_min_occurrences(user_id, existing_stats)
+
+    existing_rules = (
+        supabase_admin.table("recurring_rules")
+        .select("id,account_id,merchant_key,status")
+        .eq("user_id", user_id)
+        .in_("merchant_key", merchant_keys)
+        .execute()
+    ).data or []
+    rules_map = {(row.get("account_id"), row.get("merchant_key")): row for row in existing_rules}
+
+    unseeded = [group_key for group_key in grouped if group_key not in stats_map and group_key in rules_map]
+    history = _seed_history(user_id, unseeded) if unseeded else {}
+
+    stats_rows = []
+    rule_rows = []
+    rules_created = 0
+    rules_updated = 0
+    for (account_id, merchant_key), items in grouped.items():
+        base = stats_map.get((account_id, merchant_key))
+        if base is None:
+            # The upload is already saved, so history usually contains the new
+            # rows; add only those it does not (e.g. older than the lookback).
+            seen = {row.get("id") for row in history.get((account_id, merchant_key), []) if row.get("id")}
+            items = history.get((account_id, merchant_key), []) + [
+                item for item in items if not item.get("id") or item["id"] not in seen
+            ]
+            base = _empty_stats(user_id, account_id, merchant_key, min_occurrences)
+        threshold = min_occurrences if explicit_threshold else int(base.get("min_occurrences") or min_occurrences)
+        base = {**base, "min_occurrences": threshold}
+        base.pop("id", None)
+        merged = _merge_into_stats(base, items)
+        stats_rows.append(merged)
+        if merged["occurrence_count"] < threshold:
+            continue
+        existing = rules_map.get((account_id, merchant_key))
+        rule_rows.append(_rule_from_stats(user_id, merged, existing.get("status") if existing else "active"))
+        if existing:
+            rules_updated += 1
+        else:
+            rules_created += 1
+
+    supabase_admin.table("recurring_merchant_stats").upsert(
+        stats_rows,
+        on_conflict="user_id,account_id,merchant_key",
+    ).execute()
+    if rule_rows:
+        supabase_admin.table("recurring_rules").upsert(
+            rule_rows,
+            on_conflict="user_id,account_id,merchant_key",
+        ).execute()
+
+    return {"stats_updated": len(stats_rows), "rules_created": rules_created, "rules_updated": rules_updated}
+
+
 def _fetch_transactions_for_recurrence(user_id: str, account_scope: str, lookback_months: int) -> List[dict]:
     today = date.today()
     lookback_start = today - timedelta(days=lookback_months * 31)
@@ -228,28 +505,11 @@ def _fetch_transactions_for_recurrence(user_id: str, account_scope: str, lookbac
     return result.data or []
 
 
-@router.post("/recurring/recompute")
-async def recompute_recurring(request: RecomputeRequest, user_id: str = Depends(get_current_user)):
-    account_scope = _validate_account_scope(user_id, request.account_id)
-
-    txns = _fetch_transactions_for_recurrence(user_id, account_scope, request.lookback_months)
+def _recompute_recurring(user_id: str, account_scope: str, lookback_months: int, min_occurrences: int) -> dict:
+    txns = _fetch_transactions_for_recurrence(user_id, account_scope, lookback_months)
     fallback_account_id = _default_account_id(user_id)
-
-    normalized = []
-    for txn in txns:
-        if txn.get("category") == "Transfer":
-            continue
-        account_id = txn.get("account_id") or fallback_account_id
-        if not account_id:
-            continue
-        normalized.append({**txn, "account_id": account_id})
-    txns = normalized
-
-    grouped: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
-    for txn in txns:
-        display_name = _clean_display_name(txn.get("description", ""))
-        key = _merchant_key(display_name)
-        grouped[(txn["account_id"], key)].append({**txn, "_display_name": display_name})
+    grouped = _group_by_merchant(txns, fallback_account_id)
+    scanned = sum(len(items) for items in grouped.values())
 
     existing_result = (
         supabase_admin.table("recurring_rules")
@@ -262,21 +522,32 @@ async def recompute_recurring(request: RecomputeRequest, user_id: str = Depends(
         for row in (existing_result.data or [])
     }
 
+    eligible = {
+        group_key: items
+        for group_key, items in grouped.items()
+        if len(items) >= min_occurrences
+    }
+    scores = score_groups(
+        {
+            group_key: (
+                [_parse_date(item["date"]) for item in items],
+                [float(item.get("amount") or 0) for item in items],
+            )
+            for group_key, items in eligible.items()
+        }
+    )
+
     upsert_rows = []
     rules_created = 0
     rules_updated = 0
 
-    for (account_id, merchant_key), items in grouped.items():
-        if len(items) < request.min_occurrences:
-            continue
-
+    for (account_id, merchant_key), items in eligible.items():
         dates = sorted(_parse_date(item["date"]) for item in items)
         amounts = [float(item.get("amount") or 0) for item in items]
         categories = [item.get("category") or "Uncategorized" for item in items]
         display_names = [item.get("_display_name") or "Unknown" for item in items]
 
-        cadence, cadence_days = _classify_cadence(dates)
-        confidence = _confidence_score(dates, amounts, cadence_days)
+        cadence, cadence_days, confidence = scores[(account_id, merchant_key)]
 
         next_expected = None
         if cadence_days:
@@ -318,13 +589,56 @@ async def recompute_recurring(request: RecomputeRequest, user_id: str = Depends(
             on_conflict="user_id,account_id,merchant_key",
         ).execute()
 
+    # Rebuild the persisted merchant statistics so later uploads can update
+    # rules incrementally from this baseline.
+    stats_rows = [
+        _merge_into_stats(_empty_stats(user_id, account_id, merchant_key, min_occurrences), items)
+        for (account_id, merchant_key), items in grouped.items()
+    ]
+    if stats_rows:
+        supabase_admin.table("recurring_merchant_stats").upsert(
+            stats_rows,
+            on_conflict="user_id,account_id,merchant_key",
+        ).execute()
+
     return {
         "rules_created": rules_created,
         "rules_updated": rules_updated,
-        "scanned_transactions": len(txns),
+        "stats_updated": len(stats_rows),
+        "scanned_transactions": scanned,
     }
 
 
+def _recompute_job(user_id: str, params: dict, progress) -> dict:
+    return _recompute_recurring(
+        user_id, params["account_scope"], params["lookback_months"], params["min_occurrences"]
+    )
+
+
+register_job("recurring.recompute", _recompute_job, retryable=True)
+
+
+@router.post("/recurring/recompute")
+async def recompute_recurring(
+    request: RecomputeRequest,
+    async_: bool = Query(False, alias="async"),
+    user_id: str = Depends(get_current_user),
+):
+    account_scope = _validate_account_scope(user_id, request.account_id)
+    if async_:
+        job = submit_job(
+            user_id,
+            "recurring.recompute",
+            {
+                "account_scope": account_scope,
+                "lookback_months": request.lookback_months,
+                "min_occurrences": request.min_occurrences,
+            },
+        )
+        return JSONResponse(status_code=202, content=job)
+    return _recompute_recurring(user_id, account_scope, request.lookback_months, request.min_occurrences)
+
+
 @router.get("/recurring")
 async def list_recurring(
     status: str = "active",
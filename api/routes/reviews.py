@@ -1,13 +1,17 @@
 from datetime import date
 from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from api.auth import get_current_user
+from api.jobs import register_job, submit_job
+from api.query_loader import account_belongs_to_user
 from api.review_service import (
     generate_monthly_closeout_for_previous_month,
     get_or_create_review,
+    refresh_review,
 )
 from src.supabase_client import supabase_admin
 
@@ -26,23 +30,56 @@ def _validate_account_scope(user_id: str, account_id: str) -> str:
     scope = account_id or "all"
     if scope == "all":
         return scope
-    account_result = (
-        supabase_admin.table("accounts")
-        .select("id")
-        .eq("id", scope)
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not account_result.data:
+    if not account_belongs_to_user(supabase_admin, user_id, scope):
         raise HTTPException(status_code=400, detail="Invalid account")
     return scope
 
 
+def _generate_review_job(user_id: str, params: dict, progress) -> dict:
+    created = get_or_create_review(
+        user_id=user_id,
+        review_type=params["review_type"],
+        triggered_by="manual",
+        period_start=date.fromisoformat(params["period_start"]),
+        period_end=date.fromisoformat(params["period_end"]),
+        account_id=params["account_scope"],
+        statement_id=params.get("statement_id"),
+    )
+    return {"review_id": (created or {}).get("id")}
+
+
+def _generate_monthly_job(user_id: str, params: dict, progress) -> dict:
+    review = generate_monthly_closeout_for_previous_month(user_id, account_id=params["account_scope"])
+    return {"review_id": (review or {}).get("id")}
+
+
+# Only the scheduled monthly closeout is retried; a failed manual generation is
+# reported back so the user can decide whether to run it again.
+register_job("reviews.generate", _generate_review_job)
+register_job("reviews.generate_monthly", _generate_monthly_job, retryable=True)
+
+
 @router.post("/reviews/generate")
-async def generate_review(request: GenerateReviewRequest, user_id: str = Depends(get_current_user)):
+async def generate_review(
+    request: GenerateReviewRequest,
+    async_: bool = Query(False, alias="async"),
+    user_id: str = Depends(get_current_user),
+):
     try:
         account_scope = _validate_account_scope(user_id, request.account_id)
+        if async_:
+            job = submit_job(
+                user_id,
+                "reviews.generate",
+                {
+                    "review_type": request.review_type,
+                    "period_start": request.period_start.isoformat(),
+                    "period_end": request.period_end.isoformat(),
+                    "account_scope": account_scope,
+                    "statement_id": request.statement_id,
+                },
+            )
+            return JSONResponse(status_code=202, content=job)
         created = get_or_create_review(
             user_id=user_id,
             review_type=request.review_type,
@@ -62,9 +99,16 @@ async def generate_review(request: GenerateReviewRequest, user_id: str = Depends
 
 
 @router.post("/reviews/generate-monthly")
-async def generate_monthly(account_id: str = "all", user_id: str = Depends(get_current_user)):
+async def generate_monthly(
+    account_id: str = "all",
+    async_: bool = Query(False, alias="async"),
+    user_id: str = Depends(get_current_user),
+):
     try:
         account_scope = _validate_account_scope(user_id, account_id)
+        if async_:
+            job = submit_job(user_id, "reviews.generate_monthly", {"account_scope": account_scope})
+            return JSONResponse(status_code=202, content=job)
         review = generate_monthly_closeout_for_previous_month(user_id, account_id=account_scope)
         return {"review": review}
     except HTTPException:
@@ -77,6 +121,7 @@ async def generate_monthly(account_id: str = "all", user_id: str = Depends(get_c
 async def get_latest_review(
     review_type: Optional[str] = None,
     account_id: str = "all",
+    refresh: bool = True,
     user_id: str = Depends(get_current_user),
 ):
     try:
@@ -92,7 +137,9 @@ async def get_latest_review(
         if review_type:
             query = query.eq("review_type", review_type)
         result = query.execute()
-        return {"review": (result.data or [None])[0]}
+        if not result.data:
+            return {"review": None}
+        return {"review": refresh_review(result.data[0], recompute=refresh)}
     except HTTPException:
         raise
     except Exception as e:
@@ -127,7 +174,7 @@ async def get_review_history(
 
 
 @router.get("/reviews/{review_id}")
-async def get_review(review_id: str, user_id: str = Depends(get_current_user)):
+async def get_review(review_id: str, refresh: bool = True, user_id: str = Depends(get_current_user)):
     try:
         result = (
             supabase_admin.table("monthly_reviews")
@@ -139,7 +186,7 @@ async def get_review(review_id: str, user_id: str = Depends(get_current_user)):
         )
         if not result.data:
             raise HTTPException(status_code=404, detail="Review not found")
-        return {"review": result.data[0]}
+        return {"review": refresh_review(result.data[0], recompute=refresh)}
     except HTTPException:
         raise
     except Exception as e:
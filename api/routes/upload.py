@@ -3,7 +3,7 @@ from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
 from fastapi.responses import JSONResponse
 from io import BytesIO
 from datetime import datetime
-import sys, os, traceback, logging
+import sys, os, traceback, logging, asyncio
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
 
@@ -16,6 +16,7 @@ from api.groq_service import GroqService
 from api.routes.categories import apply_user_keywords
 from api.transfer_rules import apply_transfer_classification
 from api.review_service import get_or_create_review
+from api.routes.recurring import update_recurring_from_transactions
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -147,13 +148,22 @@ async def upload_statement(
 
             still_uncategorized = [t for t in saved_transactions if t.get("category") == "Uncategorized"]
             if still_uncategorized:
-                _, groq_count = groq.apply_categories_to_transactions(still_uncategorized, user_id)
+                # Off the event loop so concurrent uploads overlap and share in-flight Groq calls.
+                _, groq_count = await asyncio.to_thread(
+                    groq.apply_categories_to_transactions, still_uncategorized, user_id
+                )
                 categorised_count = pre_categorised + groq_count
                 logger.info(f"[UPLOAD] Groq categorised {groq_count} additional transactions")
             else:
                 categorised_count = pre_categorised
                 logger.info("[UPLOAD] All transactions categorised - no Groq call needed")
 
+            # Best-effort incremental recurring-rule update from the new rows only.
+            try:
+                update_recurring_from_transactions(user_id, saved_transactions)
+            except Exception as recurring_error:
+                logger.warning(f"[UPLOAD] recurring update failed: {recurring_error!r}")
+
             # Best-effort upload snapshot review generation for this statement period.
             try:
                 txn_dates = []
@@ -0,0 +1,80 @@
+"""Per-key single-flight registry for coalescing concurrent identical work.
+
+Statements uploaded at the same time share most of their uncategorised
+vendors (Tesco, TfL, Amazon). Without coordination each request sends the
+same vendors to Groq before any result reaches the vendor cache. A caller
+``claim``s the keys it needs: keys nobody is working on become its own and
+get a pending future; keys already in flight come back as the owner's future
+to ``wait`` on. The owner must ``complete`` every key it claimed (normally
+from a ``finally``) so waiters are never stranded.
+
+Coordination is in-process: requests served by different worker processes
+still make their own calls.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT_SECONDS", "60"))
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self.owned = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def claim(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, Future]]:
+        """Split ``keys`` into ``(owned, {key: future})``; owned keys must be completed."""
+        owned: List[Hashable] = []
+        waiting: Dict[Hashable, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                future = self._inflight.get(key)
+                if future is None:
+                    self._inflight[key] = Future()
+                    owned.append(key)
+                else:
+                    waiting[key] = future
+            self.owned += len(owned)
+            self.coalesced += len(waiting)
+        return owned, waiting
+
+    def complete(self, keys: Iterable[Hashable], results: Mapping[Hashable, Any], default: Any = None) -> None:
+        """Publish ``results`` for claimed ``keys`` and release them."""
+        with self._lock:
+            futures = [(key, self._inflight.pop(key, None)) for key in keys]
+        for key, future in futures:
+            if future is not None and not future.done():
+                future.set_result(results.get(key, default))
+
+    def wait(
+        self,
+        waiting: Mapping[Hashable, Future],
+        default: Any = None,
+        timeout: float = SINGLE_FLIGHT_TIMEOUT_SECONDS,
+    ) -> Dict[Hashable, Any]:
+        """Results of another caller's in-flight keys; ``default`` on timeout or failure."""
+        results: Dict[Hashable, Any] = {}
+        for key, future in waiting.items():
+            try:
+                results[key] = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                logger.warning("single_flight_timeout key=%r timeout=%ss", key, timeout)
+                results[key] = default
+            except Exception as e:
+                logger.warning("single_flight_failed key=%r: %r", key, e)
+                results[key] = default
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._inflight), "owned": self.owned, "coalesced": self.coalesced}
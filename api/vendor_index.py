@@ -0,0 +1,229 @@
+"""Approximate nearest-merchant lookup over known vendors (MinHash + LSH).
+
+``vendor_key`` folds store numbers and card references together, but a new
+spelling of a known merchant ("TFL TRAVEL CH" vs "TFL TRAVEL CHARGE") still
+misses the exact-key cache. This index holds every normalised
+``vendor_categories`` description as a MinHash signature of its character
+shingles, split into LSH bands. A lookup hashes the query the
+same way, collects the vendors sharing at least one band and scores those
+candidates by exact shingle Jaccard similarity, so only a handful of
+comparisons are made however many vendors are indexed.
+
+Only the global vendor cache is indexed: per-user ``learned_rules`` rows
+(``learned:<user_id>:...`` keys) are ignored, so one user's mappings never
+answer for another. Entries are keyed by normalised vendor key; each
+remembers the category of every ``vendor:<name>`` row that produced it and
+answers with the most common one. ``add`` is incremental. With the local
+categoriser enabled the index subscribes to it and shares its single pass
+over the label tables; ``sync`` (``vendor_categories`` only) is for when it
+runs alone.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import zlib
+from collections import Counter, defaultdict
+from functools import lru_cache
+from time import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from api.local_categoriser import example_scope, iter_label_pages
+from src.merchants import vendor_key
+
+logger = logging.getLogger(__name__)
+
+VENDOR_INDEX_MIN_SIMILARITY = float(os.environ.get("VENDOR_INDEX_MIN_SIMILARITY", "0.6"))
+VENDOR_INDEX_SYNC_SECONDS = int(os.environ.get("VENDOR_INDEX_SYNC_SECONDS", "300"))
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 64
+SHINGLE_CACHE_SIZE = 65536
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard share a band with high probability.
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20261019)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def _shingles(key: str) -> frozenset:
+    padded = f" {key} "
+    if len(padded) <= SHINGLE_SIZE:
+        return frozenset([padded])
+    return frozenset(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+
+
+@lru_cache(maxsize=SHINGLE_CACHE_SIZE)
+def _shingle_hashes(shingle: str) -> Tuple[int, ...]:
+    h = zlib.crc32(shingle.encode("utf-8"))
+    return tuple((a * h + b) % _PRIME for a, b in _PERMUTATIONS)
+
+
+def _bands(shingles: frozenset) -> List[Tuple[int, ...]]:
+    # The shingle vocabulary is small, so each shingle's permuted hashes are
+    # memoised and a signature is an element-wise min over cached tuples.
+    signature = list(map(min, zip(*map(_shingle_hashes, shingles))))
+    return [
+        (band, *signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        for band in range(BANDS)
+    ]
+
+
+class _Entry:
+    __slots__ = ("text", "shingles", "bands", "categories")
+
+    def __init__(self, text: str, shingles: frozenset, bands: List[Tuple[int, ...]]) -> None:
+        self.text = text
+        self.shingles = shingles
+        self.bands = bands
+        self.categories: Dict[str, str] = {}
+
+    def category(self) -> Optional[str]:
+        if not self.categories:
+            return None
+        return Counter(self.categories.values()).most_common(1)[0][0]
+
+
+class VendorIndex:
+    def __init__(self, min_similarity: float = VENDOR_INDEX_MIN_SIMILARITY) -> None:
+        self.min_similarity = min_similarity
+        self.lookups = 0
+        self.matched = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._source_key: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, ...], Set[str]] = defaultdict(set)
+        self._watermarks: Dict[str, str] = {}
+        self._last_sync = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Updates -------------------------------------------------------------
+
+    def _remove_source_locked(self, source: str) -> None:
+        key = self._source_key.pop(source, None)
+        entry = self._entries.get(key) if key is not None else None
+        if entry is None:
+            return
+        entry.categories.pop(source, None)
+        if entry.categories:
+            return
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+        del self._entries[key]
+
+    def _add_locked(self, source: str, text: str, category: Optional[str]) -> bool:
+        key = vendor_key(text) if text else ""
+        if self._source_key.get(source) == key and self._entries[key].categories.get(source) == category:
+            return False
+        self._remove_source_locked(source)
+        if not key or not category or category == "Uncategorized":
+            return True
+        entry = self._entries.get(key)
+        if entry is None:
+            shingles = _shingles(key)
+            entry = _Entry(text, shingles, _bands(shingles))
+            self._entries[key] = entry
+            for band in entry.bands:
+                self._buckets[band].add(key)
+        entry.categories[source] = category
+        self._source_key[source] = key
+        return True
+
+    def add(self, examples: Iterable[Tuple[str, str, str]]) -> int:
+        """Add or relabel global ``(source_key, text, category)`` rows; returns how many changed.
+
+        Per-user sources (``learned:<user_id>:...``) are skipped.
+        """
+        with self._lock:
+            return sum(
+                self._add_locked(source, text, category)
+                for source, text, category in examples
+                if example_scope(source) is None
+            )
+
+    def sync(self, client, force: bool = False) -> int:
+        """Pull ``vendor_categories`` rows changed since the last sync."""
+        if not force and time() - self._last_sync < VENDOR_INDEX_SYNC_SECONDS:
+            return 0
+        self._last_sync = time()
+        with self._lock:
+            watermarks = dict(self._watermarks)
+        changed = 0
+        for table, examples, updated_at in iter_label_pages(client, watermarks, tables=("vendor_categories",)):
+            changed += self.add(examples)
+            with self._lock:
+                self._watermarks[table] = max(self._watermarks.get(table, ""), updated_at)
+        if changed:
+            logger.info("vendor_index_synced changed=%s vendors=%s", changed, len(self._entries))
+        return changed
+
+    # --- Lookup --------------------------------------------------------------
+
+    def _nearest_locked(self, text: str) -> Tuple[Optional[str], Optional[str], float]:
+        key = vendor_key(text) if text else ""
+        if not key:
+            return None, None, 0.0
+        exact = self._entries.get(key)
+        if exact is not None:
+            return exact.text, exact.category(), 1.0
+        shingles = _shingles(key)
+        candidates: Set[str] = set()
+        for band in _bands(shingles):
+            candidates.update(self._buckets.get(band, ()))
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            score = len(shingles & entry.shingles) / len(shingles | entry.shingles)
+            if score > best_score or (score == best_score and best is not None and candidate < best):
+                best, best_score = candidate, score
+        if best is None:
+            return None, None, 0.0
+        entry = self._entries[best]
+        return entry.text, entry.category(), best_score
+
+    def nearest(self, text: str) -> Tuple[Optional[str], Optional[str], float]:
+        """``(known_vendor, category, jaccard_similarity)`` of the closest indexed vendor."""
+        with self._lock:
+            return self._nearest_locked(text)
+
+    def match(self, texts: List[str], allowed: Optional[Iterable[str]] = None) -> Dict[str, Tuple[str, str, float]]:
+        """``{text: (known_vendor, category, similarity)}`` for texts at or above ``min_similarity``."""
+        allowed_set = set(allowed) if allowed is not None else None
+        matched: Dict[str, Tuple[str, str, float]] = {}
+        with self._lock:
+            for text in texts:
+                self.lookups += 1
+                vendor, category, score = self._nearest_locked(text)
+                if category is None or score < self.min_similarity:
+                    continue
+                if allowed_set is not None and category not in allowed_set:
+                    continue
+                matched[text] = (vendor, category, score)
+            self.matched += len(matched)
+        return matched
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "vendors": len(self._entries),
+                "buckets": len(self._buckets),
+                "lookups": self.lookups,
+                "matched": self.matched,
+                "match_ratio": round(self.matched / self.lookups, 3) if self.lookups else 0.0,
+            }
+
+
+def build_default_vendor_index() -> Optional[VendorIndex]:
+    if os.environ.get("VENDOR_INDEX_ENABLED", "1").lower() in {"0", "false", "no"}:
+        return None
+    return VendorIndex()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark /api/insights data path: full-history fetch vs two-month window.
+
+Synthetic workload: one user with 5 years of history (~150 transactions/month).
+The fake table serves date ranges from a sorted index like the real
+``(user_id, date)`` index and round-trips each response through JSON, so fetch
+cost scales with the rows returned as it does over the wire.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+YEARS = 5
+PER_MONTH = 150
+REPEATS = 20
+NOW = datetime(2026, 10, 19)
+CATEGORIES = ["Food", "Bills", "Transport", "Shopping", "Entertainment", "Transfer"]
+
+
+def _ensure_env() -> None:
+    os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    os.environ.setdefault(
+        "SUPABASE_ANON_KEY",
+        "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+        "eyJpc3MiOiJzdXBhYmFzZSIsInJlZiI6ImV4YW1wbGUiLCJyb2xlIjoiYW5vbiJ9."
+        "signature-placeholder",
+    )
+
+
+class _FakeQuery:
+    """Filters like PostgREST; date bounds use bisect to mirror the (user_id, date) index."""
+
+    def __init__(self, rows, dates):
+        self._rows = rows
+        self._dates = dates
+        self._filters = []
+        self._lo = 0
+        self._hi = len(rows)
+
+    def select(self, _columns):
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda r: r.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self._lo = max(self._lo, bisect_left(self._dates, value))
+        return self
+
+    def lt(self, column, value):
+        self._hi = min(self._hi, bisect_left(self._dates, value))
+        return self
+
+    def execute(self):
+        rows = [
+            {"amount": r["amount"], "category": r["category"], "date": r["date"]}
+            for r in self._rows[self._lo : self._hi]
+            if all(f(r) for f in self._filters)
+        ]
+        return SimpleNamespace(data=json.loads(json.dumps(rows)))
+
+
+class _FakeSupabase:
+    def __init__(self, rows):
+        self._rows = sorted(rows, key=lambda r: r["date"])
+        self._dates = [r["date"] for r in self._rows]
+
+    def table(self, _name):
+        return _FakeQuery(self._rows, self._dates)
+
+
+def _build_rows(seed: int = 7) -> list:
+    rng = random.Random(seed)
+    rows = []
+    day = date(NOW.year - YEARS, NOW.month, 1)
+    end = NOW.date()
+    per_day = PER_MONTH / 30.0
+    while day <= end:
+        for _ in range(int(per_day) + (1 if rng.random() < per_day % 1 else 0)):
+            rows.append(
+                {
+                    "user_id": "user-1",
+                    "date": day.isoformat(),
+                    "amount": round(-rng.uniform(1, 120), 2) if rng.random() < 0.9 else round(rng.uniform(50, 3000), 2),
+                    "category": rng.choice(CATEGORIES),
+                }
+            )
+        day += timedelta(days=1)
+    return rows
+
+
+def _legacy_totals(supabase, user_id: str, now: datetime):
+    txns = supabase.table("transactions").select("amount, category, date").eq("user_id", user_id).execute().data or []
+    current_month = now.strftime("%Y-%m")
+    prev_month = (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+    def monthly_totals(month: str) -> dict:
+        totals: dict = defaultdict(float)
+        for t in txns:
+            if t["date"].startswith(month) and t["amount"] < 0 and t.get("category") != "Transfer":
+                totals[t["category"]] += abs(t["amount"])
+        return {k: round(v, 2) for k, v in totals.items()}
+
+    return monthly_totals(current_month), monthly_totals(prev_month)
+
+
+def _best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = perf_counter()
+        fn()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    _ensure_env()
+
+    from api.main import _insight_month_totals
+
+    rows = _build_rows()
+    supabase = _FakeSupabase(rows)
+
+    legacy = _legacy_totals(supabase, "user-1", NOW)
+    bounded = _insight_month_totals(supabase, "user-1", "all", NOW)
+    assert legacy == bounded, "bounded insights totals diverged from full-history totals"
+
+    legacy_s = _best_of(lambda: _legacy_totals(supabase, "user-1", NOW))
+    bounded_s = _best_of(lambda: _insight_month_totals(supabase, "user-1", "all", NOW))
+    print(f"history_rows={len(rows)} years={YEARS} repeats={REPEATS} (best of)")
+    print(f"full_history_ms={legacy_s * 1000:.2f}")
+    print(f"two_month_window_ms={bounded_s * 1000:.2f}")
+    print(f"speedup={legacy_s / bounded_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark the local n-gram categoriser: latency and Groq calls avoided.
+
+Synthetic workload: ~120 merchant brands across 6 categories. Training rows are
+brand variants (store numbers, branch names) as they would accumulate in
+vendor_categories; the test set is unseen variants of the same brands plus
+unseen merchants that should escalate to the LLM.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+TRAIN_VARIANTS_PER_BRAND = 8
+TEST_VARIANTS_PER_BRAND = 4
+UNSEEN_MERCHANTS = 150
+SEED = 11
+
+BRANDS = {
+    "Food": ["TESCO STORES", "TESCO EXPRESS", "SAINSBURYS", "ASDA SUPERSTORE", "LIDL GB", "ALDI STORES", "WAITROSE",
+             "M&S SIMPLY FOOD", "CO-OP GROUP", "PRET A MANGER", "GREGGS", "NANDOS", "DOMINOS PIZZA", "MCDONALDS",
+             "KFC", "PIZZA HUT", "COSTA COFFEE", "STARBUCKS", "OCADO RETAIL", "ICELAND FOODS"],
+    "Transport": ["TFL TRAVEL CHARGE", "TFL CYCLE HIRE", "TRAINLINE", "NATIONAL RAIL", "UBER TRIP", "BOLT RIDE",
+                  "SHELL FUEL", "BP OIL", "ESSO SERVICE", "AVANTI WEST COAST", "LNER TICKETS", "GWR TICKETS",
+                  "RINGGO PARKING", "NCP CAR PARK", "ADDISON LEE", "STAGECOACH BUS", "ARRIVA BUS", "SOUTHERN RAIL",
+                  "THAMESLINK", "ADDISON TAXI"],
+    "Entertainment": ["NETFLIX COM", "SPOTIFY UK", "STEAM GAMES", "ODEON CINEMA", "VUE CINEMA", "DISNEY PLUS",
+                      "PRIME VIDEO", "APPLE COM BILL", "PLAYSTATION NETWORK", "XBOX LIVE", "NOW TV", "CINEWORLD",
+                      "TICKETMASTER", "AUDIBLE UK", "YOUTUBE PREMIUM", "TWITCH", "NINTENDO ESHOP", "DICE FM",
+                      "EVENTBRITE", "SEETICKETS"],
+    "Bills": ["BRITISH GAS", "THAMES WATER", "OCTOPUS ENERGY", "EDF ENERGY", "COUNCIL TAX", "O2 UK", "VODAFONE",
+              "EE LIMITED", "HYPEROPTIC", "VIRGIN MEDIA", "BT GROUP", "SKY DIGITAL", "TV LICENCE", "DIRECT LINE",
+              "AVIVA INSURANCE", "ADMIRAL INSURANCE", "OVO ENERGY", "SEVERN TRENT", "AFFINITY WATER", "THREE UK"],
+    "Shopping": ["AMAZON MKTPLACE", "AMAZON CO UK", "EBAY", "ASOS COM", "JOHN LEWIS", "SELFRIDGES", "ARGOS",
+                 "CURRYS", "IKEA", "PRIMARK", "NEXT RETAIL", "H&M", "ZARA UK", "BOOTS", "SUPERDRUG", "TK MAXX",
+                 "WHSMITH", "SCREWFIX", "B&Q", "DUNELM"],
+    "Savings": ["CHASE SAVER", "ROUND UP", "VANGUARD ISA", "MONEYBOX", "PLUM SAVINGS", "NUTMEG", "MARCUS SAVINGS",
+                "PENSION CONTRIB", "LISA TRANSFER", "CHIP SAVINGS", "FREETRADE", "TRADING 212", "HL ISA",
+                "AJ BELL", "PREMIUM BONDS", "NS&I", "STOCKS ISA", "CASH ISA", "REGULAR SAVER", "EASY ACCESS"],
+}
+BRANCHES = ["LONDON", "LEEDS", "BRISTOL", "MANCHESTER", "CROYDON", "ONLINE", "KINGS X", "GB", "UK", "W1"]
+
+
+def _ensure_env() -> None:
+    os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    os.environ.setdefault(
+        "SUPABASE_ANON_KEY",
+        "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+        "eyJpc3MiOiJzdXBhYmFzZSIsInJlZiI6ImV4YW1wbGUiLCJyb2xlIjoiYW5vbiJ9."
+        "signature-placeholder",
+    )
+
+
+def _variant(rng: random.Random, brand: str) -> str:
+    parts = [brand]
+    if rng.random() < 0.7:
+        parts.append(rng.choice(BRANCHES))
+    parts.append(str(rng.randint(10, 99999)))
+    return " ".join(parts)
+
+
+def _unseen(rng: random.Random) -> str:
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    word = "".join(rng.choice(letters) for _ in range(rng.randint(5, 9)))
+    return f"{word} {rng.choice(['LTD', 'SERVICES', 'CO', 'GROUP'])} {rng.randint(10, 9999)}"
+
+
+def main() -> None:
+    _ensure_env()
+
+    from api.groq_service import CHUNK_SIZE
+    from api.local_categoriser import LocalCategoriser
+
+    rng = random.Random(SEED)
+    model = LocalCategoriser(path=None)
+    train = []
+    test = []
+    for category, brands in BRANDS.items():
+        for brand in brands:
+            for _ in range(TRAIN_VARIANTS_PER_BRAND):
+                text = _variant(rng, brand)
+                train.append((f"vendor:{text}", text, category))
+            test.extend((_variant(rng, brand), category) for _ in range(TEST_VARIANTS_PER_BRAND))
+    test.extend((_unseen(rng), None) for _ in range(UNSEEN_MERCHANTS))
+
+    start = perf_counter()
+    model.learn(train)
+    train_ms = (perf_counter() - start) * 1000
+
+    texts = [text for text, _ in test]
+    start = perf_counter()
+    resolved = model.classify_confident(texts)
+    predict_ms = (perf_counter() - start) * 1000
+
+    known = [(text, category) for text, category in test if category]
+    correct = sum(1 for text, category in known if resolved.get(text, (None,))[0] == category)
+    wrong = sum(1 for text, category in known if text in resolved and resolved[text][0] != category)
+    unseen_resolved = sum(1 for text, category in test if category is None and text in resolved)
+    escalated = len(texts) - len(resolved)
+
+    print(f"train_examples={len(train)} train_ms={train_ms:.1f}")
+    print(f"test_descriptions={len(texts)} (known_brand_variants={len(known)} unseen_merchants={UNSEEN_MERCHANTS})")
+    print(f"predict_ms_total={predict_ms:.1f} per_description_us={predict_ms * 1000 / len(texts):.0f}")
+    print(f"resolved_locally={len(resolved)} correct={correct} wrong={wrong} unseen_resolved={unseen_resolved}")
+    print(f"escalated_to_llm={escalated}")
+    print(
+        f"llm_calls_without_local={math.ceil(len(texts) / CHUNK_SIZE)} "
+        f"llm_calls_with_local={math.ceil(escalated / CHUNK_SIZE)} (chunk_size={CHUNK_SIZE})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark cross-request micro-batching of Groq vendor categorisation.
+
+Synthetic workload: concurrent small uploads, each with a few unknown
+vendors, against a fake Groq call with fixed latency. Compares Groq calls and
+vendors per call when each caller sends its own chunks (batch window of 0 ms)
+with the shared micro-batch queue.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import threading
+from pathlib import Path
+from time import perf_counter, sleep
+from unittest.mock import MagicMock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+CONCURRENT_UPLOADS = 60
+VENDORS_PER_UPLOAD = (2, 8)
+GROQ_LATENCY_SECONDS = 0.2
+ARRIVAL_SPREAD_SECONDS = 0.5
+BATCH_WAIT_MS = 50
+SEED = 5
+
+
+def _ensure_env() -> None:
+    os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    os.environ.setdefault(
+        "SUPABASE_ANON_KEY",
+        "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+        "eyJpc3MiOiJzdXBhYmFzZSIsInJlZiI6ImV4YW1wbGUiLCJyb2xlIjoiYW5vbiJ9."
+        "signature-placeholder",
+    )
+
+
+def _run(uploads, wait_ms):
+    from api.groq_service import CHUNK_SIZE, GroqService
+    from api.llm_cache import LLMResponseCache
+    from api.local_categoriser import LocalCategoriser
+    from api.micro_batcher import MicroBatcher
+    from api.single_flight import SingleFlight
+    from api.vendor_index import VendorIndex
+
+    calls = []
+    lock = threading.Lock()
+
+    def fake_groq(system, user, max_tokens=600, cache=False):
+        vendors = json.loads(user.split(": ", 1)[1])
+        with lock:
+            calls.append(len(vendors))
+        sleep(GROQ_LATENCY_SECONDS)
+        return {vendor: "Shopping" for vendor in vendors}
+
+    service = GroqService(
+        api_key="bench",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+        vendor_flights=SingleFlight(),
+    )
+    service.vendor_batcher = MicroBatcher(
+        service._categorise_vendor_chunk, CHUNK_SIZE, max_wait_ms=wait_ms, default="Uncategorized"
+    )
+    service.local_model.sync = lambda client, force=False: 0
+    service.vendor_index.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {}
+    service._save_to_vendor_cache = lambda mappings: None
+    service._call_groq_json = fake_groq
+
+    def upload(delay, vendors):
+        sleep(delay)
+        service.categorise_vendors(vendors)
+
+    threads = [threading.Thread(target=upload, args=item) for item in uploads]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return calls, perf_counter() - start
+
+
+def main() -> None:
+    _ensure_env()
+
+    rng = random.Random(SEED)
+    uploads = []
+    for n in range(CONCURRENT_UPLOADS):
+        vendors = [f"MERCHANT {n}-{i}" for i in range(rng.randint(*VENDORS_PER_UPLOAD))]
+        uploads.append((rng.uniform(0, ARRIVAL_SPREAD_SECONDS), vendors))
+    total = sum(len(vendors) for _, vendors in uploads)
+
+    for label, wait_ms in (("per_caller", 0), ("micro_batched", BATCH_WAIT_MS)):
+        calls, elapsed = _run(uploads, wait_ms)
+        print(
+            f"{label}: uploads={CONCURRENT_UPLOADS} vendors={total} groq_calls={len(calls)} "
+            f"vendors_per_call={total / len(calls):.1f} wall_s={elapsed:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
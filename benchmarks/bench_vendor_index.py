@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark the MinHash/LSH vendor index against a linear similarity scan.
+
+Synthetic workload: ~20k known vendors (random merchant names plus branch
+variants) as they would accumulate in vendor_categories. Queries are new
+spellings of known vendors (truncated and abbreviated words, dropped letters)
+plus unseen merchants that should still escalate to the LLM.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+KNOWN_MERCHANTS = 5000
+VARIANTS_PER_MERCHANT = 4
+RESPELT_QUERIES = 1000
+UNSEEN_QUERIES = 1000
+LINEAR_SAMPLE = 100
+SEED = 7
+
+CATEGORIES = ["Bills", "Entertainment", "Food", "Savings", "Shopping", "Transport"]
+SUFFIXES = ["LTD", "STORES", "SERVICES", "GROUP", "UK", "ONLINE", "EXPRESS", "RETAIL"]
+BRANCHES = ["LONDON", "LEEDS", "BRISTOL", "MANCHESTER", "CROYDON", "KINGS X", "W1", "GB"]
+
+
+def _ensure_env() -> None:
+    os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    os.environ.setdefault(
+        "SUPABASE_ANON_KEY",
+        "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+        "eyJpc3MiOiJzdXBhYmFzZSIsInJlZiI6ImV4YW1wbGUiLCJyb2xlIjoiYW5vbiJ9."
+        "signature-placeholder",
+    )
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice("ABCDEFGHIJKLMNOPRSTUVWY") for _ in range(rng.randint(5, 9)))
+
+
+def _respell(rng: random.Random, name: str) -> str:
+    words = name.split()
+    i = rng.randrange(len(words))
+    word = words[i]
+    if rng.random() < 0.5 and len(word) > 4:
+        words[i] = word[: rng.randint(3, len(word) - 1)]
+    else:
+        j = rng.randrange(len(word))
+        words[i] = word[:j] + word[j + 1:]
+    return " ".join(words) + f" {rng.randint(10, 9999)}"
+
+
+def _jaccard_linear(entries, shingles):
+    best, best_score = None, 0.0
+    for key, entry in entries.items():
+        score = len(shingles & entry.shingles) / len(shingles | entry.shingles)
+        if score > best_score:
+            best, best_score = key, score
+    return best, best_score
+
+
+def main() -> None:
+    _ensure_env()
+
+    from api.vendor_index import VendorIndex, _shingles
+    from src.merchants import vendor_key
+
+    rng = random.Random(SEED)
+    merchants = [(f"{_word(rng)} {rng.choice(SUFFIXES)}", rng.choice(CATEGORIES)) for _ in range(KNOWN_MERCHANTS)]
+    rows = []
+    for name, category in merchants:
+        rows.append((f"vendor:{name}", name, category))
+        for _ in range(VARIANTS_PER_MERCHANT - 1):
+            variant = f"{name} {rng.choice(BRANCHES)}"
+            rows.append((f"vendor:{variant}", variant, category))
+
+    index = VendorIndex()
+    start = perf_counter()
+    index.add(rows)
+    build_ms = (perf_counter() - start) * 1000
+
+    sample = rng.sample(merchants, RESPELT_QUERIES)
+    queries = [(_respell(rng, name), category) for name, category in sample]
+    queries += [(f"{_word(rng)} {_word(rng)} {rng.randint(10, 9999)}", None) for _ in range(UNSEEN_QUERIES)]
+    texts = [text for text, _ in queries]
+
+    for text in texts[:50]:
+        index.nearest(text)  # warm the shingle hash cache
+    start = perf_counter()
+    matched = index.match(texts)
+    lsh_ms = (perf_counter() - start) * 1000
+
+    entries = index._entries
+    start = perf_counter()
+    for text in texts[:LINEAR_SAMPLE]:
+        _jaccard_linear(entries, _shingles(vendor_key(text)))
+    linear_ms = (perf_counter() - start) * 1000 / LINEAR_SAMPLE
+
+    respelt = [(text, category) for text, category in queries if category]
+    correct = sum(1 for text, category in respelt if text in matched and matched[text][1] == category)
+    wrong = sum(1 for text, category in respelt if text in matched and matched[text][1] != category)
+    unseen_matched = sum(1 for text, category in queries if category is None and text in matched)
+
+    print(f"indexed_rows={len(rows)} vendors={len(index)} buckets={index.stats()['buckets']} build_ms={build_ms:.0f}")
+    print(f"queries={len(texts)} lsh_us_per_lookup={lsh_ms * 1000 / len(texts):.0f} "
+          f"linear_scan_us_per_lookup={linear_ms * 1000:.0f}")
+    print(f"respelt_known={len(respelt)} matched={correct + wrong} correct={correct} wrong={wrong}")
+    print(f"unseen={UNSEEN_QUERIES} falsely_matched={unseen_matched}")
+    print(f"escalated_to_llm={len(texts) - len(matched)} of {len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
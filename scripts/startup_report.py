@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Report API cold-start import time and enforce the import budget.
+
+Runs ``python -X importtime -c "import api.main"`` in a fresh interpreter,
+prints the total and the slowest top-level packages, and exits non-zero when
+the total exceeds ``--budget-ms`` or a module that should load lazily (see
+``LAZY_MODULES``) was imported at startup. The app's startup event is run too
+(``measure_app_startup``), since work done there delays ``/health`` just as
+much as module-level imports.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Only needed by statement uploads, storage calls, recurring scoring or Groq
+# requests; importing any of them from api.main is a regression.
+LAZY_MODULES = ("pandas", "numpy", "pdfplumber", "boto3", "groq")
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+
+def _ensure_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    env.setdefault(
+        "SUPABASE_ANON_KEY",
+        "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+        "eyJpc3MiOiJzdXBhYmFzZSIsInJlZiI6ImV4YW1wbGUiLCJyb2xlIjoiYW5vbiJ9."
+        "signature-placeholder",
+    )
+    return env
+
+
+def measure(module: str = "api.main") -> List[Tuple[str, int, int]]:
+    """``(module, self_us, cumulative_us)`` for every import made by ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=_ensure_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+_APP_STARTUP_SCRIPT = """
+import sys
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+import api.jobs
+import api.main
+
+api.jobs.supabase_admin = MagicMock()  # orphaned-job cleanup must not hit the network
+with TestClient(api.main.app):
+    pass
+print("lazy_loaded=" + ",".join(name for name in {lazy!r} if name in sys.modules))
+"""
+
+
+def measure_app_startup() -> List[str]:
+    """Lazy modules loaded once ``api.main`` has run its startup event."""
+    env = _ensure_env()
+    env.setdefault("GROQ_API_KEY", "startup-report")
+    result = subprocess.run(
+        [sys.executable, "-c", _APP_STARTUP_SCRIPT.format(lazy=LAZY_MODULES)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("lazy_loaded="):
+            return [name for name in line[len("lazy_loaded="):].split(",") if name]
+    raise RuntimeError(f"app startup report missing from output: {result.stdout!r}")
+
+
+def summarise(rows: List[Tuple[str, int, int]], module: str = "api.main") -> Dict[str, object]:
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = next((cumulative for name, _, cumulative in rows if name == module), sum(by_package.values()))
+    imported = {name for name, _, _ in rows}
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])
+        },
+        "lazy_modules_loaded": [name for name in LAZY_MODULES if name in imported],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    report = summarise(measure())
+    print(f"import api.main: {report['total_ms']} ms (budget {args.budget_ms:.0f} ms)")
+    for package, ms in list(report["packages_ms"].items())[: args.top]:
+        print(f"  {package:<24} {ms:>8.1f} ms")
+
+    failures = []
+    if report["lazy_modules_loaded"]:
+        failures.append(f"loaded at startup, should be lazy: {', '.join(report['lazy_modules_loaded'])}")
+    startup_loaded = measure_app_startup()
+    if startup_loaded:
+        failures.append(f"loaded by the startup event, should be lazy: {', '.join(startup_loaded)}")
+    if report["total_ms"] > args.budget_ms:
+        failures.append(f"over budget by {report['total_ms'] - args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
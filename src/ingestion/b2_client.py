@@ -1,7 +1,6 @@
 # src/ingestion/b2client.py
 import os
 import io
-import boto3
 from typing import List, Optional
 
 def _get_b2_config():
@@ -20,6 +19,9 @@ def _get_b2_config():
     return endpoint, key_id, app_key, bucket
 
 def get_b2_client():
+    # boto3 takes ~0.1s to import; load it on the first storage call, not at startup.
+    import boto3
+
     endpoint, key_id, app_key, _ = _get_b2_config()
     return boto3.client(
         's3',
@@ -1,10 +1,16 @@
+from __future__ import annotations
+
 import re
 import logging
-import pdfplumber
-import pandas as pd
+from typing import TYPE_CHECKING
 from src.config import CATEGORY_RULES
 from src.ingestion.learning import load_learned_rules
 
+# pdfplumber and pandas are imported where they are used: together they are
+# most of the API's import time, and only statement uploads need them.
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 # Chase UK statement format - each transaction spans multiple lines:
@@ -63,6 +69,8 @@ def _parse_signed_amount(s: str) -> float:
 
 def _try_table_parse(pdf) -> list:
     """Fallback: use pdfplumber table extraction if text parse fails."""
+    import pandas as pd
+
     transactions = []
     for page in pdf.pages:
         tables = page.extract_tables()
@@ -99,6 +107,8 @@ def _try_table_parse(pdf) -> list:
 
 def _try_text_parse(all_lines: list) -> list:
     """State-machine parser for Chase UK multi-line text format."""
+    import pandas as pd
+
     transactions = []
     cur_date = None
     cur_desc_parts = []
@@ -157,6 +167,9 @@ class ChaseStatementParser:
         self._learned_rules.update(vendor_cache)
 
     def parse(self, file) -> pd.DataFrame:
+        import pandas as pd
+        import pdfplumber
+
         all_lines = []
         try:
             with pdfplumber.open(file) as pdf:
@@ -222,6 +235,8 @@ class AmexCSVParser:
         self._learned_rules.update(vendor_cache)
 
     def parse(self, file) -> pd.DataFrame:
+        import pandas as pd
+
         try:
             df = pd.read_csv(file)
             df['Date']        = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce')
@@ -0,0 +1,110 @@
+"""Merchant name normalisation shared by recurring detection, reviews and the
+vendor category cache.
+
+Patterns are compiled once at import and results are memoised per raw
+description in a bounded LRU, so a merchant string seen repeatedly (every
+recompute, every review) is only normalised once per process.
+"""
+
+import re
+from functools import lru_cache
+from typing import Tuple
+
+MERCHANT_CACHE_SIZE = 16384
+
+_PIPE_SUFFIX_RE = re.compile(r"\s*\|\s*.*$")
+_TXN_TYPE_RE = re.compile(
+    r"\b(Purchase|Payment|Direct Debit|Standing Order|Card Purchase|Card Payment)\b",
+    re.IGNORECASE,
+)
+_DIRECTION_PREFIX_RE = re.compile(r"^(from|to)\s+", re.IGNORECASE)
+_BANK_NAME_RE = re.compile(r"\b(chase|jpmcb|jpmorgan|jpmcb)\b", re.IGNORECASE)
+_DASH_NUMBER_SUFFIX_RE = re.compile(r"\s*-\s*[0-9]{2,}.*$")
+_REFERENCE_SUFFIX_RE = re.compile(r"\bref(erence)?\b.*$", re.IGNORECASE)
+_LONG_NUMBER_RE = re.compile(r"\b[0-9]{4,}\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_KEY_NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9 ]")
+_KEY_STOPWORDS_RE = re.compile(r"\b(from|to|payment|purchase|direct|debit|standing|order)\b")
+_KEY_NUMBER_RE = re.compile(r"\b[0-9]{2,}\b")
+
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)"
+_VENDOR_CARD_RE = re.compile(
+    r"\b(?:card|crd|visa|mastercard|debit card|credit card)\s*(?:no\.?|number|ending(?: in)?)?\s*[x*#.]*[0-9]{4}\b"
+    r"|[x*#.]{2,}\s*[0-9]{2,4}\b"
+)
+_VENDOR_DATE_RE = re.compile(
+    r"\b[0-9]{4}-[0-9]{2}-[0-9]{2}\b"
+    r"|\b[0-9]{1,2}[/.-][0-9]{1,2}(?:[/.-][0-9]{2,4})?\b"
+    rf"|\b[0-9]{{1,2}}\s?{_MONTHS}(?:\s?[0-9]{{2,4}})?\b"
+    rf"|\b{_MONTHS}\s?[0-9]{{1,2}}\b"
+)
+_VENDOR_STORE_RE = re.compile(r"(?:#|\b(?:no\.?|store|str|branch|unit)\s*#?)\s*[0-9]+\b")
+_VENDOR_CHANNEL_RE = re.compile(r"\b(?:pos|contactless|card purchase|card payment|purchase|direct debit)\b")
+_VENDOR_REFERENCE_RE = re.compile(r"\b(?:ref(?:erence)?|txn|trans(?:action)? id|auth(?: code)?)\b\s*[:#]?\s*[a-z0-9-]*")
+_VENDOR_CONNECTIVE_RE = re.compile(r"^(?:to|from|at)\s+|\s+(?:on|at)$")
+# Transaction ids and store numbers left after the patterns above: any token
+# carrying three or more digits, plus bare numbers. Short alphanumerics such
+# as "o2" survive.
+_VENDOR_ID_TOKEN_RE = re.compile(r"\b(?:[a-z]*[0-9][a-z]*){3,}[a-z0-9]*\b|\b[0-9]+\b")
+_VENDOR_NON_ALNUM_RE = re.compile(r"[^a-z0-9&]+")
+
+
+def _clean(description: str) -> str:
+    if not description:
+        return "Unknown"
+    text = description.replace("\r", "\n")
+    first_line = next((line.strip() for line in text.split("\n") if line.strip()), "")
+    cleaned = first_line or text.strip()
+    cleaned = _PIPE_SUFFIX_RE.sub("", cleaned)
+    cleaned = _TXN_TYPE_RE.sub("", cleaned)
+    cleaned = _DIRECTION_PREFIX_RE.sub("", cleaned)
+    cleaned = _BANK_NAME_RE.sub("", cleaned)
+    cleaned = _DASH_NUMBER_SUFFIX_RE.sub("", cleaned)
+    cleaned = _REFERENCE_SUFFIX_RE.sub("", cleaned)
+    cleaned = _LONG_NUMBER_RE.sub("", cleaned)
+    cleaned = _WHITESPACE_RE.sub(" ", cleaned).strip(" -")
+    return cleaned or first_line or "Unknown"
+
+
+@lru_cache(maxsize=MERCHANT_CACHE_SIZE)
+def merchant_key(display_name: str) -> str:
+    key = _KEY_NON_ALNUM_RE.sub(" ", display_name.lower())
+    key = _KEY_STOPWORDS_RE.sub(" ", key)
+    key = _KEY_NUMBER_RE.sub(" ", key)
+    key = _WHITESPACE_RE.sub(" ", key).strip()
+    return key[:120] or "unknown"
+
+
+@lru_cache(maxsize=MERCHANT_CACHE_SIZE)
+def normalise_merchant(description: str) -> Tuple[str, str]:
+    """Return ``(display_name, merchant_key)`` for a raw transaction description."""
+    display_name = _clean(description)
+    return display_name, merchant_key(display_name)
+
+
+def clean_display_name(description) -> str:
+    return normalise_merchant(str(description) if description else "")[0]
+
+
+@lru_cache(maxsize=MERCHANT_CACHE_SIZE)
+def vendor_key(description: str) -> str:
+    """Normalised lookup key for ``vendor_categories``.
+
+    Strips card references, dates, store numbers and transaction ids so
+    "TESCO STORES 2231 CARD 4410 01FEB" and "TESCO STORES 1187" share the key
+    "tesco stores". Falls back to the lower-cased description when nothing
+    else is left, so unrelated vendors never collapse onto an empty key.
+    """
+    text = str(description or "").replace("\r", "\n")
+    first_line = next((line.strip() for line in text.split("\n") if line.strip()), "")
+    key = _PIPE_SUFFIX_RE.sub("", first_line.lower())
+    key = _VENDOR_CARD_RE.sub(" ", key)
+    key = _VENDOR_DATE_RE.sub(" ", key)
+    key = _VENDOR_STORE_RE.sub(" ", key)
+    key = _VENDOR_CHANNEL_RE.sub(" ", key)
+    key = _VENDOR_REFERENCE_RE.sub(" ", key)
+    key = _VENDOR_NON_ALNUM_RE.sub(" ", key)
+    key = _VENDOR_ID_TOKEN_RE.sub(" ", key)
+    key = _VENDOR_CONNECTIVE_RE.sub("", _WHITESPACE_RE.sub(" ", key).strip())
+    return (key or _WHITESPACE_RE.sub(" ", first_line.lower()).strip())[:120]
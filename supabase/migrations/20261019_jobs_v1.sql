@@ -0,0 +1,24 @@
+-- Background jobs: persisted state for long-running maintenance operations
+
+create table if not exists public.jobs (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null references public.users(id) on delete cascade,
+  kind text not null,
+  status text not null default 'queued' check (status in ('queued', 'running', 'succeeded', 'failed')),
+  params jsonb not null default '{}'::jsonb,
+  progress jsonb not null default '{}'::jsonb,
+  result jsonb,
+  error text,
+  attempts integer not null default 0,
+  max_attempts integer not null default 1,
+  created_at timestamptz not null default now(),
+  started_at timestamptz,
+  finished_at timestamptz,
+  updated_at timestamptz not null default now()
+);
+
+create index if not exists idx_jobs_user_created
+  on public.jobs(user_id, created_at desc);
+
+create index if not exists idx_jobs_status_created
+  on public.jobs(status, created_at);
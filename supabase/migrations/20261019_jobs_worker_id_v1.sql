@@ -0,0 +1,7 @@
+-- Background jobs: record the owning instance so a restart can fail its orphaned jobs
+
+alter table public.jobs
+  add column if not exists worker_id text;
+
+create index if not exists idx_jobs_worker_status
+  on public.jobs(worker_id, status);
@@ -0,0 +1,24 @@
+-- Incremental recurring detection: persisted per-merchant sufficient statistics
+
+create table if not exists public.recurring_merchant_stats (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null references public.users(id) on delete cascade,
+  account_id uuid not null references public.accounts(id) on delete cascade,
+  merchant_key text not null,
+  occurrence_count integer not null default 0,
+  amount_abs_sum numeric not null default 0,
+  amount_sq_sum numeric not null default 0,
+  first_seen_date date,
+  last_seen_date date,
+  recent_dates date[] not null default '{}'::date[],
+  interval_count integer not null default 0,
+  interval_sum bigint not null default 0,
+  interval_sq_sum bigint not null default 0,
+  display_name_counts jsonb not null default '{}'::jsonb,
+  category_counts jsonb not null default '{}'::jsonb,
+  updated_at timestamptz not null default now(),
+  constraint recurring_merchant_stats_user_account_merchant_unique unique (user_id, account_id, merchant_key)
+);
+
+create index if not exists idx_recurring_merchant_stats_user_merchant
+  on public.recurring_merchant_stats(user_id, merchant_key);
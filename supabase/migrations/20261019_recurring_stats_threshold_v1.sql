@@ -0,0 +1,4 @@
+-- Incremental recurring updates reuse the threshold of the user's last recompute
+
+alter table public.recurring_merchant_stats
+  add column if not exists min_occurrences integer not null default 2;
@@ -0,0 +1,59 @@
+-- Review data versions: bump once per statement instead of once per row
+
+create or replace function public.transactions_bump_review_data_versions()
+returns trigger
+language plpgsql
+as $$
+begin
+  -- One upsert per statement: each (user, account, month) the statement
+  -- touched is bumped exactly once, however many rows it changed.
+  if tg_op = 'INSERT' then
+    insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+    select user_id, account_id, month, 1, now()
+    from (select distinct user_id, account_id, date_trunc('month', date)::date as month from new_rows) changed
+    on conflict (user_id, account_id, month)
+    do update set version = public.review_data_versions.version + 1, updated_at = now();
+  elsif tg_op = 'DELETE' then
+    insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+    select user_id, account_id, month, 1, now()
+    from (select distinct user_id, account_id, date_trunc('month', date)::date as month from old_rows) changed
+    on conflict (user_id, account_id, month)
+    do update set version = public.review_data_versions.version + 1, updated_at = now();
+  else
+    insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+    select user_id, account_id, month, 1, now()
+    from (
+      select user_id, account_id, date_trunc('month', date)::date as month from old_rows
+      union
+      select user_id, account_id, date_trunc('month', date)::date as month from new_rows
+    ) changed
+    on conflict (user_id, account_id, month)
+    do update set version = public.review_data_versions.version + 1, updated_at = now();
+  end if;
+  return null;
+end;
+$$;
+
+-- Transition tables are only allowed on single-event triggers, hence three.
+drop trigger if exists trg_transactions_review_data_version on public.transactions;
+drop trigger if exists trg_transactions_review_data_version_insert on public.transactions;
+drop trigger if exists trg_transactions_review_data_version_update on public.transactions;
+drop trigger if exists trg_transactions_review_data_version_delete on public.transactions;
+
+create trigger trg_transactions_review_data_version_insert
+  after insert on public.transactions
+  referencing new table as new_rows
+  for each statement execute function public.transactions_bump_review_data_versions();
+
+create trigger trg_transactions_review_data_version_update
+  after update on public.transactions
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.transactions_bump_review_data_versions();
+
+create trigger trg_transactions_review_data_version_delete
+  after delete on public.transactions
+  referencing old table as old_rows
+  for each statement execute function public.transactions_bump_review_data_versions();
+
+drop function if exists public.transactions_bump_review_data_version();
+drop function if exists public.bump_review_data_version(uuid, uuid, date);
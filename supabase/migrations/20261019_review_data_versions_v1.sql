@@ -0,0 +1,50 @@
+-- Stale-aware reviews: per user/account/month data version maintained by trigger
+
+create table if not exists public.review_data_versions (
+  user_id uuid not null references public.users(id) on delete cascade,
+  account_id uuid,
+  month date not null,
+  version bigint not null default 0,
+  updated_at timestamptz not null default now(),
+  constraint review_data_versions_user_account_month_unique unique nulls not distinct (user_id, account_id, month)
+);
+
+create index if not exists idx_review_data_versions_user_month
+  on public.review_data_versions(user_id, month);
+
+alter table public.monthly_reviews add column if not exists data_version bigint;
+
+create or replace function public.bump_review_data_version(p_user_id uuid, p_account_id uuid, p_date date)
+returns void
+language sql
+as $$
+  insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+  values (p_user_id, p_account_id, date_trunc('month', p_date)::date, 1, now())
+  on conflict (user_id, account_id, month)
+  do update set version = public.review_data_versions.version + 1, updated_at = now();
+$$;
+
+create or replace function public.transactions_bump_review_data_version()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    perform public.bump_review_data_version(old.user_id, old.account_id, old.date);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    if tg_op = 'INSERT'
+      or new.user_id is distinct from old.user_id
+      or new.account_id is distinct from old.account_id
+      or date_trunc('month', new.date) is distinct from date_trunc('month', old.date) then
+      perform public.bump_review_data_version(new.user_id, new.account_id, new.date);
+    end if;
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_transactions_review_data_version on public.transactions;
+create trigger trg_transactions_review_data_version
+  after insert or update or delete on public.transactions
+  for each row execute function public.transactions_bump_review_data_version();
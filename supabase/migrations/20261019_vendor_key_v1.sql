@@ -0,0 +1,10 @@
+-- Normalised vendor key: variants of one merchant share a vendor_categories lookup key
+
+alter table public.vendor_categories
+  add column if not exists vendor_key text;
+
+create index if not exists idx_vendor_categories_vendor_key
+  on public.vendor_categories(vendor_key);
+
+-- Existing rows keep a null key; the API resolves them by exact vendor_name and
+-- fills the key in the first time they are hit.
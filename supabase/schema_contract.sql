@@ -65,6 +65,7 @@ alter table public.budget_targets
 create table if not exists public.vendor_categories (
   id uuid primary key default gen_random_uuid(),
   vendor_name text not null unique,
+  vendor_key text,
   category text not null,
   updated_at timestamptz not null default now()
 );
@@ -88,9 +89,19 @@ create table if not exists public.monthly_reviews (
   triggered_by text not null check (triggered_by in ('system_monthly', 'upload', 'manual')),
   statement_id uuid references public.statements(id) on delete set null,
   summary jsonb not null default '{}'::jsonb,
+  data_version bigint,
   created_at timestamptz not null default now()
 );
 
+create table if not exists public.review_data_versions (
+  user_id uuid not null references public.users(id) on delete cascade,
+  account_id uuid,
+  month date not null,
+  version bigint not null default 0,
+  updated_at timestamptz not null default now(),
+  constraint review_data_versions_user_account_month_unique unique nulls not distinct (user_id, account_id, month)
+);
+
 create table if not exists public.review_events (
   id uuid primary key default gen_random_uuid(),
   user_id uuid not null references public.users(id) on delete cascade,
@@ -145,6 +156,27 @@ create table if not exists public.recurring_rules (
   constraint recurring_rules_user_account_merchant_unique unique (user_id, account_id, merchant_key)
 );
 
+create table if not exists public.recurring_merchant_stats (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null references public.users(id) on delete cascade,
+  account_id uuid not null references public.accounts(id) on delete cascade,
+  merchant_key text not null,
+  min_occurrences integer not null default 2,
+  occurrence_count integer not null default 0,
+  amount_abs_sum numeric not null default 0,
+  amount_sq_sum numeric not null default 0,
+  first_seen_date date,
+  last_seen_date date,
+  recent_dates date[] not null default '{}'::date[],
+  interval_count integer not null default 0,
+  interval_sum bigint not null default 0,
+  interval_sq_sum bigint not null default 0,
+  display_name_counts jsonb not null default '{}'::jsonb,
+  category_counts jsonb not null default '{}'::jsonb,
+  updated_at timestamptz not null default now(),
+  constraint recurring_merchant_stats_user_account_merchant_unique unique (user_id, account_id, merchant_key)
+);
+
 create table if not exists public.financial_goals (
   id uuid primary key default gen_random_uuid(),
   user_id uuid not null references public.users(id) on delete cascade,
@@ -160,6 +192,24 @@ create table if not exists public.financial_goals (
   updated_at timestamptz not null default now()
 );
 
+create table if not exists public.jobs (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid not null references public.users(id) on delete cascade,
+  kind text not null,
+  status text not null default 'queued' check (status in ('queued', 'running', 'succeeded', 'failed')),
+  params jsonb not null default '{}'::jsonb,
+  progress jsonb not null default '{}'::jsonb,
+  result jsonb,
+  error text,
+  attempts integer not null default 0,
+  max_attempts integer not null default 1,
+  worker_id text,
+  created_at timestamptz not null default now(),
+  started_at timestamptz,
+  finished_at timestamptz,
+  updated_at timestamptz not null default now()
+);
+
 do $$
 begin
   if not exists (
@@ -210,6 +260,9 @@ create index if not exists idx_budget_targets_user
 create index if not exists idx_learned_rules_user
   on public.learned_rules(user_id);
 
+create index if not exists idx_vendor_categories_vendor_key
+  on public.vendor_categories(vendor_key);
+
 create unique index if not exists idx_monthly_reviews_idempotency
   on public.monthly_reviews (
     user_id,
@@ -220,6 +273,9 @@ create unique index if not exists idx_monthly_reviews_idempotency
     coalesce(statement_id, '00000000-0000-0000-0000-000000000000'::uuid)
   );
 
+create index if not exists idx_review_data_versions_user_month
+  on public.review_data_versions(user_id, month);
+
 create index if not exists idx_monthly_reviews_user_created
   on public.monthly_reviews(user_id, created_at desc);
 
@@ -262,6 +318,9 @@ create index if not exists idx_recurring_rules_user_next_expected
 create index if not exists idx_recurring_rules_user_account_status
   on public.recurring_rules(user_id, account_id, status, next_expected_date);
 
+create index if not exists idx_recurring_merchant_stats_user_merchant
+  on public.recurring_merchant_stats(user_id, merchant_key);
+
 create index if not exists idx_financial_goals_user_status_created
   on public.financial_goals(user_id, status, created_at desc);
 
@@ -270,3 +329,67 @@ create index if not exists idx_financial_goals_user_target_date
 
 create index if not exists idx_financial_goals_user_scope_status
   on public.financial_goals(user_id, account_scope, status, target_date);
+
+create index if not exists idx_jobs_user_created
+  on public.jobs(user_id, created_at desc);
+
+create index if not exists idx_jobs_status_created
+  on public.jobs(status, created_at);
+
+create index if not exists idx_jobs_worker_status
+  on public.jobs(worker_id, status);
+
+create or replace function public.transactions_bump_review_data_versions()
+returns trigger
+language plpgsql
+as $$
+begin
+  -- One upsert per statement: each (user, account, month) the statement
+  -- touched is bumped exactly once, however many rows it changed.
+  if tg_op = 'INSERT' then
+    insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+    select user_id, account_id, month, 1, now()
+    from (select distinct user_id, account_id, date_trunc('month', date)::date as month from new_rows) changed
+    on conflict (user_id, account_id, month)
+    do update set version = public.review_data_versions.version + 1, updated_at = now();
+  elsif tg_op = 'DELETE' then
+    insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+    select user_id, account_id, month, 1, now()
+    from (select distinct user_id, account_id, date_trunc('month', date)::date as month from old_rows) changed
+    on conflict (user_id, account_id, month)
+    do update set version = public.review_data_versions.version + 1, updated_at = now();
+  else
+    insert into public.review_data_versions (user_id, account_id, month, version, updated_at)
+    select user_id, account_id, month, 1, now()
+    from (
+      select user_id, account_id, date_trunc('month', date)::date as month from old_rows
+      union
+      select user_id, account_id, date_trunc('month', date)::date as month from new_rows
+    ) changed
+    on conflict (user_id, account_id, month)
+    do update set version = public.review_data_versions.version + 1, updated_at = now();
+  end if;
+  return null;
+end;
+$$;
+
+-- Transition tables are only allowed on single-event triggers, hence three.
+drop trigger if exists trg_transactions_review_data_version on public.transactions;
+drop trigger if exists trg_transactions_review_data_version_insert on public.transactions;
+drop trigger if exists trg_transactions_review_data_version_update on public.transactions;
+drop trigger if exists trg_transactions_review_data_version_delete on public.transactions;
+
+create trigger trg_transactions_review_data_version_insert
+  after insert on public.transactions
+  referencing new table as new_rows
+  for each statement execute function public.transactions_bump_review_data_versions();
+
+create trigger trg_transactions_review_data_version_update
+  after update on public.transactions
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.transactions_bump_review_data_versions();
+
+create trigger trg_transactions_review_data_version_delete
+  after delete on public.transactions
+  referencing old table as old_rows
+  for each statement execute function public.transactions_bump_review_data_versions();
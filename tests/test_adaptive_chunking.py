@@ -0,0 +1,123 @@
+import json
+from unittest.mock import MagicMock
+
+from api.adaptive_chunking import AdaptiveChunker
+from api import groq_service
+from api.groq_service import CATEGORISATION_MODEL, GroqService
+from api.llm_cache import LLMResponseCache
+from api.local_categoriser import LocalCategoriser
+from api.vendor_index import VendorIndex
+
+
+def test_chunker_caps_by_tokens_and_adapts_to_outcomes():
+    chunker = AdaptiveChunker(initial_size=15, max_tokens=600)
+    assert chunker.limit() == 8  # 600 * 0.8 / 60 tokens per item
+
+    chunker.record(8, 0, truncated=True)
+    assert chunker.size == 4
+    chunker.record(4, 4, truncated=False, completion_tokens=120)
+    assert chunker.size == 5
+    assert chunker.completion_tokens_per_item < 60
+    chunker.record(5, 3, truncated=False)
+    assert chunker.size == 2
+
+    items = [{"transaction_id": str(i), "description": "x" * 400} for i in range(5)]
+    assert [len(c) for c in AdaptiveChunker(10, 6000, prompt_budget=250).split(items)] == [2, 2, 1]
+
+
+def test_failed_chunks_are_bisected_not_retried_one_by_one():
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+    )
+    service.local_model.sync = lambda client, force=False: 0
+    sizes = []
+
+    def fake_groq(system, user, max_tokens=600, cache=False, meta=None):
+        chunk = json.loads(user.split("\nTransactions: ", 1)[1])
+        sizes.append(len(chunk))
+        if len(chunk) > 4:
+            meta["finish_reason"] = "length"
+            raise ValueError("Unterminated string")
+        meta.update(finish_reason="stop", completion_tokens=50 * len(chunk))
+        return {"suggestions": [
+            {"transaction_id": t["transaction_id"], "suggested_category": "Food", "confidence": 90, "reason": "x"}
+            for t in chunk
+        ]}
+
+    service._call_groq_json = fake_groq
+    transactions = [{"id": f"t{i}", "description": f"QWZX {chr(65 + i)}", "amount": -1, "date": "2026-10-01"} for i in range(16)]
+
+    results = service.suggest_transaction_categories(transactions, ["Food", "Bills"])
+
+    assert [r["transaction_id"] for r in results] == [f"t{i}" for i in range(16)]
+    assert {r["model_name"] for r in results} == {CATEGORISATION_MODEL}
+    # 15 -> 7 (-> 3 + 4) and 8 (-> 4 + 4), then the 16th item: 8 calls where
+    # the fixed 15/5/1 passes made 2 + 3 + 15.
+    assert sizes == [15, 7, 3, 4, 8, 4, 4, 1]
+    assert service.suggestion_chunker.size <= 4
+
+
+
+def test_bisection_of_an_always_failing_chunk_stops_at_the_retry_budget(monkeypatch):
+    monkeypatch.setattr(groq_service, "SUGGESTION_RETRIES_PER_CHUNK", 3)
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+    )
+    service.local_model.sync = lambda client, force=False: 0
+    service.categorise_vendors = lambda vendors, force_groq=False, user_id=None: {}
+    sizes = []
+
+    def fake_groq(system, user, max_tokens=600, cache=False, meta=None):
+        sizes.append(len(json.loads(user.split("\nTransactions: ", 1)[1])))
+        raise ValueError("Expecting value")
+
+    service._call_groq_json = fake_groq
+    transactions = [{"id": f"t{i}", "description": f"QWZX {chr(65 + i)}", "amount": -1, "date": "2026-10-01"} for i in range(15)]
+
+    results = service.suggest_transaction_categories(transactions, ["Food", "Bills"])
+
+    # One chunk plus three retries instead of the 29 calls of a full bisection.
+    assert sizes == [15, 7, 3, 1]
+    assert len(results) == 15
+    assert {r["reason"] for r in results} == {"No suggestion returned"}
+
+def test_identical_descriptions_are_sent_once_and_fanned_out():
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+    )
+    service.local_model.sync = lambda client, force=False: 0
+    sent = []
+
+    def fake_groq(system, user, max_tokens=600, cache=False, meta=None):
+        chunk = json.loads(user.split("\nTransactions: ", 1)[1])
+        sent.extend(t["description"] for t in chunk)
+        category = {"TFL TRAVEL CHARGE 01FEB": "Transport", "QWZX PLUMBING": "Bills"}
+        return {"suggestions": [
+            {"transaction_id": t["transaction_id"], "suggested_category": category[t["description"]], "confidence": 88}
+            for t in chunk
+        ]}
+
+    service._call_groq_json = fake_groq
+    transactions = [
+        {"id": f"tfl{i}", "description": f"TFL TRAVEL CHARGE {i + 1:02d}FEB", "amount": -2.8, "date": "2026-02-01"}
+        for i in range(20)
+    ] + [{"id": "p1", "description": "QWZX PLUMBING", "amount": -90, "date": "2026-02-03"}]
+
+    results = service.suggest_transaction_categories(transactions, ["Transport", "Bills"])
+
+    assert sent == ["TFL TRAVEL CHARGE 01FEB", "QWZX PLUMBING"]
+    assert [r["transaction_id"] for r in results] == [t["id"] for t in transactions]
+    assert {r["suggested_category"] for r in results[:20]} == {"Transport"}
+    assert results[-1]["suggested_category"] == "Bills"
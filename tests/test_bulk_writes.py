@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from api import bulk_writes
+from api.bulk_writes import CategoryWriteSet, apply_categories_bulk
+
+
+def test_apply_categories_bulk_groups_ids_by_category(monkeypatch):
+    monkeypatch.setattr(bulk_writes, "IN_FILTER_CHUNK_SIZE", 2)
+    client = MagicMock()
+    q = client.table.return_value
+    q.update.return_value = q
+    q.in_.return_value = q
+    q.eq.return_value = q
+
+    result = apply_categories_bulk(client, "user-1", {"t1": "Food", "t2": "Bills", "t3": "Food", "t4": "Food"})
+
+    assert result == {"updated": 4, "failed_ids": [], "round_trips": 3}
+    in_calls = [c.args for c in q.in_.call_args_list]
+    assert in_calls == [("id", ["t1", "t3"]), ("id", ["t4"]), ("id", ["t2"])]
+    q.eq.assert_called_with("user_id", "user-1")
+
+
+def test_apply_categories_bulk_reports_failed_chunks():
+    client = MagicMock()
+    q = client.table.return_value
+    q.update.return_value = q
+    q.in_.return_value = q
+    q.eq.return_value = q
+    q.execute.side_effect = [RuntimeError("boom"), None]
+
+    result = apply_categories_bulk(client, "user-1", {"t1": "Food", "t2": "Bills"})
+
+    assert result["updated"] == 1
+    assert result["failed_ids"] == ["t1"]
+
+
+def test_write_set_upserts_vendor_cache_even_if_learned_rules_fail():
+    client = MagicMock()
+    q = client.table.return_value
+    q.update.return_value = q
+    q.in_.return_value = q
+    q.eq.return_value = q
+    q.upsert.return_value = q
+    q.execute.side_effect = [None, RuntimeError("learned_rules down"), None]
+
+    writes = CategoryWriteSet(client, "user-1")
+    writes.stage("t1", "Food", "TESCO STORES", learn=True)
+    result = writes.flush("2026-10-19T00:00:00")
+
+    assert [c.args[0] for c in client.table.call_args_list] == ["transactions", "learned_rules", "vendor_categories"]
+    assert result["round_trips"] == 3
+    assert q.upsert.call_args.args[0][0]["vendor_name"] == "TESCO STORES"
+
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.auth import get_current_user
+from api.routes import categories as categories_route
+
+
+def _query(data):
+    q = MagicMock()
+    for name in ("select", "eq", "order", "range", "update", "in_"):
+        getattr(q, name).return_value = q
+    q.execute.return_value = SimpleNamespace(data=data)
+    return q
+
+
+def _client(mock_supabase):
+    categories_route.supabase_admin = mock_supabase
+    app = FastAPI()
+    app.include_router(categories_route.router, prefix="/api")
+    app.dependency_overrides[get_current_user] = lambda: "user-1"
+    return TestClient(app)
+
+
+def _tables(transactions):
+    categories_q = _query([{"category": "Bills", "keywords": ["Tesco Mobile"]}, {"category": "Food", "keywords": ["tesco"]}])
+    tx_q = _query(transactions)
+    return categories_q, tx_q
+
+
+TRANSACTIONS = [
+    {"id": "t1", "description": "TESCO MOBILE DD", "category": "Food"},
+    {"id": "t2", "description": "Tesco Stores", "category": "Uncategorized"},
+    {"id": "t3", "description": "Tesco Express", "category": "Food"},
+    {"id": "t4", "description": "Cinema", "category": "Uncategorized"},
+]
+
+
+def test_recategorise_all_dry_run_reports_diff_without_writing():
+    categories_q, tx_q = _tables(TRANSACTIONS)
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [categories_q, tx_q]
+
+    response = _client(mock_supabase).post("/api/categories/recategorise-all", json={"dry_run": True})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["dry_run"] is True
+    assert payload["scanned"] == 4
+    assert payload["matched"] == 3
+    assert payload["changed"] == 2
+    assert payload["changes_by_category"] == {"Bills": 1, "Food": 1}
+    tx_q.update.assert_not_called()
+
+
+def test_recategorise_all_applies_grouped_updates():
+    categories_q, tx_q = _tables(TRANSACTIONS)
+    update_q = _query([])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [categories_q, tx_q, update_q, update_q]
+
+    response = _client(mock_supabase).post("/api/categories/recategorise-all", json={})
+
+    assert response.json()["changed"] == 2
+    assert [c.args for c in update_q.in_.call_args_list] == [("id", ["t1"]), ("id", ["t2"])]
@@ -1,3 +1,8 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
@@ -7,7 +12,7 @@ from api.routes import categorisation as categorisation_route
 
 
 class DummyGroq:
-    def suggest_transaction_categories(self, transactions, allowed_categories):
+    def suggest_transaction_categories(self, transactions, allowed_categories, user_id=None):
         return [
             {
                 "transaction_id": transactions[0]["id"],
@@ -19,6 +24,38 @@ class DummyGroq:
         ]
 
 
+def _resolve_tfl(rows, user_id):
+    for row in rows:
+        if row["description"] == "TFL TRAVEL":
+            row["category"] = "Transport"
+    return rows
+
+
+@pytest.fixture
+def suggest_pipeline(monkeypatch):
+    """Suggest route with the rule stages stubbed and Supabase writes mocked.
+
+    Set ``transactions`` and ``categories`` on the returned namespace; "TFL
+    TRAVEL" rows are resolved by the user-keyword stage, and inserted
+    suggestion rows are collected in ``inserted``.
+    """
+    mock_supabase = MagicMock()
+    q = mock_supabase.table.return_value
+    for name in ("update", "in_", "eq", "upsert"):
+        getattr(q, name).return_value = q
+    state = SimpleNamespace(supabase=mock_supabase, query=q, transactions=[], categories=[], inserted=[])
+    monkeypatch.setattr(categorisation_route, "supabase_admin", mock_supabase)
+    monkeypatch.setattr(categorisation_route, "_validate_account_scope", lambda user_id, account_id: "all")
+    monkeypatch.setattr(categorisation_route, "_fetch_uncategorised_transactions", lambda user_id, scope: state.transactions)
+    monkeypatch.setattr(categorisation_route, "apply_user_keywords", _resolve_tfl)
+    monkeypatch.setattr(categorisation_route, "_apply_builtin_keyword_rules", lambda rows: rows)
+    monkeypatch.setattr(categorisation_route, "apply_transfer_classification", lambda rows: rows)
+    monkeypatch.setattr(categorisation_route, "_get_available_categories", lambda user_id: state.categories)
+    monkeypatch.setattr(categorisation_route, "_insert_suggestions", state.inserted.extend)
+    monkeypatch.setattr(categorisation_route, "_log_event", lambda *args, **kwargs: None)
+    return state
+
+
 def _client():
     app = FastAPI()
     app.include_router(categorisation_route.router, prefix="/api")
@@ -68,3 +105,117 @@ def test_approve_rejects_empty_input():
     response = client.post("/api/categorise/approve", json={"suggestion_ids": []})
     assert response.status_code == 400
     assert "No suggestion_ids provided" in response.text
+
+
+def test_suggest_flushes_applies_and_learning_in_bulk(suggest_pipeline):
+    suggest_pipeline.transactions = [
+        {"id": "txn-1", "account_id": "acc-1", "date": "2026-04-10", "description": "TFL TRAVEL", "amount": -3.0, "category": "Uncategorized"},
+        {"id": "txn-2", "account_id": "acc-1", "date": "2026-04-11", "description": "TFL TRAVEL", "amount": -3.0, "category": "Uncategorized"},
+        {"id": "txn-3", "account_id": "acc-1", "date": "2026-04-12", "description": "Tesco Superstore", "amount": -9.0, "category": "Uncategorized"},
+    ]
+    suggest_pipeline.categories = ["Food", "Transport"]
+
+    class ConfidentGroq:
+        def suggest_transaction_categories(self, transactions, allowed_categories, user_id=None):
+            return [
+                {"transaction_id": "txn-3", "suggested_category": "Food", "confidence": 95, "reason": "grocer", "model_name": "m"}
+            ]
+
+    client = _client()
+    client.app.dependency_overrides[get_groq_service] = lambda: ConfidentGroq()
+    response = client.post("/api/categorise/suggest", json={"account_id": "all", "threshold": 85})
+
+    assert response.status_code == 200
+    assert response.json()["auto_applied"] == 3
+    tables = [c.args[0] for c in suggest_pipeline.supabase.table.call_args_list]
+    assert tables == ["transactions", "transactions", "learned_rules", "vendor_categories"]
+    learned_rows = suggest_pipeline.query.upsert.call_args_list[0].args[0]
+    assert sorted(row["description"] for row in learned_rows) == ["TFL TRAVEL", "Tesco Superstore"]
+    assert {row["status"] for row in suggest_pipeline.inserted} == {"auto_applied"}
+
+
+def test_approve_uses_set_based_reads_and_writes(monkeypatch):
+    def query(data):
+        q = MagicMock()
+        for name in ("select", "eq", "in_", "update", "upsert"):
+            getattr(q, name).return_value = q
+        q.execute.return_value = SimpleNamespace(data=data)
+        return q
+
+    suggestions_q = query(
+        [
+            {"id": "s-1", "transaction_id": "txn-1", "suggested_category": "Food", "confidence": 90, "status": "pending"},
+            {"id": "s-2", "transaction_id": "txn-2", "suggested_category": "Food", "confidence": 90, "status": "pending"},
+            {"id": "s-3", "transaction_id": "txn-3", "suggested_category": "Bills", "confidence": 50, "status": "pending"},
+            {"id": "s-4", "transaction_id": "txn-4", "suggested_category": "Bills", "confidence": 90, "status": "approved"},
+        ]
+    )
+    tx_q = query(
+        [
+            {"id": "txn-1", "description": "Tesco"},
+            {"id": "txn-2", "description": "Tesco"},
+            {"id": "txn-3", "description": "Thames Water"},
+        ]
+    )
+    write_q = query([])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [suggestions_q, tx_q] + [write_q] * 6
+    monkeypatch.setattr(categorisation_route, "supabase_admin", mock_supabase)
+    monkeypatch.setattr(categorisation_route, "_log_event", lambda *args, **kwargs: None)
+
+    response = _client().post("/api/categorise/approve", json={"suggestion_ids": ["s-1", "s-2", "s-3", "s-4"]})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["changed"] == 3
+    # suggestions read, transactions read, 2 category updates, learned_rules, vendor_categories, 2 status updates
+    assert payload["round_trips"] == 8
+    tables = [c.args[0] for c in mock_supabase.table.call_args_list]
+    assert tables == [
+        "categorisation_suggestions",
+        "transactions",
+        "transactions",
+        "transactions",
+        "learned_rules",
+        "vendor_categories",
+        "categorisation_suggestions",
+        "categorisation_suggestions",
+    ]
+    learned = [c.args[0] for c in write_q.upsert.call_args_list][0]
+    assert [row["description"] for row in learned] == ["Tesco"]
+
+
+def test_suggest_stream_emits_stage_events(suggest_pipeline):
+    suggest_pipeline.transactions = [
+        {"id": "txn-1", "account_id": "acc-1", "date": "2026-04-10", "description": "TFL TRAVEL", "amount": -3.0, "category": "Uncategorized"},
+        {"id": "txn-2", "account_id": "acc-1", "date": "2026-04-11", "description": "Tesco Superstore", "amount": -9.0, "category": "Uncategorized"},
+        {"id": "txn-3", "account_id": "acc-1", "date": "2026-04-12", "description": "QWZX Plumbing", "amount": -90.0, "category": "Uncategorized"},
+    ]
+    suggest_pipeline.categories = ["Food", "Transport", "Bills"]
+
+    class ChunkedGroq:
+        def suggest_transaction_categories(self, transactions, allowed_categories, on_chunk=None, user_id=None):
+            chunks = [
+                [{"transaction_id": "txn-2", "suggested_category": "Food", "confidence": 95, "reason": "grocer", "model_name": "m"}],
+                [{"transaction_id": "txn-3", "suggested_category": "Bills", "confidence": 40, "reason": "?", "model_name": "m"}],
+            ]
+            for chunk in chunks:
+                on_chunk(chunk)
+            return [s for chunk in chunks for s in chunk]
+
+    client = _client()
+    client.app.dependency_overrides[get_groq_service] = lambda: ChunkedGroq()
+    response = client.post("/api/categorise/suggest/stream", json={"account_id": "all", "threshold": 85})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    assert [name for name, _ in events] == ["started", "rules", "suggestions", "suggestions", "applied", "complete"]
+    assert [item["transaction"]["id"] for item in events[1][1]["items"]] == ["txn-1"]
+    assert events[2][1]["auto_apply_staged"] == 1
+    assert events[3][1]["items"][0]["suggestion"]["status"] == "pending"
+    assert events[4][1]["auto_applied"] == 2
+    assert events[5][1]["needs_review"] == 1
@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import api.circuit_breaker as circuit_breaker
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError, is_service_failure
+from api.groq_service import GroqService
+from api.llm_cache import LLMResponseCache
+from api.local_categoriser import LocalCategoriser
+from api.vendor_index import VendorIndex
+
+
+def test_opens_on_failure_rate_and_probes_when_half_open(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("groq", failure_rate=0.5, min_calls=4, window=10, open_seconds=30)
+
+    for ok in (True, True, False):
+        breaker.before_call()
+        breaker.record_success() if ok else breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] += 31
+    assert breaker.state == "half_open"
+    breaker.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.stats() == {"state": "closed", "window_calls": 1, "window_failures": 0, "rejected": 2}
+
+
+def test_open_circuit_degrades_suggestions_without_waiting_on_groq():
+    breaker = CircuitBreaker("groq", failure_rate=0.5, min_calls=2, window=10, open_seconds=60)
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+        breaker=breaker,
+    )
+    service.local_model.sync = lambda client, force=False: 0
+    service.vendor_index.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {v: "Food" for v in vendors if v == "TESCO STORES"}
+    service.client = MagicMock()
+    service.client.chat.completions.create.side_effect = TimeoutError("read timed out")
+    transactions = [
+        {"id": f"t{i}", "description": name, "amount": -1, "date": "2026-10-01"}
+        for i, name in enumerate(["TESCO STORES", "QWZX A", "QWZX B", "QWZX C", "QWZX D"])
+    ]
+    service.suggestion_chunker.size = 1
+
+    results = service.suggest_transaction_categories(transactions, ["Food", "Bills"])
+
+    # Two timeouts open the circuit; the remaining chunks never reach the client.
+    assert service.client.chat.completions.create.call_count == 2
+    assert breaker.state == "open"
+    assert [r["suggested_category"] for r in results] == ["Food", "Uncategorized", "Uncategorized", "Uncategorized", "Uncategorized"]
+    assert service.categorise_vendors(["QWZX E"]) == {"QWZX E": "Uncategorized"}
+    assert service.client.chat.completions.create.call_count == 2
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+def test_only_outages_count_as_breaker_failures():
+    assert is_service_failure(TimeoutError("read timed out"))
+    assert is_service_failure(APIConnectionError("reset"))
+    assert is_service_failure(_StatusError(429))
+    assert is_service_failure(_StatusError(503))
+    assert not is_service_failure(_StatusError(400))
+    assert not is_service_failure(_StatusError(422))
+    assert not is_service_failure(ValueError("Expecting value"))
+
+    breaker = CircuitBreaker("groq", failure_rate=0.5, min_calls=2, window=10, open_seconds=60)
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+        breaker=breaker,
+    )
+    service.client = MagicMock()
+    service.client.chat.completions.create.side_effect = _StatusError(400)
+    for _ in range(4):
+        with pytest.raises(_StatusError):
+            service._call_groq_json("system", "user")
+
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.stats()["window_failures"] == 0
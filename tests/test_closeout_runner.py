@@ -0,0 +1,96 @@
+import json
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from api import closeout_runner, review_service
+
+
+def _query(data):
+    q = MagicMock()
+    for name in ("select", "eq", "gte", "lt", "lte", "is_", "order", "range", "insert"):
+        getattr(q, name).return_value = q
+    q.execute.return_value = SimpleNamespace(data=data)
+    return q
+
+
+def test_close_out_user_builds_missing_scopes_from_one_fetch(monkeypatch):
+    transactions = [
+        {"date": "2026-09-03", "description": "Tesco", "amount": -30.0, "category": "Food", "account_id": "acc-1"},
+        {"date": "2026-09-04", "description": "Cinema", "amount": -20.0, "category": "Fun", "account_id": "acc-2"},
+    ]
+    existing_q = _query([{"account_scope": "acc-2"}])
+    versions_q = _query([{"account_id": "acc-1", "month": "2026-09-01", "version": 4}])
+    txns_q = _query(transactions)
+    targets_q = _query([])
+    insert_q = _query([{"id": "r-1", "user_id": "user-1"}, {"id": "r-2", "user_id": "user-1"}])
+    events_q = _query([])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [existing_q, versions_q, txns_q, targets_q, insert_q, events_q]
+    monkeypatch.setattr(closeout_runner, "supabase_admin", mock_supabase)
+    monkeypatch.setattr(review_service, "supabase_admin", mock_supabase)
+
+    created = closeout_runner.close_out_user("user-1", ["acc-1", "acc-2"], date(2026, 9, 1), date(2026, 9, 30))
+
+    assert created == 2
+    rows = insert_q.insert.call_args[0][0]
+    assert [row["account_scope"] for row in rows] == ["all", "acc-1"]
+    assert rows[0]["summary"]["totals"]["spent"] == 50.0
+    assert rows[1]["summary"]["totals"]["spent"] == 30.0
+    assert all(row["triggered_by"] == "system_monthly" for row in rows)
+    assert [row["data_version"] for row in rows] == [4, 4]
+    # offset paging needs a unique tiebreaker after the date ordering
+    assert [c.args for c in txns_q.order.call_args_list] == [("date",), ("id",)]
+    # budget targets are loaded once for both scopes
+    assert [c.args[0] for c in mock_supabase.table.call_args_list].count("budget_targets") == 1
+
+
+def test_run_closeout_resumes_from_checkpoint(monkeypatch, tmp_path):
+    checkpoint = tmp_path / "closeout.json"
+    checkpoint.write_text(json.dumps({"period_start": "2026-09-01", "completed_users": ["user-1"]}))
+    monkeypatch.setattr(closeout_runner, "list_user_accounts", lambda: {"user-1": ["a"], "user-2": ["b"]})
+    processed = []
+    monkeypatch.setattr(
+        closeout_runner,
+        "close_out_user",
+        lambda uid, accts, start, end: processed.append(uid) or 2,
+    )
+
+    result = closeout_runner.run_closeout(date(2026, 9, 1), date(2026, 9, 30), workers=2, checkpoint_path=checkpoint)
+
+    assert processed == ["user-2"]
+    assert result["users_skipped_checkpoint"] == 1
+    assert result["reviews_created"] == 2
+    assert json.loads(checkpoint.read_text())["completed_users"] == ["user-1", "user-2"]
+
+
+def test_insert_reviews_skips_duplicates_but_raises_other_errors(monkeypatch):
+    from postgrest.exceptions import APIError
+
+    duplicate = APIError({"code": "23505", "message": "duplicate key value violates unique constraint"})
+    timeout = APIError({"code": "57014", "message": "canceling statement due to statement timeout"})
+    rows = [{"user_id": "user-1", "account_scope": "all"}, {"user_id": "user-1", "account_scope": "acc-1"}]
+
+    def table_for(per_row_errors):
+        outcomes = iter([duplicate, *per_row_errors])
+
+        def execute():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return SimpleNamespace(data=outcome)
+
+        q = _query([])
+        q.execute.side_effect = execute
+        client = MagicMock()
+        client.table.return_value = q
+        return client
+
+    monkeypatch.setattr(closeout_runner, "supabase_admin", table_for([duplicate, [{"id": "r-2"}], []]))
+    assert closeout_runner._insert_reviews(rows) == 1
+
+    monkeypatch.setattr(closeout_runner, "supabase_admin", table_for([timeout]))
+    with pytest.raises(APIError):
+        closeout_runner._insert_reviews(rows)
@@ -54,6 +54,7 @@ def test_create_goal_rejects_invalid_account_scope():
 
 
 def test_get_goals_affordability_returns_items():
+    budget_route._AFFORDABILITY_CACHE.clear()
     goals_q = _mock_query(
         data=[
             {
@@ -72,7 +73,7 @@ def test_get_goals_affordability_returns_items():
     tx_q = _mock_query(data=[])
 
     mock_supabase = MagicMock()
-    mock_supabase.table.side_effect = [goals_q, tx_q]
+    mock_supabase.table.side_effect = [goals_q, _mock_query(data=[]), tx_q]
 
     client = _client(mock_supabase)
     response = client.get("/api/goals-affordability?status=active")
@@ -82,3 +83,102 @@ def test_get_goals_affordability_returns_items():
     assert len(payload["items"]) == 1
     assert payload["items"][0]["goal"]["id"] == "goal-1"
     assert "required_monthly_saving" in payload["items"][0]["affordability"]
+
+
+def test_goals_affordability_shares_one_lookback_fetch_across_scopes():
+    budget_route._AFFORDABILITY_CACHE.clear()
+    goals_q = _mock_query(
+        data=[
+            {
+                "id": f"goal-{idx}",
+                "user_id": "user-1",
+                "account_scope": scope,
+                "name": "Goal",
+                "goal_type": "savings_target",
+                "target_amount": 1000,
+                "current_saved": 0,
+                "target_date": "2030-01-01",
+                "status": "active",
+            }
+            for idx, scope in enumerate(["all", "acc-1", "acc-2", "acc-1"])
+        ]
+    )
+    tx_q = _mock_query(
+        data=[
+            {"date": "2026-01-05", "amount": 2000, "category": "Income", "account_id": "acc-1"},
+            {"date": "2026-01-09", "amount": -500, "category": "Food", "account_id": "acc-1"},
+            {"date": "2026-01-12", "amount": -300, "category": "Transfer", "account_id": "acc-2"},
+            {"date": "2026-01-20", "amount": -100, "category": "Bills", "account_id": "acc-2"},
+        ]
+    )
+
+    versions_q = _mock_query(data=[{"version": 4}])
+
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [goals_q, versions_q, tx_q]
+
+    client = _client(mock_supabase)
+    response = client.get("/api/goals-affordability?status=active")
+
+    assert response.status_code == 200
+    avg_by_goal = {
+        item["goal"]["id"]: item["affordability"]["avg_net_monthly_saving"]
+        for item in response.json()["items"]
+    }
+    assert avg_by_goal == {"goal-0": 1400.0, "goal-1": 1500.0, "goal-2": -100.0, "goal-3": 1500.0}
+    tx_q.execute.assert_called_once()
+    budget_route._AFFORDABILITY_CACHE.clear()
+
+
+def test_goals_affordability_cache_follows_transaction_data_version():
+    budget_route._AFFORDABILITY_CACHE.clear()
+    goals_q = _mock_query(
+        data=[
+            {
+                "id": "goal-1",
+                "user_id": "user-1",
+                "account_scope": "all",
+                "name": "Goal",
+                "goal_type": "savings_target",
+                "target_amount": 1000,
+                "current_saved": 0,
+                "target_date": "2030-01-01",
+                "status": "active",
+            }
+        ]
+    )
+    tx_before = _mock_query(data=[{"date": "2026-01-05", "amount": 500, "category": "Income", "account_id": "acc-1"}])
+    tx_after = _mock_query(data=[{"date": "2026-01-05", "amount": 800, "category": "Income", "account_id": "acc-1"}])
+
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [
+        goals_q, _mock_query(data=[{"version": 1}]), tx_before,
+        goals_q, _mock_query(data=[{"version": 1}]),
+        goals_q, _mock_query(data=[{"version": 2}]), tx_after,
+    ]
+    client = _client(mock_supabase)
+
+    def avg():
+        response = client.get("/api/goals-affordability?status=active")
+        assert response.status_code == 200
+        return response.json()["items"][0]["affordability"]["avg_net_monthly_saving"]
+
+    assert avg() == 500.0
+    assert avg() == 500.0
+    assert avg() == 800.0
+    tx_before.execute.assert_called_once()
+    budget_route._AFFORDABILITY_CACHE.clear()
+
+
+def test_affordability_cache_evicts_least_recently_used_users(monkeypatch):
+    budget_route._AFFORDABILITY_CACHE.clear()
+    monkeypatch.setattr(budget_route, "AFFORDABILITY_CACHE_MAX_USERS", 2)
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = lambda name: _mock_query(data=[])
+    budget_route.supabase_admin = mock_supabase
+
+    for user_id in ("user-1", "user-2", "user-1", "user-3"):
+        budget_route._get_net_monthly_savings(user_id)
+
+    assert [key[0] for key in budget_route._AFFORDABILITY_CACHE] == ["user-1", "user-3"]
+    budget_route._AFFORDABILITY_CACHE.clear()
@@ -0,0 +1,29 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from api.main import _insight_month_totals
+
+
+def test_insight_totals_fetch_only_current_and_previous_month():
+    q = MagicMock()
+    for name in ("select", "eq", "gte", "lt"):
+        getattr(q, name).return_value = q
+    q.execute.return_value = SimpleNamespace(
+        data=[
+            {"date": "2026-09-30", "amount": -10.0, "category": "Food"},
+            {"date": "2026-10-02", "amount": -5.25, "category": "Food"},
+            {"date": "2026-10-03", "amount": -2.0, "category": "Food"},
+            {"date": "2026-10-04", "amount": -100.0, "category": "Transfer"},
+            {"date": "2026-10-05", "amount": 900.0, "category": "Income"},
+        ]
+    )
+    supabase = MagicMock()
+    supabase.table.return_value = q
+
+    current, previous = _insight_month_totals(supabase, "user-1", "all", datetime(2026, 10, 19))
+
+    q.gte.assert_called_once_with("date", "2026-09-01")
+    q.lt.assert_called_once_with("date", "2026-11-01")
+    assert current == {"Food": 7.25}
+    assert previous == {"Food": 10.0}
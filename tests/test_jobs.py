@@ -0,0 +1,219 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.jobs as jobs
+from api.auth import get_current_user
+from api.jobs import JobRunner
+from api.routes import jobs as jobs_route
+from api.routes import recurring as recurring_route
+
+
+class _FakeJobsTable:
+    """Keeps ``jobs`` rows in memory for insert/update/select chains."""
+
+    def __init__(self):
+        self.rows = {}
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        assert name == "jobs"
+        return _FakeQuery(self)
+
+
+class _OneOf(tuple):
+    def __eq__(self, other):
+        return other in tuple(self)
+
+    __hash__ = tuple.__hash__
+
+
+class _Before(str):
+    def __eq__(self, other):
+        return other is not None and other < str(self)
+
+    __hash__ = str.__hash__
+
+
+class _FakeQuery:
+    def __init__(self, store):
+        self.store = store
+        self.op = None
+        self.payload = None
+        self.filters = {}
+
+    def insert(self, row):
+        self.op, self.payload = "insert", row
+        return self
+
+    def update(self, fields):
+        self.op, self.payload = "update", fields
+        return self
+
+    def select(self, columns):
+        self.op = "select"
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def lt(self, column, value):
+        self.filters[column] = _Before(value)
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = _OneOf(values)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        with self.store.lock:
+            if self.op == "insert":
+                self.store.rows[self.payload["id"]] = dict(self.payload)
+                return SimpleNamespace(data=[self.payload])
+            matches = [
+                row for row in self.store.rows.values()
+                if all(value == row.get(column) for column, value in self.filters.items())
+            ]
+            if self.op == "update":
+                for row in matches:
+                    row.update(self.payload)
+            return SimpleNamespace(data=[dict(row) for row in matches])
+
+
+def test_runner_limits_per_user_retries_and_reports_progress(monkeypatch):
+    store = _FakeJobsTable()
+    monkeypatch.setattr(jobs, "supabase_admin", store)
+    monkeypatch.setattr(jobs, "PROGRESS_MIN_INTERVAL_SECONDS", 0)
+    active = {"user-1": 0, "peak": 0}
+    calls = []
+    finished = threading.Event()
+
+    def handler(user_id, params, progress):
+        calls.append(params["n"])
+        with store.lock:
+            active[user_id] += 1
+            active["peak"] = max(active["peak"], active[user_id])
+        try:
+            progress({"done": params["n"]})
+            if params["n"] == 1 and calls.count(1) == 1:
+                raise RuntimeError("transient")
+            if params["n"] == 2:
+                raise ValueError("bad input")
+            return {"n": params["n"]}
+        finally:
+            with store.lock:
+                active[user_id] -= 1
+            if len(calls) == 4:
+                finished.set()
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "test.job", handler)
+    monkeypatch.setattr(jobs, "RETRYABLE_KINDS", {"test.job"})
+    runner = JobRunner(workers=4, per_user_limit=1, max_attempts=2, retry_backoff_seconds=0)
+    ids = [runner.submit("user-1", "test.job", {"n": n})["id"] for n in (1, 2, 3)]
+
+    assert finished.wait(5)
+    for _ in range(100):
+        if runner.stats() == {"running": 0, "waiting": 0} and all(
+            store.rows[job_id]["status"] in ("succeeded", "failed") for job_id in ids
+        ):
+            break
+        threading.Event().wait(0.02)
+
+    first, second, third = (store.rows[job_id] for job_id in ids)
+    assert active["peak"] == 1
+    assert (first["status"], first["attempts"], first["result"]) == ("succeeded", 2, {"n": 1})
+    assert (second["status"], second["attempts"]) == ("failed", 1)
+    assert "bad input" in second["error"]
+    assert third["status"] == "succeeded"
+    assert third["progress"] == {"done": 3}
+
+
+def test_async_recompute_returns_job_and_status_is_scoped_to_user(monkeypatch):
+    store = _FakeJobsTable()
+    monkeypatch.setattr(jobs, "supabase_admin", store)
+    monkeypatch.setattr(recurring_route, "_validate_account_scope", lambda user_id, account_id: "all")
+    submitted = []
+    monkeypatch.setattr(
+        jobs.get_job_runner(), "_schedule", lambda job: submitted.append(job)
+    )
+
+    app = FastAPI()
+    app.include_router(recurring_route.router, prefix="/api")
+    app.include_router(jobs_route.router, prefix="/api")
+    app.dependency_overrides[get_current_user] = lambda: "user-1"
+    client = TestClient(app)
+
+    res = client.post("/api/recurring/recompute?async=true", json={"lookback_months": 6})
+    assert res.status_code == 202
+    body = res.json()
+    assert body["kind"] == "recurring.recompute" and body["status"] == "queued"
+    assert submitted[0]["params"] == {"account_scope": "all", "lookback_months": 6, "min_occurrences": 2}
+
+    res = client.get(f"/api/jobs/{body['job_id']}")
+    assert res.status_code == 200
+    assert res.json()["job"]["status"] == "queued"
+
+    app.dependency_overrides[get_current_user] = lambda: "user-2"
+    assert client.get(f"/api/jobs/{body['job_id']}").status_code == 404
+
+
+def test_non_retryable_kind_fails_on_first_error(monkeypatch):
+    store = _FakeJobsTable()
+    monkeypatch.setattr(jobs, "supabase_admin", store)
+    done = threading.Event()
+
+    def handler(user_id, params, progress):
+        done.set()
+        raise RuntimeError("groq down")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "test.once", handler)
+    monkeypatch.setattr(jobs, "RETRYABLE_KINDS", set())
+    runner = JobRunner(workers=1, max_attempts=3, retry_backoff_seconds=0)
+    job_id = runner.submit("user-1", "test.once", {})["id"]
+
+    assert done.wait(5)
+    for _ in range(100):
+        if store.rows[job_id]["status"] == "failed":
+            break
+        threading.Event().wait(0.02)
+    assert (store.rows[job_id]["status"], store.rows[job_id]["attempts"], store.rows[job_id]["max_attempts"]) == ("failed", 1, 1)
+
+
+def test_fail_orphaned_jobs_fails_own_and_stale_unfinished_rows(monkeypatch):
+    store = _FakeJobsTable()
+    monkeypatch.setattr(jobs, "supabase_admin", store)
+    fresh = jobs._now_iso()
+    store.rows = {
+        "a": {"id": "a", "worker_id": "host-1", "status": "running", "updated_at": fresh},
+        "b": {"id": "b", "worker_id": "host-1", "status": "queued", "updated_at": fresh},
+        "c": {"id": "c", "worker_id": "host-1", "status": "succeeded", "updated_at": "2026-01-01T00:00:00"},
+        "d": {"id": "d", "worker_id": "host-2", "status": "running", "updated_at": fresh},
+        # a previous deploy's hostname: only caught by the staleness sweep
+        "e": {"id": "e", "worker_id": "old-host", "status": "running", "updated_at": "2026-01-01T00:00:00"},
+    }
+
+    assert JobRunner(worker_id="host-1", stale_after_seconds=3600).fail_orphaned_jobs() == 3
+    assert {job_id: row["status"] for job_id, row in store.rows.items()} == {
+        "a": "failed", "b": "failed", "c": "succeeded", "d": "running", "e": "failed",
+    }
+
+
+def test_job_status_rejects_non_uuid_ids(monkeypatch):
+    store = MagicMock()
+    monkeypatch.setattr(jobs, "supabase_admin", store)
+    app = FastAPI()
+    app.include_router(jobs_route.router, prefix="/api")
+    app.dependency_overrides[get_current_user] = lambda: "user-1"
+
+    assert TestClient(app).get("/api/jobs/not-a-uuid").status_code == 404
+    store.table.assert_not_called()
@@ -0,0 +1,33 @@
+import random
+
+from api.keyword_matcher import KeywordMatcher
+
+
+def _linear(keyword_map, description):
+    for keyword, category in sorted(keyword_map.items(), key=lambda kv: len(kv[0]), reverse=True):
+        if keyword in description:
+            return category
+    return None
+
+
+def test_matcher_prefers_longest_keyword_anywhere():
+    matcher = KeywordMatcher({"tesco": "Food", "tesco mobile": "Bills", "mobile": "Shopping", "c": "X"})
+    assert matcher.match("dd tesco mobile ltd") == "Bills"
+    assert matcher.match("tesco stores 123") == "Food"
+    assert matcher.match("mobile top up") == "Shopping"
+    assert matcher.match("zzz") is None
+    assert not KeywordMatcher({})
+
+
+def test_matcher_agrees_with_linear_scan():
+    rng = random.Random(3)
+    alphabet = "abc .*("
+    keyword_map = {}
+    for idx in range(60):
+        keyword = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))).strip()
+        if keyword:
+            keyword_map[keyword] = f"cat-{idx}"
+    matcher = KeywordMatcher(keyword_map)
+    for _ in range(2000):
+        description = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert matcher.match(description) == _linear(keyword_map, description)
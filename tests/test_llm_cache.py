@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from api import llm_cache
+from api.groq_service import GroqService
+from api.llm_cache import LLMResponseCache, prompt_fingerprint
+
+
+def test_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache, "time", lambda: clock[0])
+    cache = LLMResponseCache(":memory:", ttl_seconds=60, max_entries=2)
+
+    cache.put("a", "A", tokens=10)
+    cache.put("b", "B", tokens=20)
+    clock[0] += 1
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+
+    clock[0] += 120
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2, "hit_ratio": 0.333, "tokens_saved": 10}
+
+
+def test_fingerprint_covers_params():
+    base = prompt_fingerprint("m", "sys", "user", {"temperature": 0})
+    assert base == prompt_fingerprint("m", "sys", "user", {"temperature": 0})
+    assert base != prompt_fingerprint("m", "sys", "user", {"temperature": 0.4})
+
+
+def test_groq_service_reuses_identical_insight_prompts():
+    service = GroqService(api_key="test", supabase_client=MagicMock(), response_cache=LLMResponseCache(":memory:"))
+    service.client = MagicMock()
+    service.client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=" You spent most on Food. "))],
+        usage=SimpleNamespace(total_tokens=150),
+    )
+
+    first = service.get_spending_insights({"Food": 100.0}, {"Food": 80.0})
+    second = service.get_spending_insights({"Food": 100.0}, {"Food": 80.0})
+    service.get_spending_insights({"Food": 120.0}, {"Food": 80.0})
+
+    assert first == second == "You spent most on Food."
+    assert service.client.chat.completions.create.call_count == 2
+    assert service.response_cache.stats()["tokens_saved"] == 150
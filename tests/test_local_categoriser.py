@@ -0,0 +1,126 @@
+from unittest.mock import MagicMock
+
+from api.groq_service import GroqService
+from api.llm_cache import LLMResponseCache
+from api.local_categoriser import LocalCategoriser, iter_label_pages
+
+TRAINING = {
+    "Food": ["TESCO STORES", "TESCO EXPRESS", "SAINSBURYS LOCAL", "SAINSBURYS SUPERSTORE", "LIDL GB", "ALDI STORES"],
+    "Transport": ["TFL TRAVEL CHARGE", "TFL CYCLE HIRE", "TRAINLINE COM", "NATIONAL RAIL", "UBER TRIP", "SHELL FUEL"],
+    "Entertainment": ["NETFLIX COM", "SPOTIFY UK", "STEAM GAMES", "ODEON CINEMA", "DISNEY PLUS", "PRIME VIDEO"],
+}
+
+
+def _trained(tmp_path=None):
+    model = LocalCategoriser(path=str(tmp_path / "model.json") if tmp_path else None, min_confidence=0.9, min_examples=10)
+    examples = []
+    for category, names in TRAINING.items():
+        for name in names:
+            for store in (101, 2231, 4410):
+                text = f"{name} {store}"
+                examples.append((f"vendor:{text}", text, category))
+    model.learn(examples)
+    return model
+
+
+def test_local_model_resolves_variants_and_escalates_unknowns(tmp_path):
+    model = _trained(tmp_path)
+
+    assert model.predict("TESCO STORES 9981")[0] == "Food"
+    resolved = model.classify_confident(["TFL TRAVEL CHARGE 77", "QWZX PLUMBING"])
+    assert list(resolved) == ["TFL TRAVEL CHARGE 77"]
+    assert resolved["TFL TRAVEL CHARGE 77"][0] == "Transport"
+
+    model.save()
+    reloaded = LocalCategoriser(path=str(tmp_path / "model.json"), min_confidence=0.9, min_examples=10)
+    assert reloaded.stats()["examples"] == 0  # loads lazily
+    assert reloaded.predict("NETFLIX COM 5") == model.predict("NETFLIX COM 5")
+
+
+def test_relabel_replaces_previous_counts():
+    model = _trained()
+    before = model.stats()["examples"]
+    assert model.learn([("vendor:NETFLIX COM 101", "NETFLIX COM 101", "Bills")]) == 1
+    assert model.learn([("vendor:NETFLIX COM 101", "NETFLIX COM 101", "Bills")]) == 0
+    assert model.stats()["examples"] == before
+    assert model.learn([("vendor:NETFLIX COM 101", "NETFLIX COM 101", "Uncategorized")]) == 1
+    assert model.stats()["examples"] == before - 1
+
+
+def test_categorise_vendors_only_sends_unresolved_vendors_to_groq():
+    service = GroqService(api_key="test", supabase_client=MagicMock(), response_cache=LLMResponseCache(":memory:"), local_model=_trained())
+    service.local_model.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {}
+    service._save_to_vendor_cache = lambda mappings: None
+    sent = []
+
+    def fake_groq(system, user, max_tokens=600, cache=False):
+        sent.append(user)
+        return {"QWZX PLUMBING": "Bills"}
+
+    service._call_groq_json = fake_groq
+
+    result = service.categorise_vendors(["SPOTIFY UK 9", "QWZX PLUMBING"])
+
+    assert result == {"SPOTIFY UK 9": "Entertainment", "QWZX PLUMBING": "Bills"}
+    assert len(sent) == 1 and "SPOTIFY" not in sent[0]
+
+
+def test_learned_rules_only_apply_to_their_own_user():
+    model = _trained()
+    model.learn([(f"learned:u1:AMAZON MARKETPLACE {n}", f"AMAZON MARKETPLACE {n}", "Bills") for n in range(5)])
+
+    assert model.predict("AMAZON MARKETPLACE 77", user_id="u1")[0] == "Bills"
+    assert model.predict("AMAZON MARKETPLACE 77", user_id="u2") == (None, 0.0)
+    assert model.classify_confident(["AMAZON MARKETPLACE 77"], user_id="u2") == {}
+    assert model.stats()["user_partitions"] == 1
+
+
+def test_local_predictions_are_applied_but_not_saved_as_learned_rules():
+    client = MagicMock()
+    service = GroqService(api_key="test", supabase_client=client, response_cache=LLMResponseCache(":memory:"), local_model=_trained())
+    service.local_model.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {}
+    service._call_groq_json = lambda system, user, max_tokens=600, cache=False: {"QWZX PLUMBING": "Bills"}
+    saved = []
+    service._save_to_vendor_cache = lambda mappings: None
+    service._save_to_learned_rules = lambda mappings, user_id: saved.append(dict(mappings))
+
+    transactions = [
+        {"id": "t1", "description": "SPOTIFY UK 9", "category": "Uncategorized"},
+        {"id": "t2", "description": "QWZX PLUMBING", "category": "Uncategorized"},
+    ]
+    _, changed = service.apply_categories_to_transactions(transactions, "u1")
+
+    assert changed == 2
+    assert [t["category"] for t in transactions] == ["Entertainment", "Bills"]
+    assert saved == [{"QWZX PLUMBING": "Bills"}]
+
+
+
+def test_changed_count_excludes_failed_category_writes():
+    client = MagicMock()
+    client.table.return_value.update.return_value.in_.return_value.eq.return_value.execute.side_effect = RuntimeError("db down")
+    service = GroqService(api_key="test", supabase_client=client, response_cache=LLMResponseCache(":memory:"), local_model=_trained())
+    service.local_model.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {}
+    service._save_to_learned_rules = lambda mappings, user_id: None
+
+    _, changed = service.apply_categories_to_transactions(
+        [{"id": "t1", "description": "SPOTIFY UK 9", "category": "Uncategorized"}], "u1"
+    )
+
+    assert changed == 0
+
+def test_label_pages_break_updated_at_ties_by_id():
+    client = MagicMock()
+    query = client.table.return_value.select.return_value
+    query.order.return_value = query
+    query.range.return_value.execute.return_value.data = [
+        {"vendor_name": "TESCO STORES", "category": "Food", "updated_at": "2026-10-19T00:00:00"},
+    ]
+
+    pages = list(iter_label_pages(client, {}, tables=["vendor_categories"]))
+
+    assert [c.args for c in query.order.call_args_list] == [("updated_at",), ("id",)]
+    assert pages == [("vendor_categories", [("vendor:TESCO STORES", "TESCO STORES", "Food")], "2026-10-19T00:00:00")]
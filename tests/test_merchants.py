@@ -0,0 +1,32 @@
+from src.merchants import clean_display_name, merchant_key, normalise_merchant, vendor_key
+
+
+def test_normalise_merchant_strips_noise_and_builds_key():
+    display, key = normalise_merchant("Card Purchase NETFLIX.COM 12345678 | ref 998877")
+    assert display == "NETFLIX.COM"
+    assert key == "netflix com"
+    assert merchant_key(display) == key
+
+
+def test_clean_display_name_handles_empty_and_memoises():
+    assert clean_display_name(None) == "Unknown"
+    assert clean_display_name("") == "Unknown"
+
+    normalise_merchant.cache_clear()
+    clean_display_name("Direct Debit SPOTIFY UK")
+    clean_display_name("Direct Debit SPOTIFY UK")
+    info = normalise_merchant.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
+def test_vendor_key_strips_card_dates_store_numbers_and_ids():
+    assert vendor_key("TESCO STORES 2231 CARD 4410 01FEB") == "tesco stores"
+    assert vendor_key("TESCO STORES 1187") == "tesco stores"
+    assert vendor_key("CARD PAYMENT TO SAINSBURYS #0123 ON 02/03/2026") == "sainsburys"
+    assert vendor_key("PRET A MANGER ****1234") == "pret a manger"
+    assert vendor_key("AMZN Mktp UK*AB12C3DE4") == "amzn mktp uk"
+    assert vendor_key("STARBUCKS REF 998877 | extra") == "starbucks"
+    assert vendor_key("O2 UK") == "o2 uk"
+    # Nothing but an id left: keep the raw text rather than an empty key.
+    assert vendor_key("12345") == "12345"
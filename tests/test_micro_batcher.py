@@ -0,0 +1,65 @@
+import threading
+
+from api.micro_batcher import MicroBatcher
+
+
+def test_concurrent_callers_fill_one_batch():
+    batches = []
+
+    def handler(items):
+        batches.append(list(items))
+        return {item: item.upper() for item in items}
+
+    batcher = MicroBatcher(handler, max_batch=9, max_wait_ms=2000)
+    results = {}
+
+    def caller(name):
+        results[name] = batcher.map([f"{name}-{i}" for i in range(3)])
+
+    threads = [threading.Thread(target=caller, args=(name,)) for name in ("a", "b", "c")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # Full at nine items, so the batch goes out without waiting for max_wait.
+    assert len(batches) == 1 and len(batches[0]) == 9
+    assert results["b"] == {"b-0": "B-0", "b-1": "B-1", "b-2": "B-2"}
+    assert batcher.stats()["items_per_batch"] == 9.0
+
+
+def test_large_submissions_split_and_failures_use_default():
+    sizes = []
+
+    def handler(items):
+        sizes.append(len(items))
+        if "x-30" in items:
+            raise RuntimeError("groq down")
+        return {item: "Food" for item in items}
+
+    batcher = MicroBatcher(handler, max_batch=15, max_wait_ms=10, default="Uncategorized")
+    results = batcher.map([f"x-{i}" for i in range(35)])
+
+    assert sorted(sizes) == [5, 15, 15]
+    assert results["x-0"] == "Food"
+    assert results["x-30"] == "Uncategorized"
+
+
+def test_batches_in_flight_are_capped():
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def handler(items):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        threading.Event().wait(0.2)
+        with lock:
+            running["now"] -= 1
+        return {item: "Food" for item in items}
+
+    batcher = MicroBatcher(handler, max_batch=1, max_wait_ms=0, max_concurrency=2)
+    results = batcher.map([f"v-{i}" for i in range(6)], timeout=5)
+
+    assert set(results.values()) == {"Food"}
+    assert running["peak"] == 2
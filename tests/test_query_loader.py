@@ -0,0 +1,41 @@
+from unittest.mock import MagicMock
+
+from api import query_loader
+
+
+def test_load_memoises_identical_queries_within_scope():
+    fetch = MagicMock(return_value=[{"id": "acc-1"}])
+
+    with query_loader.request_scope() as loader:
+        first = query_loader.load(("account", "user-1", "acc-1"), fetch)
+        second = query_loader.load(("account", "user-1", "acc-1"), fetch)
+
+    assert first == second == [{"id": "acc-1"}]
+    fetch.assert_called_once()
+    assert loader.stats() == {"queries": 1, "hits": 1}
+
+
+def test_load_many_fetches_only_missing_keys():
+    calls = []
+
+    def fetch_many(missing):
+        calls.append(list(missing))
+        return {key: {"id": key} for key in missing if key != "t-missing"}
+
+    with query_loader.request_scope() as loader:
+        first = query_loader.load_many(("transaction", "user-1"), ["t1", "t2"], fetch_many)
+        second = query_loader.load_many(("transaction", "user-1"), ["t2", "t3", "t-missing"], fetch_many)
+        third = query_loader.load_many(("transaction", "user-1"), ["t-missing"], fetch_many)
+
+    assert calls == [["t1", "t2"], ["t3", "t-missing"]]
+    assert set(first) == {"t1", "t2"}
+    assert set(second) == {"t2", "t3"}
+    assert third == {}
+    assert loader.queries == 2
+
+
+def test_load_without_scope_always_fetches():
+    fetch = MagicMock(return_value=[])
+    query_loader.load(("budget_targets", "user-1"), fetch)
+    query_loader.load(("budget_targets", "user-1"), fetch)
+    assert fetch.call_count == 2
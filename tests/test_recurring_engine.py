@@ -0,0 +1,41 @@
+import random
+from datetime import date, timedelta
+
+from api.recurring_engine import score_groups
+from api.routes import recurring as recurring_route
+
+
+def _random_groups(seed: int, count: int):
+    rng = random.Random(seed)
+    groups = {}
+    for idx in range(count):
+        base_interval = rng.choice([7, 14, 30, 45, 3])
+        start = date(2025, 1, 1) + timedelta(days=rng.randint(0, 60))
+        dates = [start]
+        for _ in range(rng.randint(0, 14)):
+            dates.append(dates[-1] + timedelta(days=max(0, base_interval + rng.randint(-3, 3))))
+        base_amount = rng.uniform(3, 120)
+        amounts = [-round(base_amount * rng.uniform(0.6, 1.4), 2) for _ in dates]
+        rng.shuffle(dates)
+        groups[("acc-1", f"merchant-{idx}")] = (dates, amounts)
+    return groups
+
+
+def test_score_groups_matches_scalar_scoring():
+    groups = _random_groups(seed=7, count=300)
+
+    scores = score_groups(groups)
+
+    for key, (dates, amounts) in groups.items():
+        sorted_dates = sorted(dates)
+        cadence, cadence_days = recurring_route._classify_cadence(sorted_dates)
+        confidence = recurring_route._confidence_score(sorted_dates, amounts, cadence_days)
+        assert scores[key][0] == cadence
+        assert scores[key][1] == cadence_days
+        assert abs(scores[key][2] - confidence) < 1e-9
+
+
+def test_score_groups_handles_single_occurrence_and_empty_input():
+    assert score_groups({}) == {}
+    scores = score_groups({"solo": ([date(2026, 1, 1)], [-10.0])})
+    assert scores["solo"] == ("irregular", None, recurring_route._confidence_score([date(2026, 1, 1)], [-10.0], None))
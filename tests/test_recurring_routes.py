@@ -19,6 +19,7 @@ def _mock_query(data=None):
     q.lt.return_value = q
     q.upsert.return_value = q
     q.update.return_value = q
+    q.in_.return_value = q
     q.execute.return_value = SimpleNamespace(data=data or [])
     return q
 
@@ -67,9 +68,10 @@ def test_recompute_recurring_creates_rule(monkeypatch):
     default_account_q = _mock_query(data=[{"id": "acc-1", "is_default": True}])
     existing_q = _mock_query(data=[])
     upsert_q = _mock_query(data=[])
+    stats_q = _mock_query(data=[])
 
     mock_supabase = MagicMock()
-    mock_supabase.table.side_effect = [default_account_q, existing_q, upsert_q]
+    mock_supabase.table.side_effect = [default_account_q, existing_q, upsert_q, stats_q]
 
     client = _client(mock_supabase)
     res = client.post("/api/recurring/recompute", json={"lookback_months": 12, "min_occurrences": 3, "account_id": "all"})
@@ -80,6 +82,8 @@ def test_recompute_recurring_creates_rule(monkeypatch):
     assert payload["rules_updated"] == 0
     assert payload["scanned_transactions"] == 3
     upsert_q.upsert.assert_called_once()
+    stats_q.upsert.assert_called_once()
+    assert payload["stats_updated"] == 1
 
 
 def test_recompute_recurring_rejects_invalid_account():
@@ -121,3 +125,129 @@ def test_upcoming_recurring_returns_items(monkeypatch):
     assert len(payload["items"]) == 1
     assert payload["items"][0]["display_name"] == "Netflix"
     assert payload["items"][0]["expected_amount"] == 12.99
+
+
+def test_incremental_update_matches_full_recompute_scoring():
+    txns = [
+        {"account_id": "acc-1", "date": f"2026-0{month}-10", "description": "Netflix\nPurchase", "amount": amount, "category": "Entertainment"}
+        for month, amount in [(1, -12.99), (2, -12.99), (3, -13.49), (4, -12.99)]
+    ]
+    dates = [recurring_route._parse_date(t["date"]) for t in txns]
+    cadence, cadence_days = recurring_route._classify_cadence(dates)
+    expected_confidence = recurring_route._confidence_score(dates, [t["amount"] for t in txns], cadence_days)
+
+    stats = recurring_route._empty_stats("user-1", "acc-1", "netflix")
+    stats = recurring_route._merge_into_stats(stats, [txns[0], txns[2]])
+    stats = recurring_route._merge_into_stats(stats, [txns[3], txns[1]])
+    rule = recurring_route._rule_from_stats("user-1", stats, "active")
+
+    assert stats["occurrence_count"] == 4
+    assert stats["interval_count"] == 3
+    assert stats["interval_sum"] == (dates[-1] - dates[0]).days
+    assert rule["cadence"] == cadence == "monthly"
+    assert rule["confidence"] == expected_confidence
+    assert rule["display_name"] == "Netflix"
+    assert rule["next_expected_date"] == "2026-05-10"
+
+
+def test_update_recurring_from_transactions_touches_only_new_merchants():
+    stats_read_q = _mock_query(
+        data=[
+            {
+                **recurring_route._merge_into_stats(
+                    recurring_route._empty_stats("user-1", "acc-1", "netflix"),
+                    [{"date": "2026-01-10", "description": "Netflix", "amount": -12.99, "category": "Entertainment"}],
+                ),
+                "id": "stats-1",
+            }
+        ]
+    )
+    rules_read_q = _mock_query(data=[])
+    stats_write_q = _mock_query(data=[])
+    rules_write_q = _mock_query(data=[])
+
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [stats_read_q, rules_read_q, stats_write_q, rules_write_q]
+    recurring_route.supabase_admin = mock_supabase
+
+    result = recurring_route.update_recurring_from_transactions(
+        "user-1",
+        [
+            {"account_id": "acc-1", "date": "2026-02-10", "description": "Netflix", "amount": -12.99, "category": "Entertainment"},
+            {"account_id": "acc-1", "date": "2026-02-11", "description": "Salary", "amount": 2500, "category": "Income"},
+        ],
+    )
+
+    assert result == {"stats_updated": 1, "rules_created": 1, "rules_updated": 0}
+    stats_read_q.in_.assert_called_once_with("merchant_key", ["netflix"])
+    upserted_rules = rules_write_q.upsert.call_args[0][0]
+    assert upserted_rules[0]["occurrence_count"] == 2
+    assert upserted_rules[0]["cadence"] == "monthly"
+
+
+def test_merge_keeps_intervals_exact_for_late_row_on_trimmed_window_start():
+    limit = recurring_route._RECENT_DATES_LIMIT
+    start = recurring_route._parse_date("2020-01-01")
+    dates = [(start + recurring_route.timedelta(days=7 * i)).isoformat() for i in range(limit + 10)]
+    txns = [{"date": d, "description": "Gym", "amount": -20, "category": "Health"} for d in dates]
+    stats = recurring_route._merge_into_stats(recurring_route._empty_stats("user-1", "acc-1", "gym"), txns)
+    window_start = stats["recent_dates"][0]
+    assert window_start > stats["first_seen_date"]
+
+    late = {"date": window_start, "description": "Gym", "amount": -20, "category": "Health"}
+    merged = recurring_route._merge_into_stats(stats, [late])
+    expected = recurring_route._merge_into_stats(
+        recurring_route._empty_stats("user-1", "acc-1", "gym"), txns + [late]
+    )
+
+    assert (merged["interval_count"], merged["interval_sum"], merged["interval_sq_sum"]) == (
+        expected["interval_count"], expected["interval_sum"], expected["interval_sq_sum"],
+    )
+
+
+def test_update_recurring_treats_new_merchants_as_empty_without_history_read():
+    stats_read_q = _mock_query(data=[])
+    threshold_q = _mock_query(data=[])
+    rules_read_q = _mock_query(data=[])
+    stats_write_q = _mock_query(data=[])
+    rules_write_q = _mock_query(data=[])
+
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [stats_read_q, threshold_q, rules_read_q, stats_write_q, rules_write_q]
+    recurring_route.supabase_admin = mock_supabase
+
+    result = recurring_route.update_recurring_from_transactions(
+        "user-1",
+        [{"id": "t1", "account_id": "acc-1", "date": "2026-02-10", "description": "New Cafe", "amount": -4.5, "category": "Food"}],
+    )
+
+    assert result == {"stats_updated": 1, "rules_created": 0, "rules_updated": 0}
+    assert [c.args[0] for c in mock_supabase.table.call_args_list] == [
+        "recurring_merchant_stats", "recurring_merchant_stats", "recurring_rules", "recurring_merchant_stats",
+    ]
+
+
+def test_update_recurring_seeds_missing_stats_from_history_and_reuses_threshold():
+    history = [
+        {"id": f"t{month}", "account_id": "acc-1", "date": f"2026-0{month}-10", "description": "Netflix", "amount": -12.99, "category": "Entertainment"}
+        for month in (1, 2, 3, 4)
+    ]
+    stats_read_q = _mock_query(data=[])
+    threshold_q = _mock_query(data=[{"min_occurrences": 3}])
+    rules_read_q = _mock_query(data=[{"id": "rule-1", "account_id": "acc-1", "merchant_key": "netflix", "status": "active"}])
+    history_q = _mock_query(data=history)
+    stats_write_q = _mock_query(data=[])
+    rules_write_q = _mock_query(data=[])
+
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [stats_read_q, threshold_q, rules_read_q, history_q, stats_write_q, rules_write_q]
+    recurring_route.supabase_admin = mock_supabase
+
+    # The uploaded row is already saved, so it is part of the history read too.
+    result = recurring_route.update_recurring_from_transactions("user-1", [history[-1]])
+
+    assert result == {"stats_updated": 1, "rules_created": 0, "rules_updated": 1}
+    history_q.in_.assert_called_once_with("account_id", ["acc-1"])
+    seeded = stats_write_q.upsert.call_args[0][0][0]
+    assert (seeded["occurrence_count"], seeded["min_occurrences"]) == (4, 3)
+    assert rules_write_q.upsert.call_args[0][0][0]["occurrence_count"] == 4
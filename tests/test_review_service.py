@@ -0,0 +1,112 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from api import review_service
+
+
+def _query(data):
+    q = MagicMock()
+    for name in ("select", "eq", "gte", "lt", "lte", "is_", "limit", "insert", "update"):
+        getattr(q, name).return_value = q
+    q.execute.return_value = SimpleNamespace(data=data)
+    return q
+
+
+def test_get_or_create_review_fetches_both_periods_in_one_query(monkeypatch):
+    transactions = [
+        {"date": "2026-02-10", "description": "Tesco Stores", "amount": -40.0, "category": "Food"},
+        {"date": "2026-03-03", "description": "Tesco Stores", "amount": -60.0, "category": "Food"},
+        {"date": "2026-03-04", "description": "Salary", "amount": 2000.0, "category": "Income"},
+        {"date": "2026-03-05", "description": "To savings", "amount": -500.0, "category": "Transfer"},
+    ]
+    reviews_existing = _query([])
+    versions_q = _query([{"account_id": "acc-1", "month": "2026-03-01", "version": 3}])
+    txns_q = _query(transactions)
+    targets_q = _query([{"category": "Food", "target_amount": 50}])
+    insert_q = _query([{"id": "review-1"}])
+    events_q = _query([])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [reviews_existing, versions_q, txns_q, targets_q, insert_q, events_q]
+    monkeypatch.setattr(review_service, "supabase_admin", mock_supabase)
+
+    review_service.get_or_create_review(
+        user_id="user-1",
+        review_type="monthly_closeout",
+        triggered_by="manual",
+        period_start=date(2026, 3, 1),
+        period_end=date(2026, 3, 31),
+    )
+
+    txns_q.gte.assert_called_once_with("date", "2026-01-29")
+    txns_q.lt.assert_called_once_with("date", "2026-04-01")
+    inserted = insert_q.insert.call_args[0][0]
+    assert inserted["data_version"] == 3
+    summary = inserted["summary"]
+    assert summary["totals"] == {"spent": 60.0, "income": 2000.0, "net": 1940.0, "transaction_count": 3}
+    assert summary["top_merchants"] == [{"merchant": "Tesco Stores", "amount": 60.0, "count": 1}]
+    assert summary["category_changes_vs_previous"][0]["previous"] == 40.0
+    assert {"type": "spike_vs_previous", "category": "Food", "severity": "low"} in summary["flags"]
+
+
+def _stored_review(data_version, review_type="monthly_closeout"):
+    return {
+        "id": "review-1",
+        "review_type": review_type,
+        "user_id": "user-1",
+        "account_scope": "all",
+        "period_start": "2026-03-01",
+        "period_end": "2026-03-31",
+        "statement_id": None,
+        "summary": {"totals": {"spent": 1.0}},
+        "data_version": data_version,
+    }
+
+
+def test_refresh_review_returns_fresh_review_without_recompute(monkeypatch):
+    versions_q = _query([{"account_id": "acc-1", "month": "2026-03-01", "version": 2}])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [versions_q]
+    monkeypatch.setattr(review_service, "supabase_admin", mock_supabase)
+
+    review = review_service.refresh_review(_stored_review(2))
+
+    assert review["stale"] is False
+    assert review["recomputed"] is False
+    assert mock_supabase.table.call_count == 1
+
+
+def test_refresh_review_recomputes_when_period_changed(monkeypatch):
+    versions_q = _query([{"account_id": "acc-1", "month": "2026-03-01", "version": 5}])
+    txns_q = _query([{"date": "2026-03-03", "description": "Tesco", "amount": -12.5, "category": "Food"}])
+    targets_q = _query([])
+    update_q = _query([])
+    events_q = _query([])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [versions_q, txns_q, targets_q, update_q, events_q]
+    monkeypatch.setattr(review_service, "supabase_admin", mock_supabase)
+
+    assert review_service.refresh_review(_stored_review(2), recompute=False)["stale"] is True
+
+    mock_supabase.table.side_effect = [versions_q, txns_q, targets_q, update_q, events_q]
+    review = review_service.refresh_review(_stored_review(2))
+
+    assert review["recomputed"] is True
+    assert review["stale"] is False
+    assert review["data_version"] == 5
+    assert review["summary"]["totals"]["spent"] == 12.5
+    written = update_q.update.call_args[0][0]
+    assert written["data_version"] == 5
+
+
+def test_refresh_review_never_rewrites_upload_snapshots(monkeypatch):
+    versions_q = _query([{"account_id": "acc-1", "month": "2026-03-01", "version": 5}])
+    mock_supabase = MagicMock()
+    mock_supabase.table.side_effect = [versions_q]
+    monkeypatch.setattr(review_service, "supabase_admin", mock_supabase)
+
+    review = review_service.refresh_review(_stored_review(2, review_type="upload_snapshot"))
+
+    assert (review["stale"], review["recomputed"]) == (True, False)
+    assert review["summary"] == {"totals": {"spent": 1.0}}
+    assert mock_supabase.table.call_count == 1
@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+from api.groq_service import GroqService
+from api.llm_cache import LLMResponseCache
+from api.local_categoriser import LocalCategoriser
+from api.single_flight import SingleFlight
+from api.vendor_index import VendorIndex
+
+CATEGORIES = {"TESCO STORES": "Food", "TFL TRAVEL": "Transport", "AMAZON": "Shopping", "NETFLIX": "Entertainment"}
+
+
+def _service(flights, call_groq):
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+        vendor_index=VendorIndex(),
+        vendor_flights=flights,
+    )
+    service.local_model.sync = lambda client, force=False: 0
+    service.vendor_index.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {}
+    service._save_to_vendor_cache = lambda mappings: None
+    service._call_groq_json = call_groq
+    return service
+
+
+def test_concurrent_callers_share_in_flight_vendors():
+    flights = SingleFlight()
+    first_in_groq = threading.Event()
+    release = threading.Event()
+    sent = []
+
+    def fake_groq(system, user, max_tokens=600, cache=False):
+        vendors = json.loads(user.split(": ", 1)[1])
+        sent.extend(vendors)
+        if "TESCO STORES" in vendors:
+            first_in_groq.set()
+            release.wait(5)
+        return {v: CATEGORIES[v] for v in vendors}
+
+    service = _service(flights, fake_groq)
+    results = {}
+    first = threading.Thread(
+        target=lambda: results.setdefault("first", service.categorise_vendors(["TESCO STORES", "TFL TRAVEL"]))
+    )
+    first.start()
+    assert first_in_groq.wait(5)
+
+    second = threading.Thread(
+        target=lambda: results.setdefault("second", service.categorise_vendors(["TESCO STORES", "AMAZON", "NETFLIX"]))
+    )
+    second.start()
+    deadline = time.monotonic() + 5
+    while flights.stats()["coalesced"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert sorted(sent) == ["AMAZON", "NETFLIX", "TESCO STORES", "TFL TRAVEL"]
+    assert results["first"] == {"TESCO STORES": "Food", "TFL TRAVEL": "Transport"}
+    assert results["second"] == {"TESCO STORES": "Food", "AMAZON": "Shopping", "NETFLIX": "Entertainment"}
+    assert flights.stats() == {"in_flight": 0, "owned": 4, "coalesced": 1}
+
+
+def test_waiters_fall_back_to_uncategorised_when_owner_fails():
+    flights = SingleFlight()
+    owned, _ = flights.claim(["TESCO STORES"])
+    _, waiting = flights.claim(["TESCO STORES"])
+
+    flights.complete(owned, {}, default="Uncategorized")
+
+    assert flights.wait(waiting) == {"TESCO STORES": "Uncategorized"}
+    assert flights.claim(["TESCO STORES"])[0] == ["TESCO STORES"]
@@ -0,0 +1,31 @@
+import io
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from scripts.startup_report import LAZY_MODULES, measure, measure_app_startup, summarise
+
+
+def test_api_startup_does_not_import_heavy_libraries():
+    # Fresh interpreter: this test process has already imported most of them.
+    report = summarise(measure("api.main"))
+
+    assert report["lazy_modules_loaded"] == [], f"import lazily: {report['lazy_modules_loaded']}"
+    assert report["total_ms"] > 0
+
+
+def test_app_startup_event_does_not_import_groq():
+    # Runs the startup hooks (TestClient context) with GROQ_API_KEY set.
+    assert measure_app_startup() == []
+
+
+def test_parser_loads_pandas_on_first_parse(monkeypatch):
+    assert not {name for name, _, _ in measure("src.ingestion.parser")} & set(LAZY_MODULES)
+
+    import src.ingestion.parser as parser
+
+    monkeypatch.setattr(parser, "load_learned_rules", lambda user_id: {})
+    df = parser.AmexCSVParser().parse(io.StringIO("Date,Description,Amount\n01/02/2026,TESCO STORES,12.50\n"))
+    assert df[["Description", "Amount"]].to_dict("records") == [{"Description": "TESCO STORES", "Amount": -12.5}]
@@ -119,6 +119,8 @@ def test_upload_creates_snapshot_review(monkeypatch):
     monkeypatch.setattr(upload_route, "get_all_statement_paths", lambda user_id: [])
     monkeypatch.setattr(upload_route, "apply_user_keywords", lambda txns, user_id: txns)
     monkeypatch.setattr(upload_route, "apply_transfer_classification", lambda txns: txns)
+    recurring_mock = MagicMock(return_value={"stats_updated": 1, "rules_created": 0, "rules_updated": 0})
+    monkeypatch.setattr(upload_route, "update_recurring_from_transactions", recurring_mock)
 
     review_mock = MagicMock(return_value={"id": "review-1"})
     monkeypatch.setattr(upload_route, "get_or_create_review", review_mock)
@@ -135,3 +137,4 @@ def test_upload_creates_snapshot_review(monkeypatch):
     assert payload["success"] is True
     assert payload["review_id"] == "review-1"
     review_mock.assert_called_once()
+    recurring_mock.assert_called_once()
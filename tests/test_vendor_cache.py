@@ -0,0 +1,79 @@
+from api.groq_service import GroqService
+from api.llm_cache import LLMResponseCache
+from api.local_categoriser import LocalCategoriser
+
+
+class _Query:
+    def __init__(self, table):
+        self.table = table
+        self.column = None
+        self.values = []
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self.column, self.values = column, list(values)
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.table.upserts.append(rows)
+        return self
+
+    def execute(self):
+        class Result:
+            data = []
+
+        if self.column:
+            self.table.lookups.append(self.column)
+            Result.data = [row for row in self.table.rows if row.get(self.column) in self.values]
+        return Result
+
+
+class _Table:
+    def __init__(self, rows):
+        self.rows = rows
+        self.lookups = []
+        self.upserts = []
+
+
+class _Client:
+    def __init__(self, rows):
+        self.vendor_categories = _Table(rows)
+
+    def table(self, name):
+        assert name == "vendor_categories"
+        return _Query(self.vendor_categories)
+
+
+def _service(client):
+    return GroqService(
+        api_key="test",
+        supabase_client=client,
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=LocalCategoriser(path=None),
+    )
+
+
+def test_cached_categories_match_variants_by_vendor_key():
+    client = _Client([
+        {"vendor_name": "TESCO STORES 2231", "vendor_key": "tesco stores", "category": "Food", "updated_at": "2026-10-01"},
+        {"vendor_name": "UBER *TRIP 8812", "vendor_key": "uber trip", "category": "Uncategorized", "updated_at": "2026-10-02"},
+        {"vendor_name": "UBER *TRIP 1200", "vendor_key": "uber trip", "category": "Transport", "updated_at": "2026-09-01"},
+    ])
+
+    cached = _service(client).get_cached_categories(["TESCO STORES 4410 CARD 1234", "UBER *TRIP 7", "QWZX 1"])
+
+    assert cached == {"TESCO STORES 4410 CARD 1234": "Food", "UBER *TRIP 7": "Transport"}
+    assert client.vendor_categories.lookups == ["vendor_key", "vendor_name"]
+
+
+def test_legacy_rows_without_key_resolve_by_name_and_get_backfilled():
+    client = _Client([{"vendor_name": "NETFLIX.COM 01FEB", "vendor_key": None, "category": "Entertainment"}])
+    service = _service(client)
+
+    assert service.get_cached_categories(["NETFLIX.COM 01FEB"]) == {"NETFLIX.COM 01FEB": "Entertainment"}
+    assert client.vendor_categories.upserts == [
+        [{"vendor_name": "NETFLIX.COM 01FEB", "vendor_key": "netflix com", "category": "Entertainment"}]
+    ]
+    assert service.local_model.stats()["examples"] == 0
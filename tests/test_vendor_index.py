@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+from api.groq_service import GroqService
+from api.llm_cache import LLMResponseCache
+from api.local_categoriser import LocalCategoriser
+from api.vendor_index import VendorIndex
+
+
+def _index():
+    index = VendorIndex(min_similarity=0.6)
+    index.add([
+        ("vendor:TFL TRAVEL CHARGE", "TFL TRAVEL CHARGE", "Transport"),
+        ("vendor:SAINSBURYS SUPERMKT 12", "SAINSBURYS SUPERMKT 12", "Food"),
+        ("vendor:NETFLIX.COM", "NETFLIX.COM", "Entertainment"),
+        ("learned:u1:AMAZON MARKETPLACE", "AMAZON MARKETPLACE", "Bills"),
+    ])
+    return index
+
+
+def test_nearest_finds_new_spellings_and_ignores_unknowns():
+    index = _index()
+
+    vendor, category, score = index.nearest("TFL TRAVEL CH 0401")
+    assert (vendor, category) == ("TFL TRAVEL CHARGE", "Transport")
+    assert 0.6 <= score < 1.0
+    assert index.nearest("NETFLIX COM 01FEB") == ("NETFLIX.COM", "Entertainment", 1.0)
+    assert list(index.match(["TFL TRAVEL CHG", "QWZX PLUMBING"])) == ["TFL TRAVEL CHG"]
+    # Per-user learned rules are never indexed.
+    assert index.nearest("AMAZON MARKETPLACE") == (None, None, 0.0)
+
+
+def test_relabel_and_uncategorised_rows_update_incrementally():
+    index = _index()
+    assert index.add([("vendor:TFL TRAVEL CHARGE", "TFL TRAVEL CHARGE", "Transport")]) == 0
+
+    index.add([("vendor:TFL TRAVEL CHARGE", "TFL TRAVEL CHARGE", "Bills")])
+    assert index.nearest("TFL TRAVEL CHARGE")[1] == "Bills"
+
+    index.add([("vendor:TFL TRAVEL CHARGE", "TFL TRAVEL CHARGE", "Uncategorized")])
+    assert index.nearest("TFL TRAVEL CHARGE") == (None, None, 0.0)
+    assert len(index) == 2
+
+
+def test_index_is_fed_by_the_local_model_and_matches_are_not_learned():
+    local = LocalCategoriser(path=None)
+    local.sync = lambda client, force=False: 0
+    index = VendorIndex(min_similarity=0.6)
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=local,
+        vendor_index=index,
+    )
+    local.learn([("vendor:TFL TRAVEL CHARGE", "TFL TRAVEL CHARGE", "Transport")])
+    assert len(index) == 1
+    service.get_cached_categories = lambda vendors: {}
+    service._save_to_vendor_cache = lambda mappings: None
+    saved = []
+    service._save_to_learned_rules = lambda mappings, user_id: saved.append(mappings)
+
+    transactions = [{"id": "t1", "description": "TFL TRAVEL CH 0401", "category": "Uncategorized"}]
+    _, changed = service.apply_categories_to_transactions(transactions, "u1")
+
+    assert changed == 1 and transactions[0]["category"] == "Transport"
+    assert saved == []
+
+
+def test_categorise_vendors_uses_index_before_groq():
+    index = _index()
+    index.sync = lambda client, force=False: 0
+    local = LocalCategoriser(path=None)
+    service = GroqService(
+        api_key="test",
+        supabase_client=MagicMock(),
+        response_cache=LLMResponseCache(":memory:"),
+        local_model=local,
+        vendor_index=index,
+    )
+    local.sync = lambda client, force=False: 0
+    service.get_cached_categories = lambda vendors: {}
+    service._save_to_vendor_cache = lambda mappings: None
+    sent = []
+
+    def fake_groq(system, user, max_tokens=600, cache=False):
+        sent.append(user)
+        return {"QWZX PLUMBING": "Bills"}
+
+    service._call_groq_json = fake_groq
+
+    result = service.categorise_vendors(["TFL TRAVEL CH 0401", "QWZX PLUMBING"])
+
+    assert result == {"TFL TRAVEL CH 0401": "Transport", "QWZX PLUMBING": "Bills"}
+    assert len(sent) == 1 and "TFL" not in sent[0]